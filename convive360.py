@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CLI de Convive360
+Un solo punto de entrada para los scripts del repositorio. Cada subcomando
+importa su módulo solo al ejecutarse: `status` y `diff` arrancan sin cargar
+pandas ni las librerías de Google. Lo que sigue al subcomando se pasa tal
+cual al script (p. ej. `extract --bloques 5000`, `bench ejecutar --escalas 1000`).
+
+  extract    Sheets → fact_actividades y dimensiones (run_pipeline.py)
+  clean      depuración con diccionario y limpieza del CSV
+  enrich     barrios desde direcciones (enriquecer_con_barrios.py)
+  model      modelo dimensional para Power BI (generar_modelo_completo.py)
+  chain      cadena de actividades en memoria (pipeline_actividades.py)
+  diagnose   conteos Sheets vs archivos locales (diagnostico_conteo.py)
+  bench      benchmark por etapa (benchmark_pipeline.py)
+  status     última ejecución registrada y estado de las salidas
+  diff       salidas con cambios sin versionar (git)
+
+Uso: python convive360.py <subcomando> [argumentos del script]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, 'scripts')
+
+# Mismas rutas relativas que usa run_pipeline.py (directorio actual)
+METRICAS_FILE = os.getenv('METRICAS_FILE', 'pipeline_metrics.jsonl')
+SALIDAS = [
+    'fact_actividades.csv',
+    'fact_actividades_enriquecido.csv',
+    'dimensiones',
+    'indice_duplicados.npy',
+]
+
+
+def _importar(modulo):
+    for ruta in (SCRIPTS_DIR, BASE_DIR):
+        if ruta not in sys.path:
+            sys.path.insert(0, ruta)
+    return importlib.import_module(modulo)
+
+
+def _delegar(modulo, funcion='main', con_argumentos=True):
+    """Subcomando que llama modulo.funcion(argumentos) al ejecutarse"""
+    def ejecutar(argumentos):
+        if argumentos and not con_argumentos:
+            print(f"❌ {modulo} no recibe argumentos: {' '.join(argumentos)}")
+            return 2
+        objetivo = getattr(_importar(modulo), funcion)
+        return (objetivo(argumentos) if con_argumentos else objetivo()) or 0
+    return ejecutar
+
+
+def limpiar(argumentos):
+    """Depuración con diccionario y luego limpieza/validación del CSV"""
+    codigo = _delegar('limpiar_agendamiento_con_diccionario', 'procesar_archivo', False)(argumentos)
+    return codigo or _delegar('limpiar_csv_completo', con_argumentos=False)(argumentos)
+
+
+# =====================================================================
+# COMANDOS RÁPIDOS (sin pandas)
+# =====================================================================
+def _ultima_linea(ruta):
+    """Última línea no vacía de un archivo, leyendo desde el final"""
+    with open(ruta, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        posicion = f.tell()
+        bloque = b''
+        while posicion > 0 and bloque.strip().count(b'\n') < 1:
+            paso = min(4096, posicion)
+            posicion -= paso
+            f.seek(posicion)
+            bloque = f.read(paso) + bloque
+    lineas = bloque.strip().splitlines()
+    return lineas[-1].decode('utf-8') if lineas else None
+
+
+def _edad(segundos):
+    for unidad, tamano in (('d', 86400), ('h', 3600), ('min', 60)):
+        if segundos >= tamano:
+            return f"{segundos / tamano:.0f} {unidad}"
+    return f"{segundos:.0f} s"
+
+
+def estado(argumentos):
+    """Última línea de pipeline_metrics.jsonl y fecha/tamaño de las salidas"""
+    if os.path.exists(METRICAS_FILE) and (linea := _ultima_linea(METRICAS_FILE)):
+        ultima = json.loads(linea)
+        print(f"📈 Última ejecución: {ultima['inicio']} — {ultima['estado']} en {ultima['reloj_s']:.1f} s")
+        if ultima['estado'] == 'ok':
+            print(f"   {ultima.get('filas_extraidas', '-')} respuestas → {ultima.get('filas_fact', '-')} actividades, "
+                  f"{ultima.get('dimensiones', '-')} dimensiones")
+        else:
+            print(f"   ❌ {ultima.get('error', '')}")
+        lentas = sorted(ultima['etapas'], key=lambda e: e.get('reloj_s') or 0, reverse=True)[:3]
+        if lentas:
+            print("   Etapas más lentas: " + ", ".join(f"{e['etapa']} {e['reloj_s']:.2f} s" for e in lentas))
+    else:
+        print(f"📈 Sin historial ({METRICAS_FILE})")
+
+    print("📁 Salidas:")
+    ahora = time.time()
+    for ruta in SALIDAS:
+        if not os.path.exists(ruta):
+            print(f"   ❌ {ruta}")
+            continue
+        if os.path.isdir(ruta):
+            archivos = [os.path.join(ruta, a) for a in os.listdir(ruta)]
+            tamano = sum(os.path.getsize(a) for a in archivos)
+            modificado = max((os.path.getmtime(a) for a in archivos), default=os.path.getmtime(ruta))
+            detalle = f"{len(archivos)} archivos, "
+        else:
+            tamano, modificado, detalle = os.path.getsize(ruta), os.path.getmtime(ruta), ''
+        print(f"   ✓ {ruta:<34} {detalle}{tamano / 1024:,.0f} KB, hace {_edad(ahora - modificado)}")
+    return 0
+
+
+def diferencias(argumentos):
+    """git status/diff --stat de las salidas (lo que publicaría el workflow)"""
+    import subprocess
+
+    rutas = [r for r in SALIDAS if os.path.exists(r)]
+    pendientes = subprocess.run(['git', 'status', '--porcelain', '--', *rutas],
+                                capture_output=True, text=True)
+    if pendientes.returncode != 0:
+        print(f"❌ {pendientes.stderr.strip()}")
+        return pendientes.returncode
+    if not pendientes.stdout.strip():
+        print("✅ Salidas sin cambios respecto al último commit")
+        return 0
+    print(pendientes.stdout.rstrip())
+    resumen = subprocess.run(['git', 'diff', '--stat', *argumentos, '--', *rutas], capture_output=True, text=True)
+    if resumen.stdout.strip():
+        print(resumen.stdout.rstrip())
+    return 0
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+COMANDOS = {
+    'extract':  (_delegar('run_pipeline', 'cli'), 'Sheets → fact_actividades y dimensiones'),
+    'clean':    (limpiar, 'Depuración con diccionario y limpieza del CSV'),
+    'enrich':   (_delegar('enriquecer_con_barrios'), 'Barrios desde direcciones'),
+    'model':    (_delegar('generar_modelo_completo'), 'Modelo dimensional para Power BI'),
+    'chain':    (_delegar('pipeline_actividades'), 'Cadena de actividades en memoria'),
+    'diagnose': (_delegar('diagnostico_conteo', con_argumentos=False), 'Conteos Sheets vs archivos locales'),
+    'bench':    (_delegar('benchmark_pipeline'), 'Benchmark por etapa'),
+    'status':   (estado, 'Última ejecución y estado de las salidas'),
+    'diff':     (diferencias, 'Salidas con cambios sin versionar'),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='convive360', description=__doc__.splitlines()[1],
+        epilog='Ayuda de cada script: convive360 <subcomando> --help',
+    )
+    subcomandos = parser.add_subparsers(dest='comando', required=True, metavar='subcomando')
+    for nombre, (_, ayuda) in COMANDOS.items():
+        subcomandos.add_parser(nombre, help=ayuda, add_help=False)
+    args, argumentos = parser.parse_known_args(argv)
+    sys.argv[0] = f"{parser.prog} {args.comando}"  # usage de cada script
+    return COMANDOS[args.comando][0](argumentos)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
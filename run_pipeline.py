@@ -12,16 +12,38 @@ Versión CORREGIDA v4.1:
   - Genera todas las columnas/tablas que necesita el modelo Power BI
 """
 
+import argparse
+import json
 import os
 import sys
 import pandas as pd
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 import logging
 from datetime import datetime
 from typing import Dict
+from contextlib import contextmanager
+from pathlib import Path
 import hashlib
 
+# Módulos compartidos de scripts/ (códigos territoriales, nomenclátor...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from codigos_territoriales import (
+    agregar_codigos, cargar_tablas, etiquetas_upz, etiquetas_zona, DESCONOCIDO,
+    COLUMNA_CODIGO_UPZ, COLUMNA_CODIGO_ZONA,
+)
+from indice_duplicados import (
+    cargar_indice, guardar_indice, hash_claves, contiene, agregar, indice_vacio, filtrar_nuevos,
+)
+from conflictos_agenda import DURACION_MINUTOS, detectar_conflictos
+from grafo_etapas import CACHE_DIR, etapa, fuente_valor, ejecutar_grafo, imprimir_registro
+from nomenclator import cargar_nomenclator
+from tareas_paralelas import WORKERS as WORKERS_DIMENSIONES, tarea, ejecutar_tareas, imprimir_tiempos
+from metricas_etapas import (
+    nuevas_metricas, medir, ejecutor, registrar_cache, cerrar_metricas, imprimir_metricas,
+)
+from perfilado import agregar_argumentos, sesion_desde_args, perfil, ejecutor as ejecutor_perfil, imprimir_sesion
+from vigilancia import INTERVALO as INTERVALO_VIGILANCIA, vigilar, huella_drive, huella_hojas, huella_archivos
+import puntos_control
+
 # ========================================
 # CONFIGURACIÓN
 # ========================================
@@ -30,7 +52,7 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('pipeline_log.txt'),
+        logging.FileHandler('pipeline_log.txt', delay=True),
         logging.StreamHandler(sys.stdout)
     ]
 )
@@ -47,6 +69,19 @@ CSV_ENC = 'utf-8-sig'
 # Clave de negocio para detectar duplicados REALES
 CLAVE_DUPLICADO = ['Marca_Temporal', 'Email_Responsable', 'Nombre_Actividad']
 
+# Índice persistente (hash uint64) de las claves ya cargadas en ejecuciones anteriores
+INDICE_DUPLICADOS_FILE = 'indice_duplicados.npy'
+
+# Caché de etapas por huella de entradas y código (grafo_etapas.py)
+USAR_CACHE_ETAPAS = os.getenv('USAR_CACHE_ETAPAS', '1') == '1'
+
+# Modo por bloques: filas de la hoja por lectura (0 = todo en memoria)
+FILAS_POR_BLOQUE = int(os.getenv('FILAS_POR_BLOQUE', '0'))
+
+# Varias fuentes (--fuentes): configuración y procesos en paralelo
+FUENTES_FILE = os.getenv('FUENTES_FILE', 'fuentes.json')
+WORKERS_FUENTES = int(os.getenv('WORKERS_FUENTES', '0')) or (os.cpu_count() or 1)
+
 # Columnas que SOLO existen en Formulario 1
 SOLO_FORMULARIO_1 = [
     'Enmarca_En',
@@ -125,28 +160,45 @@ COLUMN_MAPPING = {
 # AUTENTICACIÓN
 # ========================================
 
-def autenticar_google_sheets() -> object:
+# Las librerías de Google se importan al autenticar: los demás usos del
+# módulo (benchmark, datos sintéticos, --help) no las necesitan
+
+def _credenciales():
+    from google.oauth2 import service_account
+
     if not os.path.exists(CREDENTIALS_FILE):
         raise FileNotFoundError(f"No se encontró: {CREDENTIALS_FILE}")
-    credentials = service_account.Credentials.from_service_account_file(
+    return service_account.Credentials.from_service_account_file(
         CREDENTIALS_FILE,
         scopes=[
             'https://www.googleapis.com/auth/spreadsheets.readonly',
             'https://www.googleapis.com/auth/drive.readonly',
         ]
     )
-    service = build('sheets', 'v4', credentials=credentials)
+
+
+def autenticar_google_sheets() -> object:
+    from googleapiclient.discovery import build
+
+    service = build('sheets', 'v4', credentials=_credenciales())
     logger.info("✅ Autenticación exitosa")
     return service
 
+
+def autenticar_drive() -> object:
+    """Cliente Drive v3 (solo para consultar modifiedTime en modo vigilancia)"""
+    from googleapiclient.discovery import build
+
+    return build('drive', 'v3', credentials=_credenciales())
+
 # ========================================
 # EXTRACCIÓN
 # ========================================
 
-def extraer_datos(service: object, sheet_name: str) -> pd.DataFrame:
+def extraer_datos(service: object, sheet_name: str, spreadsheet_id: str = SPREADSHEET_ID) -> pd.DataFrame:
     logger.info(f"📥 Extrayendo: {sheet_name}")
     result = service.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID,
+        spreadsheetId=spreadsheet_id,
         range=f"{sheet_name}!A:AD"      # ← FIX: era A:AB (28 cols), ahora A:AD (30 cols)
     ).execute()
     values = result.get('values', [])
@@ -164,7 +216,7 @@ def extraer_datos(service: object, sheet_name: str) -> pd.DataFrame:
 # NORMALIZACIÓN POR HOJA
 # ========================================
 
-def normalizar_columnas(df: pd.DataFrame) -> pd.DataFrame:
+def normalizar_columnas(df: pd.DataFrame, mapeo: Dict[str, str] = COLUMN_MAPPING) -> pd.DataFrame:
     """
     Renombra y consolida columnas en un DataFrame INDIVIDUAL antes del concat.
     Evita el error 'cannot assemble with duplicate keys'.
@@ -174,7 +226,7 @@ def normalizar_columnas(df: pd.DataFrame) -> pd.DataFrame:
 
     nombres_usados: Dict[str, list] = {}
     for col in df.columns:
-        nombre_final = COLUMN_MAPPING.get(col, col)
+        nombre_final = mapeo.get(col, col)
         nombres_usados.setdefault(nombre_final, []).append(col)
 
     nuevas_columnas = {}
@@ -256,27 +308,110 @@ def enriquecer_datos(df: pd.DataFrame) -> pd.DataFrame:
         if 'Estrategia_Impactar' in df.columns else 'Sin estrategia'
     )
 
+    # Códigos canónicos int8: el resto del pipeline cruza por entero
+    df = agregar_codigos(df, 'UPZ_Enriquecida', 'Zona_Enriquecida')
+    sin_codigo = (df[COLUMNA_CODIGO_UPZ] == DESCONOCIDO).sum()
+    if sin_codigo:
+        logger.warning(f"  ⚠️ {sin_codigo} registro(s) con UPZ no reconocida")
+
+    # Barrio desde la columna Barrios_UPZ<código> de la UPZ de la fila
     df['Barrio_Extraido'] = 'Sin barrio'
-    upz_barrio_map = {
-        '32': 'Barrios_UPZ32',
-        '33': 'Barrios_UPZ33',
-        '34': 'Barrios_UPZ34',
-        '51': 'Barrios_UPZ51',
-        '50': 'Barrios_UPZ50',
-    }
-    if 'UPZ' in df.columns:
-        for idx, row in df.iterrows():
-            upz = str(row.get('UPZ', ''))
-            for num, col_barrio in upz_barrio_map.items():
-                if num in upz and col_barrio in df.columns:
-                    valor = str(row.get(col_barrio, '')).strip()
-                    if valor and valor not in ('N/A', 'nan', ''):
-                        df.at[idx, 'Barrio_Extraido'] = valor
-                    break
+    for codigo in df[COLUMNA_CODIGO_UPZ].unique():
+        col_barrio = f'Barrios_UPZ{codigo}'
+        if codigo < 0 or col_barrio not in df.columns:
+            continue
+        valores = df[col_barrio].astype(str).str.strip()
+        con_barrio = (df[COLUMNA_CODIGO_UPZ] == codigo) & ~valores.isin(('N/A', 'nan', ''))
+        df.loc[con_barrio, 'Barrio_Extraido'] = valores[con_barrio]
 
     logger.info("  ✓ Columnas enriquecidas generadas")
     return df
 
+# ========================================
+# ETAPAS DEL GRAFO
+# ========================================
+
+def preparar_hoja(df: pd.DataFrame, hoja_origen: str, mapeo: Dict[str, str] = None) -> pd.DataFrame:
+    """
+    Normaliza columnas y limpia una hoja (incluye el parseo de fechas).
+    mapeo: encabezados propios de la fuente, sobre COLUMN_MAPPING.
+    """
+    mapeo = {**COLUMN_MAPPING, **mapeo} if mapeo else COLUMN_MAPPING
+    return limpiar_datos(normalizar_columnas(df.copy(), mapeo), hoja_origen)
+
+
+def combinar_hojas(*hojas: pd.DataFrame) -> pd.DataFrame:
+    """Concat, columnas cruzadas y duplicados REALES por clave de negocio"""
+    logger.info("🔗 Combinando hojas")
+    df = pd.concat(hojas, ignore_index=True)
+    df = df.loc[:, ~df.columns.duplicated(keep='first')]
+    logger.info(f"  ✓ Tras concat: {len(df)} registros")
+
+    df = rellenar_columnas_cruzadas(df)
+
+    registros_antes = len(df)
+    cols_dedup = [c for c in CLAVE_DUPLICADO if c in df.columns]
+    if cols_dedup:
+        df = df.drop_duplicates(subset=cols_dedup, keep='first')
+        eliminados = registros_antes - len(df)
+        if eliminados:
+            logger.info(f"  ✓ {eliminados} duplicado(s) real(es) eliminado(s)")
+        else:
+            logger.info(f"  ✓ Sin duplicados reales — todos los registros conservados")
+    logger.info(f"  ✓ Registros finales: {len(df)}")
+    return df
+
+
+def identificar_actividades(df: pd.DataFrame, _tablas_territoriales=None) -> pd.DataFrame:
+    """Códigos territoriales, barrio e ID_Actividad único"""
+    df = enriquecer_datos(df.copy())
+
+    logger.info("🔑 Generando ID_Actividad")
+    df = df.reset_index(drop=True)
+    df['ID_Actividad'] = [
+        generar_id_actividad(row, idx)
+        for idx, row in df.iterrows()
+    ]
+    duplicados = df['ID_Actividad'].duplicated().sum()
+    if duplicados:
+        logger.warning(f"  ⚠️ {duplicados} IDs duplicados — revisar datos fuente")
+    else:
+        logger.info(f"  ✓ {len(df)} IDs únicos generados")
+    return df
+
+
+def construir_grafo(hojas: list, mapeo: Dict[str, str] = None) -> list:
+    """
+    Pasos 3–11 como grafo: cada etapa declara sus entradas y se re-ejecuta
+    solo si cambian las respuestas de su hoja, las tablas UPZ/zona o el código.
+    hojas: [(respuestas, Hoja_Origen)] en el orden del concat.
+    Del diccionario de barrios solo se leen las etiquetas y nombres de UPZ y
+    zona (codigos_territoriales.cargar_tablas): editar un barrio no invalida
+    ninguna etapa. La duración de las actividades (DURACION_ACTIVIDAD_MIN)
+    es una entrada de los cruces: cambiarla los recalcula.
+    """
+    nodos = [
+        fuente_valor('tablas_territoriales', cargar_tablas()),
+        fuente_valor('duracion_actividad', DURACION_MINUTOS),
+    ]
+    if mapeo:
+        nodos.append(fuente_valor('mapeo', mapeo))
+    for i, (df, origen) in enumerate(hojas, 1):
+        nodos += [
+            fuente_valor(f'respuestas_{i}', df),
+            fuente_valor(f'origen_{i}', origen),
+            etapa(f'hoja_{i}', preparar_hoja, [f'respuestas_{i}', f'origen_{i}'] + (['mapeo'] if mapeo else [])),
+        ]
+    return nodos + [
+        etapa('combinado', combinar_hojas, [f'hoja_{i}' for i in range(1, len(hojas) + 1)]),
+        etapa('actividades', identificar_actividades, ['combinado', 'tablas_territoriales'],
+              modulos=['codigos_territoriales', 'memoizacion']),
+        etapa('dimensiones', crear_dimensiones, ['actividades'], modulos=['codigos_territoriales', 'tareas_paralelas']),
+        etapa('conflictos', detectar_conflictos, ['actividades', 'duracion_actividad'],
+              modulos=['conflictos_agenda', 'normalizar_direcciones', 'memoizacion']),
+        etapa('fact', crear_tabla_hechos, ['actividades', 'dimensiones'], modulos=['codigos_territoriales']),
+    ]
+
 # ========================================
 # ID ÚNICO
 # ========================================
@@ -298,55 +433,50 @@ def generar_id_actividad(row, idx: int) -> str:
 # DIMENSIONES
 # ========================================
 
-def crear_dimensiones(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
-    logger.info("🔨 Creando dimensiones")
-    dimensiones = {}
+def _dim_simple(df: pd.DataFrame, col: str, id_col: str) -> pd.DataFrame:
+    d = df[[col]].copy()
+    d[col] = d[col].astype(str).str.strip()
+    d = d[d[col].notna() & (d[col] != '') & (d[col] != 'nan')]
+    d = d.drop_duplicates().reset_index(drop=True)
+    d.insert(0, id_col, range(1, len(d) + 1))
+    return d
+
+
+def _dim_codificada(df: pd.DataFrame, col_codigo: str, col_etiqueta: str, etiquetar, id_col: str) -> pd.DataFrame:
+    codigos = df[col_codigo]
+    d = pd.DataFrame({col_codigo: codigos[codigos >= 0].drop_duplicates().to_numpy()})
+    d[col_etiqueta] = etiquetar(d[col_codigo].to_numpy())
+    d.insert(0, id_col, range(1, len(d) + 1))
+    return d
+
+
+def _dim_areas(df: pd.DataFrame) -> pd.DataFrame:
+    """dim_areas → nueva dimensión para Responsable_Principal (áreas)"""
+    d = df[['Responsable_Principal']].copy()
+    d['Responsable_Principal'] = d['Responsable_Principal'].astype(str).str.strip()
+    d = d[
+        d['Responsable_Principal'].notna() &
+        (d['Responsable_Principal'] != '') &
+        (d['Responsable_Principal'] != 'nan') &
+        (d['Responsable_Principal'] != 'No especificado')
+    ]
+    d = d.drop_duplicates().reset_index(drop=True)
+    d.insert(0, 'area_id', range(1, len(d) + 1))
+    return d
 
-    def dim_simple(col: str, id_col: str, nombre: str):
-        if col not in df.columns:
-            logger.warning(f"  ⚠️ Columna '{col}' no encontrada para {nombre}")
-            return
-        d = df[[col]].copy()
-        d[col] = d[col].astype(str).str.strip()
-        d = d[d[col].notna() & (d[col] != '') & (d[col] != 'nan')]
-        d = d.drop_duplicates().reset_index(drop=True)
-        d.insert(0, id_col, range(1, len(d) + 1))
-        dimensiones[nombre] = d
-        logger.info(f"  ✓ {nombre}: {len(d)} valores únicos")
 
-    dim_simple('UPZ_Enriquecida',   'upz_id',       'dim_upz')
-    dim_simple('Zona_Enriquecida',  'zona_id',       'dim_zonas')
-    dim_simple('Estrategia',        'estrategia_id', 'dim_estrategias')
-    dim_simple('Enfoque_Actividad', 'enfoque_id',    'dim_enfoques')
-    dim_simple('Estado',            'estado_id',     'dim_estados')
+def _dim_barrios(df: pd.DataFrame) -> pd.DataFrame:
+    d = df[['Barrio_Extraido', COLUMNA_CODIGO_UPZ]].copy()
+    d['Barrio_Extraido'] = d['Barrio_Extraido'].astype(str).str.strip()
+    d = d[d['Barrio_Extraido'].notna() & (d['Barrio_Extraido'] != '') & (d['Barrio_Extraido'] != 'Sin barrio')]
+    d = d.drop_duplicates().reset_index(drop=True)
+    d['UPZ_Enriquecida'] = etiquetas_upz(d[COLUMNA_CODIGO_UPZ].to_numpy())
+    d.insert(0, 'barrio_id', range(1, len(d) + 1))
+    return d
 
-    # dim_areas → nueva dimensión para Responsable_Principal (áreas)
-    if 'Responsable_Principal' in df.columns:
-        d = df[['Responsable_Principal']].copy()
-        d['Responsable_Principal'] = d['Responsable_Principal'].astype(str).str.strip()
-        d = d[
-            d['Responsable_Principal'].notna() &
-            (d['Responsable_Principal'] != '') &
-            (d['Responsable_Principal'] != 'nan') &
-            (d['Responsable_Principal'] != 'No especificado')
-        ]
-        d = d.drop_duplicates().reset_index(drop=True)
-        d.insert(0, 'area_id', range(1, len(d) + 1))
-        dimensiones['dim_areas'] = d
-        logger.info(f"  ✓ dim_areas: {len(d)} valores únicos")
-
-    # dim_barrios
-    if 'Barrio_Extraido' in df.columns and 'UPZ_Enriquecida' in df.columns:
-        d = df[['Barrio_Extraido', 'UPZ_Enriquecida']].copy()
-        d['Barrio_Extraido'] = d['Barrio_Extraido'].astype(str).str.strip()
-        d['UPZ_Enriquecida'] = d['UPZ_Enriquecida'].astype(str).str.strip()
-        d = d[d['Barrio_Extraido'].notna() & (d['Barrio_Extraido'] != '') & (d['Barrio_Extraido'] != 'Sin barrio')]
-        d = d.drop_duplicates().reset_index(drop=True)
-        d.insert(0, 'barrio_id', range(1, len(d) + 1))
-        dimensiones['dim_barrios'] = d
-        logger.info(f"  ✓ dim_barrios: {len(d)} valores únicos")
-
-    # Dim_Lineas_Estrategicas
+
+def _dim_lineas(df: pd.DataFrame):
+    """Dim_Lineas_Estrategicas (None si no hay columnas de líneas)"""
     lineas = []
     for col_linea, tipo in [
         ('Linea_Seguridad',   'Seguridad'),
@@ -366,12 +496,56 @@ def crear_dimensiones(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
             vals['Tipo_Linea'] = tipo
             lineas.append(vals)
 
-    if lineas:
-        dim_lineas = pd.concat(lineas, ignore_index=True)
-        dim_lineas.insert(0, 'linea_id', range(1, len(dim_lineas) + 1))
-        dimensiones['Dim_Lineas_Estrategicas'] = dim_lineas
-        logger.info(f"  ✓ Dim_Lineas_Estrategicas: {len(dim_lineas)} registros")
+    if not lineas:
+        return None
+    dim_lineas = pd.concat(lineas, ignore_index=True)
+    dim_lineas.insert(0, 'linea_id', range(1, len(dim_lineas) + 1))
+    return dim_lineas
+
 
+def crear_dimensiones(df: pd.DataFrame, workers: int = WORKERS_DIMENSIONES) -> Dict[str, pd.DataFrame]:
+    """
+    Las dimensiones no dependen entre sí: se declaran como tareas y se
+    construyen en paralelo (tareas_paralelas.py); el resultado conserva el
+    orden de declaración.
+    """
+    logger.info("🔨 Creando dimensiones")
+    tareas = []
+
+    def requiere(col: str, nombre: str) -> bool:
+        if col not in df.columns:
+            logger.warning(f"  ⚠️ Columna '{col}' no encontrada para {nombre}")
+            return False
+        return True
+
+    if requiere(COLUMNA_CODIGO_UPZ, 'dim_upz'):
+        tareas.append(tarea('dim_upz', _dim_codificada, df, COLUMNA_CODIGO_UPZ, 'UPZ_Enriquecida', etiquetas_upz, 'upz_id'))
+    if requiere(COLUMNA_CODIGO_ZONA, 'dim_zonas'):
+        tareas.append(tarea('dim_zonas', _dim_codificada, df, COLUMNA_CODIGO_ZONA, 'Zona_Enriquecida', etiquetas_zona, 'zona_id'))
+    for col, id_col, nombre in [
+        ('Estrategia',        'estrategia_id', 'dim_estrategias'),
+        ('Enfoque_Actividad', 'enfoque_id',    'dim_enfoques'),
+        ('Estado',            'estado_id',     'dim_estados'),
+    ]:
+        if requiere(col, nombre):
+            tareas.append(tarea(nombre, _dim_simple, df, col, id_col))
+    if 'Responsable_Principal' in df.columns:
+        tareas.append(tarea('dim_areas', _dim_areas, df))
+    if 'Barrio_Extraido' in df.columns and COLUMNA_CODIGO_UPZ in df.columns:
+        tareas.append(tarea('dim_barrios', _dim_barrios, df))
+    tareas.append(tarea('Dim_Lineas_Estrategicas', _dim_lineas, df))
+
+    resultados, tiempos = ejecutar_tareas(tareas, workers=workers)
+
+    dimensiones = {}
+    for nombre, d in resultados.items():
+        if d is None:
+            continue
+        dimensiones[nombre] = d
+        unidad = 'registros' if nombre == 'Dim_Lineas_Estrategicas' else 'valores únicos'
+        logger.info(f"  ✓ {nombre}: {len(d)} {unidad}")
+
+    imprimir_tiempos(tiempos, salida=logger.info)
     logger.info(f"✅ {len(dimensiones)} dimensiones creadas")
     return dimensiones
 
@@ -384,18 +558,22 @@ def crear_tabla_hechos(df: pd.DataFrame, dimensiones: Dict[str, pd.DataFrame]) -
     fact = df.copy()
 
     joins = [
-        ('dim_upz',         'UPZ_Enriquecida',       'UPZ_Enriquecida'),
-        ('dim_zonas',       'Zona_Enriquecida',       'Zona_Enriquecida'),
+        ('dim_upz',         COLUMNA_CODIGO_UPZ,      COLUMNA_CODIGO_UPZ),
+        ('dim_zonas',       COLUMNA_CODIGO_ZONA,     COLUMNA_CODIGO_ZONA),
         ('dim_estrategias', 'Estrategia',              'Estrategia'),
         ('dim_enfoques',    'Enfoque_Actividad',       'Enfoque_Actividad'),
         ('dim_estados',     'Estado',                  'Estado'),
         ('dim_areas',       'Responsable_Principal',   'Responsable_Principal'),  # ← nuevo join
+        ('dim_fuente',      'Fuente',                  'Fuente'),                 # solo modelo unificado
     ]
 
     for nombre_dim, col_fact, col_dim in joins:
         if nombre_dim in dimensiones and col_fact in fact.columns:
+            # Solo id + llave: las etiquetas ya viven en la dimensión
+            dim = dimensiones[nombre_dim]
+            dim = dim[[c for c in dim.columns if c == col_dim or c not in fact.columns]]
             fact = fact.merge(
-                dimensiones[nombre_dim],
+                dim,
                 left_on=col_fact,
                 right_on=col_dim,
                 how='left'
@@ -403,8 +581,8 @@ def crear_tabla_hechos(df: pd.DataFrame, dimensiones: Dict[str, pd.DataFrame]) -
 
     if 'dim_barrios' in dimensiones and 'Barrio_Extraido' in fact.columns:
         fact = fact.merge(
-            dimensiones['dim_barrios'],
-            on=['Barrio_Extraido', 'UPZ_Enriquecida'],
+            dimensiones['dim_barrios'][['barrio_id', 'Barrio_Extraido', COLUMNA_CODIGO_UPZ]],
+            on=['Barrio_Extraido', COLUMNA_CODIGO_UPZ],
             how='left'
         )
 
@@ -418,117 +596,633 @@ def crear_tabla_hechos(df: pd.DataFrame, dimensiones: Dict[str, pd.DataFrame]) -
 # CARGA
 # ========================================
 
-def guardar_csv(df: pd.DataFrame, path: str) -> None:
+# La tabla de hechos se publica en tres rutas (consumidores distintos)
+SALIDAS_FACT = [
+    'fact_actividades.csv',
+    'fact_actividades_enriquecido.csv',
+    'dimensiones/fact_actividades_enriquecido.csv',
+]
+
+
+def guardar_csv(df: pd.DataFrame, path: str) -> int:
+    """Escribe el CSV y retorna los bytes escritos"""
     df.to_csv(path, index=False, encoding=CSV_ENC, sep=CSV_SEP)
     logger.info(f"  ✓ {path}  ({len(df)} registros)")
+    return os.path.getsize(path)
 
 
-def guardar_archivos(fact: pd.DataFrame, dimensiones: Dict[str, pd.DataFrame]) -> None:
+def guardar_archivos(fact: pd.DataFrame, dimensiones: Dict[str, pd.DataFrame], directorio: str = '') -> int:
     logger.info("💾 Guardando archivos")
-    os.makedirs('dimensiones', exist_ok=True)
+    os.makedirs(os.path.join(directorio, 'dimensiones'), exist_ok=True)
 
-    guardar_csv(fact, 'fact_actividades.csv')
-    guardar_csv(fact, 'fact_actividades_enriquecido.csv')
-    guardar_csv(fact, 'dimensiones/fact_actividades_enriquecido.csv')
+    escritos = 0
+    for ruta in SALIDAS_FACT:
+        escritos += guardar_csv(fact, os.path.join(directorio, ruta))
 
     for nombre, df_dim in dimensiones.items():
-        guardar_csv(df_dim, f'dimensiones/{nombre}.csv')
+        escritos += guardar_csv(df_dim, os.path.join(directorio, 'dimensiones', f'{nombre}.csv'))
 
     logger.info("✅ Todos los archivos guardados")
+    return escritos
+
+# ========================================
+# MODO POR BLOQUES
+# ========================================
+# Memoria acotada para hojas grandes: cada bloque de FILAS_POR_BLOQUE
+# respuestas se normaliza, limpia, enriquece, recibe su ID y se agrega a los
+# CSV de hechos. Lo global se lleva en registros que crecen con las claves,
+# no con las filas:
+#   - duplicados: hashes uint64 de CLAVE_DUPLICADO ya emitidos
+#   - dimensiones: clave → id en orden de primera aparición (mismos ids
+#     que el modo completo)
+#   - ID_Actividad: desplazamiento con las filas ya emitidas
+# Lo único proporcional a las filas son las columnas de agenda que usa
+# detectar_conflictos al final (ID, fecha, hora, dirección, responsables).
+
+COLUMNAS_AGENDA = [
+    'ID_Actividad', 'Fecha_Actividad', 'Hora_Inicio', 'Direccion_Actividad',
+    'Responsable_Actividad',
+]
+
+@contextmanager
+def _sin_detalle():
+    """Oculta los mensajes INFO de las funciones por lote (se repetirían en cada bloque)"""
+    nivel = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        logger.setLevel(nivel)
+
+
+def leer_encabezado(service: object, sheet_name: str) -> list:
+    result = service.spreadsheets().values().get(
+        spreadsheetId=SPREADSHEET_ID,
+        range=f"{sheet_name}!A1:AD1"
+    ).execute()
+    values = result.get('values', [])
+    return values[0] if values else []
+
+
+def ultima_fila(service: object, sheet_name: str) -> int:
+    """Última fila con marca temporal (una lectura de la columna A)"""
+    result = service.spreadsheets().values().get(
+        spreadsheetId=SPREADSHEET_ID,
+        range=f"{sheet_name}!A:A"
+    ).execute()
+    return len(result.get('values', []))
+
+
+def extraer_bloques(service: object, sheet_name: str, header: list, filas_por_bloque: int):
+    """
+    Lee la hoja por rangos A{i}:AD{j} y genera un DataFrame por rango.
+    La API no devuelve nada para un rango todo en blanco aunque siga habiendo
+    respuestas más abajo: un rango vacío solo termina la lectura después de
+    la última fila con marca temporal.
+    """
+    ultima = ultima_fila(service, sheet_name)
+    inicio = 2
+    while True:
+        fin = inicio + filas_por_bloque - 1
+        result = service.spreadsheets().values().get(
+            spreadsheetId=SPREADSHEET_ID,
+            range=f"{sheet_name}!A{inicio}:AD{fin}"
+        ).execute()
+        values = result.get('values', [])
+        if not values:
+            if fin >= ultima:
+                return
+            inicio = fin + 1
+            continue
+        rows = [row + [''] * (len(header) - len(row)) for row in values]
+        yield pd.DataFrame(rows, columns=header)
+        inicio = fin + 1
+
+
+def esquema_columnas(encabezados: list) -> list:
+    """Columnas del concat de ambas hojas (mismo orden que combinar_hojas)"""
+    columnas = []
+    for header in encabezados:
+        normalizadas = list(normalizar_columnas(pd.DataFrame(columns=header)).columns) + ['Hoja_Origen']
+        columnas += [c for c in normalizadas if c not in columnas]
+    return columnas
+
+
+def registrar_dimension(registro: dict, parcial: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega al registro las filas de la dimensión del bloque que no había
+    visto (id siguiente) y retorna la dimensión acumulada.
+    """
+    id_col = parcial.columns[0]
+    claves = list(parcial.columns[1:])
+    vistas = registro.setdefault('vistas', set())
+    tablas = registro.setdefault('tablas', [])
+
+    nuevas = [i for i, clave in enumerate(parcial[claves].itertuples(index=False, name=None)) if clave not in vistas]
+    nuevas = parcial.iloc[nuevas].copy()
+    vistas.update(nuevas[claves].itertuples(index=False, name=None))
+    inicio = sum(len(t) for t in tablas) + 1
+    nuevas[id_col] = range(inicio, inicio + len(nuevas))
+    tablas.append(nuevas)
+    return pd.concat(tablas, ignore_index=True)
+
+
+def anexar_csv(df: pd.DataFrame, path: str, primero: bool) -> None:
+    """Primer bloque: crea el CSV con encabezado (y BOM); siguientes: solo filas"""
+    if primero:
+        df.to_csv(path, index=False, encoding=CSV_ENC, sep=CSV_SEP)
+    else:
+        df.to_csv(path, index=False, encoding='utf-8', sep=CSV_SEP, mode='a', header=False)
+
+
+def ejecutar_por_bloques(service: object, filas_por_bloque: int) -> Dict[str, object]:
+    """
+    Pasos 2–12 por bloques: extrae, transforma y agrega cada bloque a los CSV
+    de hechos; al final escribe las dimensiones y los cruces de agenda.
+    """
+    logger.info(f"🧱 Modo por bloques: {filas_por_bloque} filas por lectura")
+    os.makedirs('dimensiones', exist_ok=True)
+
+    hojas = [(SHEET_NAME_1, 'Formulario_1'), (SHEET_NAME_2, 'Formulario_2')]
+    encabezados = {hoja: leer_encabezado(service, hoja) for hoja, _ in hojas}
+    columnas = esquema_columnas([h for h in encabezados.values() if h])
+    cols_dedup = [c for c in CLAVE_DUPLICADO if c in columnas]
+
+    emitidas = indice_vacio()
+    registros = {}
+    dimensiones = {}
+    agenda = []
+    columnas_fact = None
+    extraidas = duplicados = filas = lineas = bloques = escritos = 0
+
+    for hoja, origen in hojas:
+        if not encabezados[hoja]:
+            logger.warning(f"⚠️ Sin datos en {hoja}")
+            continue
+        for bloque in extraer_bloques(service, hoja, encabezados[hoja], filas_por_bloque):
+            extraidas += len(bloque)
+            with _sin_detalle():
+                df = preparar_hoja(bloque, origen).reindex(columns=columnas)
+                df = rellenar_columnas_cruzadas(df)
+                if cols_dedup:
+                    df, hashes, repetidas = filtrar_nuevos(df, emitidas, cols_dedup)
+                    emitidas = agregar(emitidas, hashes)
+                    duplicados += repetidas
+                df = enriquecer_datos(df)
+                df.index = range(filas, filas + len(df))
+                df['ID_Actividad'] = [generar_id_actividad(row, idx) for idx, row in df.iterrows()]
+
+                parciales = crear_dimensiones(df)
+                dim_lineas = parciales.pop('Dim_Lineas_Estrategicas', None)
+                dimensiones = {
+                    nombre: registrar_dimension(registros.setdefault(nombre, {}), parcial)
+                    for nombre, parcial in parciales.items()
+                }
+                fact = crear_tabla_hechos(df, dimensiones)
+
+            # Ids como enteros con nulos: el formato no cambia entre bloques
+            for d in dimensiones.values():
+                if d.columns[0] in fact.columns:
+                    fact[d.columns[0]] = fact[d.columns[0]].astype('Int64')
+            if columnas_fact is None:
+                columnas_fact = list(fact.columns)
+            primero = bloques == 0
+            for ruta in SALIDAS_FACT:
+                anexar_csv(fact.reindex(columns=columnas_fact), ruta, primero)
+
+            if dim_lineas is not None:
+                dim_lineas['linea_id'] += lineas
+                anexar_csv(dim_lineas, 'dimensiones/Dim_Lineas_Estrategicas.csv', lineas == 0)
+                lineas += len(dim_lineas)
+
+            agenda.append(df[[c for c in COLUMNAS_AGENDA if c in df.columns]])
+            filas += len(df)
+            bloques += 1
+            logger.info(f"  ✓ Bloque {bloques} ({origen}): {len(bloque)} filas leídas, "
+                        f"{len(df)} emitidas (acumulado {filas})")
+
+    if bloques == 0:
+        raise ValueError("Las hojas no tienen respuestas")
+    escritos += sum(os.path.getsize(ruta) for ruta in SALIDAS_FACT)
+    if lineas:
+        escritos += os.path.getsize('dimensiones/Dim_Lineas_Estrategicas.csv')
+    if duplicados:
+        logger.info(f"  ✓ {duplicados} duplicado(s) real(es) eliminado(s)")
+
+    conflictos = detectar_conflictos(pd.concat(agenda, ignore_index=True))
+    logger.info(f"  ✓ fact_conflictos_agenda: {len(conflictos)} cruces detectados")
+    dimensiones['fact_conflictos_agenda'] = conflictos
+    for nombre, df_dim in dimensiones.items():
+        escritos += guardar_csv(df_dim, f'dimensiones/{nombre}.csv')
+
+    return {
+        'filas_extraidas': extraidas, 'filas_fact': filas, 'columnas_fact': len(columnas_fact),
+        'dimensiones': len(dimensiones) + (1 if lineas else 0), 'claves': emitidas if cols_dedup == CLAVE_DUPLICADO else None,
+        'bytes_escritos': escritos,
+    }
 
 # ========================================
 # MAIN
 # ========================================
 
-def main():
+def _registrar_error(metricas, e: Exception) -> int:
+    import traceback
+    logger.error("=" * 60)
+    logger.error("💥 ERROR EN EL PIPELINE")
+    logger.error(str(e))
+    logger.error(traceback.format_exc())
+    logger.error("=" * 60)
+    cerrar_metricas(metricas, 'error', error=str(e))
+    return 1
+
+
+def _servicio(estado: dict) -> object:
+    """Cliente de Sheets: el que ya tiene el estado (vigilancia) o uno nuevo"""
+    if estado.get('service') is None:
+        estado['service'] = autenticar_google_sheets()
+    return estado['service']
+
+
+def _indice(estado: dict):
+    """Índice de claves: en memoria en modo vigilancia, si no desde disco"""
+    if estado.get('indice') is None:
+        estado['indice'] = cargar_indice(INDICE_DUPLICADOS_FILE)
+    return estado['indice']
+
+
+def _guardar_indice(estado: dict, indice) -> None:
+    guardar_indice(indice, INDICE_DUPLICADOS_FILE)
+    estado['indice'] = indice
+
+
+def _cerrar_ejecucion(inicio, metricas, sesion_perfil, resumen) -> int:
+    duracion = (datetime.now() - inicio).total_seconds()
+    logger.info("=" * 60)
+    logger.info("🎉 PIPELINE COMPLETADO EXITOSAMENTE")
+    logger.info(f"⏱️  Duración     : {duracion:.2f} s")
+    logger.info(f"📊 Registros    : {resumen['filas_fact']}")
+    logger.info(f"📁 Dimensiones  : {resumen['dimensiones']}")
+    logger.info(f"📋 Columnas fact: {resumen['columnas_fact']}")
+    logger.info("=" * 60)
+
+    # Historial por etapa (pipeline_metrics.jsonl)
+    linea = cerrar_metricas(
+        metricas, 'ok',
+        filas_extraidas=resumen['filas_extraidas'], filas_fact=resumen['filas_fact'],
+        dimensiones=resumen['dimensiones'],
+    )
+    logger.info("📈 Métricas por etapa:")
+    imprimir_metricas(linea, salida=logger.info)
+    imprimir_sesion(sesion_perfil, salida=logger.info)
+    return 0
+
+
+def main_por_bloques(metricas, sesion_perfil, filas_por_bloque: int, estado: dict) -> Dict[str, object]:
+    """Pasos 1–12 con memoria acotada (ver MODO POR BLOQUES)"""
+    with medir(metricas, 'bloques') as etapa_bloques, perfil(sesion_perfil, 'bloques'):
+        resumen = ejecutar_por_bloques(_servicio(estado), filas_por_bloque)
+        etapa_bloques['filas_entrada'] = resumen['filas_extraidas']
+        etapa_bloques['filas_salida'] = resumen['filas_fact']
+        etapa_bloques['bytes_escritos'] = resumen['bytes_escritos']
+
+    if resumen['claves'] is not None:
+        indice_claves = _indice(estado)
+        nuevas = int((~contiene(indice_claves, resumen['claves'])).sum())
+        logger.info(f"  ✓ Respuestas nuevas desde la última carga: {nuevas} "
+                    f"(índice: {len(indice_claves)} claves)")
+        _guardar_indice(estado, agregar(indice_claves, resumen['claves']))
+    return resumen
+
+
+def _punto_control(reanudar: bool) -> dict:
+    """Ejecución incompleta a reanudar (con reanudar) o una nueva"""
+    fuente = {'spreadsheet_id': SPREADSHEET_ID, 'hojas': [SHEET_NAME_1, SHEET_NAME_2]}
+    ejecucion = puntos_control.pendiente(fuente) if reanudar else None
+    if ejecucion is not None:
+        logger.info(f"⏯️  Reanudando la ejecución del {ejecucion['inicio']} "
+                    f"(completadas: {', '.join(ejecucion['etapas']) or 'ninguna'})")
+        return ejecucion
+    if reanudar:
+        logger.info("⏯️  Nada que reanudar: la última ejecución terminó o no hay puntos de control")
+    return puntos_control.nueva_ejecucion(fuente)
+
+
+def main(sesion_perfil=None, filas_por_bloque: int = FILAS_POR_BLOQUE, estado=None, reanudar: bool = False):
+    """
+    sesion_perfil: sesión de perfilado.py (None = sin perfilado)
+    filas_por_bloque: > 0 procesa las hojas por bloques (memoria acotada)
+    estado: lo que se conserva entre corridas en modo vigilancia (cliente,
+            índice de claves, etapas en memoria); None = corrida aislada
+    reanudar: continúa la última ejecución fallida desde sus puntos de
+              control (puntos_control.py) en lugar de extraer de nuevo
+    En vigilancia (estado con etapas en memoria) no se guardan puntos de
+    control: cada ciclo vuelve a leer las hojas y reescribiría el pickle.
+    """
     inicio = datetime.now()
+    metricas = nuevas_metricas()
+    if estado is None:
+        estado = {}
+    ejecucion = None
     try:
         logger.info("=" * 60)
         logger.info("🚀 INICIANDO PIPELINE ETL CONVIVE360 v4.1")
         logger.info("=" * 60)
 
-        # 1. Autenticar
-        service = autenticar_google_sheets()
+        if filas_por_bloque > 0:
+            resumen = main_por_bloques(metricas, sesion_perfil, filas_por_bloque, estado)
+            return _cerrar_ejecucion(inicio, metricas, sesion_perfil, resumen)
 
-        # 2. Extraer
-        df1 = extraer_datos(service, SHEET_NAME_1)
-        df2 = extraer_datos(service, SHEET_NAME_2)
-        logger.info(f"  F1: {len(df1)} | F2: {len(df2)} | Esperado: {len(df1)+len(df2)}")
+        if estado.get('memoria') is None:
+            ejecucion = _punto_control(reanudar)
+        ejecutar = ejecutor_perfil(sesion_perfil, ejecutor(metricas))
 
-        # 3. Normalizar columnas POR SEPARADO
-        logger.info("🔀 Normalizando columnas por hoja")
-        df1 = normalizar_columnas(df1)
-        df2 = normalizar_columnas(df2)
-
-        # 4. Limpiar cada hoja individualmente
-        df1 = limpiar_datos(df1, hoja_origen='Formulario_1')
-        df2 = limpiar_datos(df2, hoja_origen='Formulario_2')
-
-        # 5. Combinar
-        logger.info("🔗 Combinando hojas")
-        df = pd.concat([df1, df2], ignore_index=True)
-        df = df.loc[:, ~df.columns.duplicated(keep='first')]
-        logger.info(f"  ✓ Tras concat: {len(df)} registros")
-
-        # 6. Rellenar columnas cruzadas
-        df = rellenar_columnas_cruzadas(df)
-
-        # 7. Eliminar duplicados REALES
-        registros_antes = len(df)
-        cols_dedup = [c for c in CLAVE_DUPLICADO if c in df.columns]
-        if cols_dedup:
-            df = df.drop_duplicates(subset=cols_dedup, keep='first')
-            eliminados = registros_antes - len(df)
-            if eliminados:
-                logger.info(f"  ✓ {eliminados} duplicado(s) real(es) eliminado(s)")
+        # 1–2. Autenticar y extraer (o cargar las respuestas de la ejecución a reanudar)
+        with medir(metricas, 'extraccion') as etapa_extraccion, perfil(sesion_perfil, 'extraccion'):
+            if ejecucion is not None and puntos_control.completada(ejecucion, 'extraccion'):
+                df1, df2 = puntos_control.cargar(ejecucion, 'extraccion')
+                etapa_extraccion['estado'] = 'reanudada'
             else:
-                logger.info(f"  ✓ Sin duplicados reales — todos los registros conservados")
-        logger.info(f"  ✓ Registros finales: {len(df)}")
-
-        # 8. Enriquecer
-        df = enriquecer_datos(df)
-
-        # 9. ID único
-        logger.info("🔑 Generando ID_Actividad")
-        df = df.reset_index(drop=True)
-        df['ID_Actividad'] = [
-            generar_id_actividad(row, idx)
-            for idx, row in df.iterrows()
-        ]
-        duplicados = df['ID_Actividad'].duplicated().sum()
-        if duplicados:
-            logger.warning(f"  ⚠️ {duplicados} IDs duplicados — revisar datos fuente")
+                service = _servicio(estado)
+                df1 = extraer_datos(service, SHEET_NAME_1)
+                df2 = extraer_datos(service, SHEET_NAME_2)
+                if ejecucion is not None:
+                    puntos_control.guardar(ejecucion, 'extraccion', (df1, df2))
+            etapa_extraccion['filas_salida'] = len(df1) + len(df2)
+        logger.info(f"  F1: {len(df1)} | F2: {len(df2)} | Esperado: {len(df1)+len(df2)}")
+
+        # 3–11. Normalizar, limpiar, combinar, enriquecer, dimensiones, cruces
+        # y hechos como grafo de etapas con caché. Sin caché entre ejecuciones,
+        # el grafo usa una caché propia de la ejecución como punto de control
+        logger.info("🔀 Ejecutando etapas")
+        if ejecucion is None:
+            cache_dir, usar_cache = CACHE_DIR, USAR_CACHE_ETAPAS
         else:
-            logger.info(f"  ✓ {len(df)} IDs únicos generados")
+            cache_dir = CACHE_DIR if USAR_CACHE_ETAPAS else puntos_control.directorio_etapas(ejecucion)
+            usar_cache, ejecutar = True, puntos_control.marcador(ejecucion, ejecutar)
+        valores, registro = ejecutar_grafo(
+            construir_grafo([(df1, 'Formulario_1'), (df2, 'Formulario_2')]),
+            objetivos=['combinado', 'dimensiones', 'conflictos', 'fact'],
+            cache_dir=cache_dir, usar_cache=usar_cache, ejecutar=ejecutar,
+            memoria=estado.get('memoria'),
+        )
+        imprimir_registro(registro, salida=logger.info)
+        registrar_cache(metricas, registro)
+        if ejecucion is not None:
+            puntos_control.marcar_registro(ejecucion, registro)
+        df = valores['combinado']
+        fact = valores['fact']
+
+        # Respuestas que no estaban en cargas anteriores (índice persistente)
+        hashes_claves = None
+        if all(c in df.columns for c in CLAVE_DUPLICADO):
+            indice_claves = _indice(estado)
+            hashes_claves = hash_claves(df, CLAVE_DUPLICADO)
+            nuevas = int((~contiene(indice_claves, hashes_claves)).sum())
+            logger.info(f"  ✓ Respuestas nuevas desde la última carga: {nuevas} "
+                        f"(índice: {len(indice_claves)} claves)")
+
+        # Cruces de agenda (mismo lugar o responsable a la misma hora)
+        dimensiones = dict(valores['dimensiones'])
+        dimensiones['fact_conflictos_agenda'] = valores['conflictos']
+        logger.info(f"  ✓ fact_conflictos_agenda: {len(valores['conflictos'])} cruces detectados")
 
-        # 10. Dimensiones
-        dimensiones = crear_dimensiones(df)
+        # 12. Guardar
+        with medir(metricas, 'escritura', [fact, dimensiones]) as etapa_escritura, perfil(sesion_perfil, 'escritura'):
+            etapa_escritura['bytes_escritos'] = guardar_archivos(fact, dimensiones)
 
-        # 11. Tabla de hechos
-        fact = crear_tabla_hechos(df, dimensiones)
+            # Registrar las claves solo después de guardar con éxito
+            if hashes_claves is not None:
+                _guardar_indice(estado, agregar(indice_claves, hashes_claves))
+        if ejecucion is not None:
+            puntos_control.marcar(ejecucion, 'escritura', bytes=etapa_escritura['bytes_escritos'])
+            puntos_control.cerrar(ejecucion, 'completada')
 
-        # 12. Guardar
-        guardar_archivos(fact, dimensiones)
+        return _cerrar_ejecucion(inicio, metricas, sesion_perfil, {
+            'filas_extraidas': len(df1) + len(df2), 'filas_fact': len(fact),
+            'columnas_fact': len(fact.columns), 'dimensiones': len(dimensiones),
+        })
+
+    except Exception as e:
+        codigo = _registrar_error(metricas, e)
+        if ejecucion is not None:
+            puntos_control.cerrar(ejecucion, 'error', error=str(e))
+            logger.info("⏯️  Para continuar desde la última etapa completada: python run_pipeline.py --resume")
+        return codigo
+
+
+# ========================================
+# MODO VIGILANCIA
+# ========================================
 
-        duracion = (datetime.now() - inicio).total_seconds()
+def main_vigilancia(intervalo: float, sesion_perfil=None, filas_por_bloque: int = FILAS_POR_BLOQUE,
+                    fuente: str = 'drive', sinteticos: str = None) -> int:
+    """
+    Proceso de larga vida (vigilancia.py): corre el pipeline al iniciar y
+    cada vez que cambia la fuente. fuente: 'drive' (modifiedTime) u 'hojas'
+    (columna A); con `sinteticos` se leen los payloads locales de
+    datos_sinteticos.py y se vigilan sus archivos.
+    """
+    estado = {'memoria': {}}
+    if sinteticos:
+        from datos_sinteticos import cargar_servicio
+
+        def huella():
+            return huella_archivos(Path(sinteticos).glob('*.json'))
+
+        def ciclo():
+            estado['service'] = cargar_servicio(sinteticos)
+            return main(sesion_perfil, filas_por_bloque, estado)
+    else:
+        estado['service'] = autenticar_google_sheets()
+        if fuente == 'drive':
+            drive = autenticar_drive()
+
+            def huella():
+                return huella_drive(drive, SPREADSHEET_ID)
+        else:
+            def huella():
+                return huella_hojas(estado['service'], SPREADSHEET_ID, [SHEET_NAME_1, SHEET_NAME_2])
+
+        def ciclo():
+            return main(sesion_perfil, filas_por_bloque, estado)
+
+    return vigilar(huella, ciclo, intervalo, salida=logger.info)
+
+
+# ========================================
+# VARIAS FUENTES
+# ========================================
+# Cada fuente (localidad / spreadsheet) se procesa en su propio proceso:
+# autenticación, extracción, grafo de etapas (con caché en
+# .cache_etapas/<fuente>) y cruces de agenda. El nomenclátor de solo
+# lectura se carga una vez por worker (con fork lo heredan ya cargado).
+# Salida 'por_fuente': cada worker escribe <directorio>/<fuente>/ igual que
+# el modo de una fuente. Salida 'unificada': el proceso principal arma un
+# único modelo estrella sobre todas las actividades, con dim_fuente.
+
+SALIDAS_FUENTES = ('unificada', 'por_fuente')
+
+
+def cargar_fuentes(ruta: str = FUENTES_FILE) -> dict:
+    """Lee y valida la configuración de fuentes (ver fuentes.ejemplo.json)"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    config.setdefault('salida', 'unificada')
+    config.setdefault('directorio', 'salidas')
+    if config['salida'] not in SALIDAS_FUENTES:
+        raise ValueError(f"Salida desconocida: {config['salida']} (use {', '.join(SALIDAS_FUENTES)})")
+    if not config.get('fuentes'):
+        raise ValueError(f"{ruta} no declara fuentes")
+
+    nombres = set()
+    for fuente in config['fuentes']:
+        faltantes = [c for c in ('nombre', 'spreadsheet_id', 'hojas') if not fuente.get(c)]
+        if faltantes:
+            raise ValueError(f"Fuente sin {', '.join(faltantes)}: {fuente}")
+        if fuente['nombre'] in nombres:
+            raise ValueError(f"Fuente repetida: {fuente['nombre']}")
+        nombres.add(fuente['nombre'])
+        fuente['hojas'] = [
+            {'hoja': h, 'origen': f'Formulario_{i}'} if isinstance(h, str) else {'origen': f'Formulario_{i}', **h}
+            for i, h in enumerate(fuente['hojas'], 1)
+        ]
+        fuente.setdefault('mapeo', {})
+    return config
+
+
+def _indice_fuente(directorio: str, nombre: str) -> str:
+    return os.path.join(directorio, f'indice_duplicados_{nombre}.npy')
+
+
+def procesar_fuente(fuente: dict, salida: str, directorio: str) -> dict:
+    """
+    Worker de una fuente. 'por_fuente': escribe sus archivos y retorna
+    conteos; 'unificada': retorna además actividades, cruces y claves para
+    que el proceso principal arme el modelo conjunto.
+    """
+    nombre = fuente['nombre']
+    service = autenticar_google_sheets()
+    hojas = [(extraer_datos(service, h['hoja'], fuente['spreadsheet_id']), h['origen']) for h in fuente['hojas']]
+    valores, _ = ejecutar_grafo(
+        construir_grafo(hojas, fuente['mapeo']),
+        objetivos=['combinado', 'actividades', 'dimensiones', 'conflictos', 'fact'],
+        cache_dir=CACHE_DIR / nombre,
+        usar_cache=USAR_CACHE_ETAPAS,
+    )
+    df = valores['combinado']
+    claves = hash_claves(df, CLAVE_DUPLICADO) if all(c in df.columns for c in CLAVE_DUPLICADO) else None
+    resultado = {'filas_extraidas': sum(len(h) for h, _ in hojas), 'filas_fact': len(valores['fact'])}
+
+    if salida == 'unificada':
+        return {**resultado, 'actividades': valores['actividades'], 'conflictos': valores['conflictos'], 'claves': claves}
+
+    dimensiones = dict(valores['dimensiones'])
+    dimensiones['fact_conflictos_agenda'] = valores['conflictos']
+    resultado['bytes_escritos'] = guardar_archivos(valores['fact'], dimensiones, os.path.join(directorio, nombre))
+    if claves is not None:
+        ruta = _indice_fuente(directorio, nombre)
+        guardar_indice(agregar(cargar_indice(ruta), claves), ruta)
+    return {**resultado, 'columnas_fact': len(valores['fact'].columns), 'dimensiones': len(dimensiones)}
+
+
+def modelo_unificado(resultados: Dict[str, dict]):
+    """Un modelo estrella para todas las fuentes: dimensiones conjuntas y dim_fuente"""
+    logger.info("🧩 Modelo unificado")
+    nombres = list(resultados)
+    actividades = pd.concat(
+        [r['actividades'].assign(Fuente=nombre) for nombre, r in resultados.items()], ignore_index=True
+    )
+    repetidos = actividades['ID_Actividad'].duplicated().sum()
+    if repetidos:
+        logger.warning(f"  ⚠️ {repetidos} ID_Actividad repetidos entre fuentes (use fuente_id + ID_Actividad)")
+
+    dimensiones = crear_dimensiones(actividades)
+    dimensiones['dim_fuente'] = pd.DataFrame({'fuente_id': range(1, len(nombres) + 1), 'Fuente': nombres})
+    fact = crear_tabla_hechos(actividades, dimensiones)
+
+    conflictos = pd.concat(
+        [r['conflictos'].assign(fuente_id=i) for i, r in enumerate(resultados.values(), 1)], ignore_index=True
+    )
+    conflictos['conflicto_id'] = range(1, len(conflictos) + 1)
+    dimensiones['fact_conflictos_agenda'] = conflictos
+    logger.info(f"  ✓ fact_conflictos_agenda: {len(conflictos)} cruces detectados")
+    return fact, dimensiones
+
+
+def main_fuentes(ruta: str = FUENTES_FILE, workers: int = WORKERS_FUENTES, sesion_perfil=None) -> int:
+    """Todas las fuentes de la configuración, una por proceso"""
+    inicio = datetime.now()
+    metricas = nuevas_metricas()
+    try:
+        config = cargar_fuentes(ruta)
+        fuentes = config['fuentes']
         logger.info("=" * 60)
-        logger.info("🎉 PIPELINE COMPLETADO EXITOSAMENTE")
-        logger.info(f"⏱️  Duración     : {duracion:.2f} s")
-        logger.info(f"📊 Registros    : {len(fact)}")
-        logger.info(f"📁 Dimensiones  : {len(dimensiones)}")
-        logger.info(f"📋 Columnas fact: {len(fact.columns)}")
+        logger.info(f"🚀 PIPELINE CONVIVE360: {len(fuentes)} fuente(s), salida {config['salida']}")
         logger.info("=" * 60)
-        return 0
+
+        cargar_nomenclator()
+        with medir(metricas, 'fuentes') as etapa_fuentes, perfil(sesion_perfil, 'fuentes'):
+            resultados, tiempos = ejecutar_tareas(
+                [tarea(f['nombre'], procesar_fuente, f, config['salida'], config['directorio']) for f in fuentes],
+                workers=workers, modo='procesos', inicializar=cargar_nomenclator,
+            )
+            etapa_fuentes['filas_salida'] = sum(r['filas_fact'] for r in resultados.values())
+        imprimir_tiempos(tiempos, salida=logger.info)
+        for nombre, r in resultados.items():
+            logger.info(f"  ✓ {nombre}: {r['filas_extraidas']} respuestas, {r['filas_fact']} actividades")
+
+        resumen = {
+            'filas_extraidas': sum(r['filas_extraidas'] for r in resultados.values()),
+            'filas_fact': etapa_fuentes['filas_salida'],
+        }
+        if config['salida'] == 'unificada':
+            with medir(metricas, 'modelo_unificado') as etapa_modelo, perfil(sesion_perfil, 'modelo_unificado'):
+                fact, dimensiones = modelo_unificado(resultados)
+                etapa_modelo['filas_salida'] = len(fact)
+            with medir(metricas, 'escritura', [fact, dimensiones]) as etapa_escritura, perfil(sesion_perfil, 'escritura'):
+                etapa_escritura['bytes_escritos'] = guardar_archivos(fact, dimensiones, config['directorio'])
+                for nombre, r in resultados.items():
+                    if r['claves'] is not None:
+                        indice = _indice_fuente(config['directorio'], nombre)
+                        guardar_indice(agregar(cargar_indice(indice), r['claves']), indice)
+            resumen.update(columnas_fact=len(fact.columns), dimensiones=len(dimensiones))
+        else:
+            etapa_fuentes['bytes_escritos'] = sum(r['bytes_escritos'] for r in resultados.values())
+            resumen.update(
+                columnas_fact=max(r['columnas_fact'] for r in resultados.values()),
+                dimensiones=max(r['dimensiones'] for r in resultados.values()),
+            )
+        return _cerrar_ejecucion(inicio, metricas, sesion_perfil, resumen)
 
     except Exception as e:
-        import traceback
-        logger.error("=" * 60)
-        logger.error("💥 ERROR EN EL PIPELINE")
-        logger.error(str(e))
-        logger.error(traceback.format_exc())
-        logger.error("=" * 60)
-        return 1
+        return _registrar_error(metricas, e)
+
+
+def cli(argv=None) -> int:
+    parser = agregar_argumentos(argparse.ArgumentParser(description='Pipeline ETL Convive360'))
+    parser.add_argument('--bloques', type=int, default=FILAS_POR_BLOQUE, metavar='N',
+                        help='Procesa las hojas de a N filas con memoria acotada (0 = todo en memoria)')
+    parser.add_argument('--vigilar', nargs='?', const=INTERVALO_VIGILANCIA, default=None, type=float,
+                        metavar='SEGUNDOS',
+                        help=f'Queda corriendo y actualiza al detectar cambios (cada {INTERVALO_VIGILANCIA:g} s)')
+    parser.add_argument('--huella', choices=['drive', 'hojas'], default='drive',
+                        help='Cómo detectar cambios en modo vigilancia')
+    parser.add_argument('--sinteticos', metavar='DIR',
+                        help='Vigila payloads locales de datos_sinteticos.py en lugar de Google')
+    parser.add_argument('--fuentes', nargs='?', const=FUENTES_FILE, default=None, metavar='JSON',
+                        help=f'Procesa todas las fuentes de la configuración en paralelo ({FUENTES_FILE})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continúa la última ejecución fallida desde la primera etapa incompleta')
+    args = parser.parse_args(argv)
+    if args.resume and (args.fuentes is not None or args.vigilar is not None or args.bloques > 0):
+        parser.error('--resume solo aplica a la ejecución por lotes (sin --fuentes, --vigilar ni --bloques)')
+    if args.fuentes is not None:
+        return main_fuentes(args.fuentes, sesion_perfil=sesion_desde_args(args))
+    if args.vigilar is not None:
+        return main_vigilancia(args.vigilar, sesion_desde_args(args), args.bloques, args.huella, args.sinteticos)
+    return main(sesion_desde_args(args), args.bloques, reanudar=args.resume)
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(cli())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Series.apply vs aplicar_por_valor en las transformaciones de
+limpiar_agendamiento_con_diccionario.py (limpiar_nombre_upz, codificar UPZ)
+sobre una columna sintética con los valores reales de Nombre_UPZ.
+
+Uso: python scripts/benchmark_aplicar_por_valor.py [--filas 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from codigos_territoriales import codigo_upz
+from limpiar_agendamiento_con_diccionario import limpiar_nombre_upz
+from memoizacion import aplicar_por_valor
+
+VALORES_UPZ = [
+    '32 - SAN BLAS', '33 - SOSIEGO', '34 - 20 DE JULIO', '50 - LA GLORIA',
+    '51 - LOS LIBERTADORES', '32 - San Blas', ' 34 - 20 de Julio ', 'San Blas',
+    '32', '51', '512', None,
+]
+
+CORRECCIONES = {'20 DE JULIO': '34 - 20 DE JULIO', 'SAN BLAS': '32 - SAN BLAS'}
+
+
+def cronometrar(funcion, repeticiones):
+    """Mejor tiempo de `repeticiones` ejecuciones y el último resultado"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    serie = pd.Series(rng.choice(np.array(VALORES_UPZ, dtype=object), size=args.filas))
+
+    print("\n" + "="*80)
+    print(f"⏱️  BENCHMARK APLICAR POR VALOR ({args.filas:,} filas, {serie.nunique(dropna=False)} valores distintos)")
+    print("="*80)
+
+    casos = [
+        ('limpiar_nombre_upz', lambda x: limpiar_nombre_upz(x, CORRECCIONES),
+         lambda s: aplicar_por_valor(s, limpiar_nombre_upz, CORRECCIONES)),
+        ('codigo_upz', codigo_upz,
+         lambda s: aplicar_por_valor(s, codigo_upz)),
+    ]
+
+    for nombre, escalar, memoizado in casos:
+        t_apply, esperado = cronometrar(lambda: serie.apply(escalar), args.repeticiones)
+        t_memo, obtenido = cronometrar(lambda: memoizado(serie), args.repeticiones)
+        iguales = esperado.astype(object).equals(obtenido.astype(object))
+
+        print(f"\n📋 {nombre}")
+        print(f"   Series.apply:      {t_apply:8.3f} s")
+        print(f"   aplicar_por_valor: {t_memo:8.3f} s  ({t_apply / t_memo:,.0f}x)")
+        print(f"   {'✅' if iguales else '❌'} Resultados idénticos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de todas las etapas del pipeline a varias escalas
+Genera respuestas sintéticas (datos_sinteticos.py) de 1k, 10k, 100k y 1M
+filas, las extrae con el mismo extraer_datos de run_pipeline y mide cada
+etapa con metricas_etapas.medir. El tiempo y el rendimiento (filas/s) se
+toman sin tracemalloc; con --memoria cada escala se corre una segunda vez
+con tracemalloc solo para el pico de memoria por etapa. Las etapas medidas son:
+  - normalizar_columnas → limpiar_datos → combinar_hojas (concat, columnas
+    cruzadas y duplicados, la misma función del pipeline) → indice_duplicados
+    (hash de claves contra una carga anterior con la mitad de las respuestas
+    e índice actualizado, como en main) → enriquecer_datos → generar_ids →
+    crear_dimensiones → crear_tabla_hechos → guardar_archivos (en un
+    directorio temporal)
+  - extraccion_barrios (enriquecer_con_barrios.extraer_barrios)
+  - generar_modelo (generar_modelo_completo)
+Las copias de entrada se hacen fuera del reloj. Las métricas de extracción
+se escriben en el temporal, no en el repositorio.
+
+Uso:
+  python scripts/benchmark_pipeline.py ejecutar [--escalas 1000 10000] [--memoria] [--salida benchmarks/resultados.json]
+  python scripts/benchmark_pipeline.py comparar [--resultados ...] [--base benchmarks/linea_base.json]
+  python scripts/benchmark_pipeline.py fijar-base [--resultados ...]
+`comparar` termina con código 1 si alguna etapa empeoró más que la tolerancia.
+Los tiempos dependen de la máquina: la línea base es local (no se versiona)
+y se fija con `fijar-base` antes del cambio a evaluar.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from datos_sinteticos import aprender_perfil, generar_payloads, ServicioSintetico
+from indice_duplicados import agregar, contiene, hash_claves, indice_vacio
+from metricas_etapas import medir, contar_filas
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+# run_pipeline.py está en la raíz: hace falta también al ejecutar el script directamente
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+BENCHMARKS_DIR = BASE_DIR / "benchmarks"
+RESULTADOS_FILE = BENCHMARKS_DIR / "resultados.json"
+BASE_FILE = BENCHMARKS_DIR / "linea_base.json"
+
+ESCALAS = [1_000, 10_000, 100_000, 1_000_000]
+
+# Empeoramiento relativo tolerado y pisos absolutos (ruido de medición)
+TOLERANCIA = 0.25
+MIN_SEGUNDOS = 0.05
+MIN_MEMORIA_MB = 5.0
+
+
+def copiar(valor):
+    """Copia de DataFrames (también dentro de listas/tuplas/dicts)"""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy()
+    if isinstance(valor, (list, tuple)):
+        return type(valor)(copiar(v) for v in valor)
+    if isinstance(valor, dict):
+        return {k: copiar(v) for k, v in valor.items()}
+    return valor
+
+
+def _silenciado(funcion):
+    """La función sin sus prints (los scripts reportan mucho por consola)"""
+    def envuelta(*args):
+        with open(os.devnull, 'w') as silencio, redirect_stdout(silencio):
+            return funcion(*args)
+    return envuelta
+
+
+def _en_directorio(directorio, funcion, *args):
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        return funcion(*args)
+    finally:
+        os.chdir(anterior)
+
+
+# =====================================================================
+# EJECUCIÓN
+# =====================================================================
+def aislar_extraccion(temporal):
+    """Redirige al temporal las métricas que escribe extraer_barrios"""
+    import enriquecer_con_barrios as ecb
+
+    _silenciado(ecb.cargar_recursos)()
+    ecb.METRICAS_FILE = temporal / "metricas_extraccion_barrios.json"
+
+
+def medir_escala(filas, perfil, temporal, semilla=0):
+    """Mide todas las etapas sobre `filas` respuestas sintéticas; retorna registros"""
+    import run_pipeline as rp
+    import enriquecer_con_barrios as ecb
+    from generar_modelo_completo import generar_modelo, cargar_diccionarios
+
+    servicio = ServicioSintetico(generar_payloads(perfil, filas, semilla))
+    hojas = [rp.extraer_datos(servicio, rp.SHEET_NAME_1), rp.extraer_datos(servicio, rp.SHEET_NAME_2)]
+
+    metricas = {'etapas': []}
+    salida_dir = temporal / f"salida_{filas}"
+    salida_dir.mkdir(exist_ok=True)
+
+    def correr(nombre, funcion, entrada, filas_entrada=None):
+        """filas_entrada: lo que cuenta para filas/s si no es toda la entrada"""
+        entrada = copiar(entrada)
+        with medir(metricas, nombre, entrada if filas_entrada is None else filas_entrada) as registro:
+            resultado = funcion(entrada)
+            registro['filas_salida'] = contar_filas(resultado)
+        print(f"   ⏱️  {nombre:<28} {registro['reloj_s']:9.3f} s")
+        return resultado
+
+    def indice_claves(df):
+        """Respuestas nuevas frente al índice anterior; también lo actualiza"""
+        hashes = hash_claves(df, rp.CLAVE_DUPLICADO)
+        nuevas = ~contiene(indice_previo, hashes)
+        agregar(indice_previo, hashes)
+        return df[nuevas]
+
+    def generar_ids(df):
+        df = df.reset_index(drop=True)
+        df['ID_Actividad'] = [rp.generar_id_actividad(row, idx) for idx, row in df.iterrows()]
+        return df
+
+    def extraccion_barrios(df):
+        return ecb.extraer_barrios(df.rename(columns={'UPZ': 'Nombre_UPZ'}))
+
+    diccionarios = _silenciado(cargar_diccionarios)()
+
+    normalizadas = correr('normalizar_columnas', lambda hs: [rp.normalizar_columnas(h) for h in hs], hojas)
+    limpias = correr('limpiar_datos', lambda hs: [rp.limpiar_datos(h, o) for h, o in
+                                                  zip(hs, ['Formulario_1', 'Formulario_2'])], normalizadas)
+    df = correr('combinar_hojas', lambda hs: rp.combinar_hojas(*hs), limpias)
+    indice_previo = agregar(indice_vacio(), hash_claves(df.iloc[::2], rp.CLAVE_DUPLICADO))
+    correr('indice_duplicados', indice_claves, df)
+    df = correr('enriquecer_datos', rp.enriquecer_datos, df)
+    df = correr('generar_ids', generar_ids, df)
+    dimensiones = correr('crear_dimensiones', rp.crear_dimensiones, df)
+    fact = correr('crear_tabla_hechos', lambda e: rp.crear_tabla_hechos(*e), (df, dimensiones), filas_entrada=df)
+    correr('guardar_archivos', lambda e: _en_directorio(salida_dir, rp.guardar_archivos, *e), (fact, dimensiones))
+
+    correr('extraccion_barrios', _silenciado(extraccion_barrios), df)
+    correr('generar_modelo', _silenciado(lambda d: generar_modelo(d, *diccionarios)), df)
+
+    shutil.rmtree(salida_dir, ignore_errors=True)
+
+    for registro in metricas['etapas']:
+        registro['escala'] = filas
+        registro['filas_por_s'] = (
+            round(registro['filas_entrada'] / registro['reloj_s'], 1)
+            if registro['filas_entrada'] and registro['reloj_s'] else None
+        )
+    return metricas['etapas']
+
+
+def medir_memoria(filas, perfil, temporal, semilla=0):
+    """Segunda pasada con tracemalloc: {etapa: pico MB} (su tiempo se descarta)"""
+    tracemalloc.start()
+    try:
+        registros = _silenciado(medir_escala)(filas, perfil, temporal, semilla)
+    finally:
+        tracemalloc.stop()
+    return {r['etapa']: r['memoria_pico_mb'] for r in registros}
+
+
+def ejecutar(args):
+    logging.disable(logging.INFO)
+
+    perfil = aprender_perfil()
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as temporal:
+        aislar_extraccion(Path(temporal))
+        for filas in args.escalas:
+            print("\n" + "="*80)
+            print(f"⏱️  BENCHMARK PIPELINE: {filas:,} filas")
+            print("="*80)
+            registros = medir_escala(filas, perfil, Path(temporal), args.semilla)
+            if args.memoria:
+                print("   🧮 Segunda pasada con tracemalloc (pico de memoria)")
+                picos = medir_memoria(filas, perfil, Path(temporal), args.semilla)
+                for registro in registros:
+                    registro['memoria_pico_mb'] = picos.get(registro['etapa'])
+            resultados += registros
+
+    documento = {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'semilla': args.semilla,
+        'memoria': args.memoria,
+        'resultados': resultados,
+    }
+    args.salida.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, ensure_ascii=False, indent=1)
+
+    imprimir_resultados(resultados)
+    print(f"\n💾 Resultados: {args.salida}")
+    return 0
+
+
+def imprimir_resultados(resultados):
+    print(f"\n   {'Escala':>9}  {'Etapa':<28}{'Reloj s':>10}{'Filas/s':>13}{'Mem MB':>9}")
+    for r in resultados:
+        filas_s = f"{r['filas_por_s']:,.0f}" if r.get('filas_por_s') else '-'
+        memoria = f"{r['memoria_pico_mb']:.1f}" if r.get('memoria_pico_mb') is not None else '-'
+        print(f"   {r['escala']:>9,}  {r['etapa']:<28}{r['reloj_s']:>10.3f}{filas_s:>13}{memoria:>9}")
+
+
+# =====================================================================
+# COMPARACIÓN CON LA LÍNEA BASE
+# =====================================================================
+def _cargar(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar_resultados(actual, base, tolerancia=TOLERANCIA):
+    """
+    Filas (escala, etapa, métrica, base, actual, cambio, regresión) para cada
+    medición presente en ambos archivos.
+    """
+    indice_base = {(r['escala'], r['etapa']): r for r in base['resultados']}
+    filas = []
+    for r in actual['resultados']:
+        b = indice_base.get((r['escala'], r['etapa']))
+        if b is None:
+            continue
+        for metrica, piso in (('reloj_s', MIN_SEGUNDOS), ('memoria_pico_mb', MIN_MEMORIA_MB)):
+            if r.get(metrica) is None or b.get(metrica) is None:
+                continue
+            cambio = (r[metrica] - b[metrica]) / b[metrica] if b[metrica] else 0.0
+            regresion = cambio > tolerancia and r[metrica] - b[metrica] > piso
+            filas.append((r['escala'], r['etapa'], metrica, b[metrica], r[metrica], cambio, regresion))
+    return filas
+
+
+def comparar(args):
+    if not args.base.exists():
+        print(f"❌ No existe la línea base {args.base} (use fijar-base)")
+        return 2
+    filas = comparar_resultados(_cargar(args.resultados), _cargar(args.base), args.tolerancia)
+
+    print(f"\n   {'Escala':>9}  {'Etapa':<28}{'Métrica':<17}{'Base':>10}{'Actual':>10}{'Cambio':>9}")
+    for escala, etapa, metrica, b, a, cambio, regresion in filas:
+        marca = '❌' if regresion else '  '
+        print(f"   {escala:>9,}  {etapa:<28}{metrica:<17}{b:>10.3f}{a:>10.3f}{cambio:>+8.0%} {marca}")
+
+    regresiones = [f for f in filas if f[-1]]
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresión(es) sobre {args.tolerancia:.0%} de tolerancia")
+        return 1
+    print(f"\n✅ Sin regresiones ({len(filas)} mediciones comparadas)")
+    return 0
+
+
+def fijar_base(args):
+    args.base.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(args.resultados, args.base)
+    print(f"📌 Línea base: {args.base} (desde {args.resultados})")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p = comandos.add_parser('ejecutar', help='Mide las etapas y escribe el archivo de resultados')
+    p.add_argument('--escalas', type=int, nargs='+', default=ESCALAS)
+    p.add_argument('--salida', type=Path, default=RESULTADOS_FILE)
+    p.add_argument('--semilla', type=int, default=0)
+    p.add_argument('--memoria', action='store_true',
+                   help='Pico de memoria por etapa en una segunda pasada con tracemalloc')
+    p.set_defaults(funcion=ejecutar)
+
+    p = comandos.add_parser('comparar', help='Compara resultados con la línea base')
+    p.add_argument('--resultados', type=Path, default=RESULTADOS_FILE)
+    p.add_argument('--base', type=Path, default=BASE_FILE)
+    p.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    p.set_defaults(funcion=comparar)
+
+    p = comandos.add_parser('fijar-base', help='Guarda los resultados como línea base')
+    p.add_argument('--resultados', type=Path, default=RESULTADOS_FILE)
+    p.add_argument('--base', type=Path, default=BASE_FILE)
+    p.set_defaults(funcion=fijar_base)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
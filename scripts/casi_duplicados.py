@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detección de casi-duplicados en el agendamiento
+La misma actividad suele llegar dos veces con el nombre escrito distinto
+("Charla responsabilidad penal" / "CHARLAS DE RESPONSABILIDAD PENAL").
+Para no comparar todos contra todos, las filas se agrupan en bloques por
+Fecha_Actividad + Hora_Inicio + ubicación canónica, y dentro de cada bloque
+los nombres se comparan con MinHash sobre shingles de caracteres.
+Produce pares candidatos con su similitud; la fusión automática es opcional
+(umbral configurable, desactivada por defecto).
+"""
+
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from memoizacion import aplicar_por_valor
+from normalizar_direcciones import canonizar_direcciones, normalizar_texto
+
+# Columnas del agendamiento
+COL_NOMBRE = 'Nombre_Actividad'
+COL_DIRECCION = 'Direccion_Actividad'
+COL_FECHA = 'Fecha_Actividad'
+COL_HORA = 'Hora_Inicio'
+
+TAMANO_SHINGLE = 3
+NUM_PERMUTACIONES = 64
+
+# Similitud mínima para reportar un par
+UMBRAL_CANDIDATO = 0.5
+# Similitud desde la que se fusiona automáticamente (None = no fusionar)
+UMBRAL_FUSION = None
+
+# Bloques más grandes se omiten (suelen ser filas sin fecha/lugar útiles)
+MAX_BLOQUE = 200
+
+# Permutaciones h → (a·h + b) mod p. Con h < 2^32 y a < 2^31 el producto
+# cabe en uint64; la semilla fija hace las firmas reproducibles.
+_PRIMO = (1 << 61) - 1
+_rng = np.random.default_rng(360)
+_A = _rng.integers(1, 1 << 31, NUM_PERMUTACIONES, dtype=np.uint64)
+_B = _rng.integers(0, _PRIMO, NUM_PERMUTACIONES, dtype=np.uint64)
+
+
+# =====================================================================
+# MINHASH
+# =====================================================================
+def normalizar_nombre(texto):
+    """Minúsculas, sin tildes ni signos, espacios simples"""
+    if pd.isna(texto):
+        return ''
+    return re.sub(r'[^a-z0-9]+', ' ', normalizar_texto(texto)).strip()
+
+
+def shingles(nombre, k=TAMANO_SHINGLE):
+    """Conjunto de k-gramas de caracteres (con bordes)"""
+    texto = f" {nombre} "
+    if len(texto) <= k:
+        return {texto}
+    return {texto[i:i + k] for i in range(len(texto) - k + 1)}
+
+
+def firma_minhash(nombre):
+    """Firma de NUM_PERMUTACIONES mínimos de (a·h + b) mod p sobre los shingles"""
+    if not nombre:
+        return None
+    h = np.array([zlib.crc32(s.encode()) for s in shingles(nombre)], dtype=np.uint64)
+    valores = (_A[:, None] * h[None, :] + _B[:, None]) % _PRIMO
+    return valores.min(axis=1)
+
+
+def similitud(firma_a, firma_b):
+    """Jaccard estimado: proporción de mínimos coincidentes"""
+    if firma_a is None or firma_b is None:
+        return 0.0
+    return float(np.mean(firma_a == firma_b))
+
+
+# =====================================================================
+# BLOQUEO Y PARES
+# =====================================================================
+def _ubicacion_bloque(clave):
+    """Parte de nomenclatura de la clave canónica (sin el texto ' | resto')"""
+    if pd.isna(clave):
+        return ''
+    return str(clave).split(' | ')[0]
+
+
+def claves_bloque(df):
+    """Fecha + hora + ubicación canónica de cada fila"""
+    ubicacion = canonizar_direcciones(df[COL_DIRECCION])['Direccion_Canonica']
+    ubicacion = aplicar_por_valor(ubicacion, _ubicacion_bloque)
+    fecha = df[COL_FECHA].astype(object).where(df[COL_FECHA].notna(), '').astype(str).str.strip()
+    hora = df[COL_HORA].astype(object).where(df[COL_HORA].notna(), '').astype(str).str.strip()
+    return pd.DataFrame({'Fecha': fecha, 'Hora': hora, 'Ubicacion': ubicacion}, index=df.index)
+
+
+def detectar_casi_duplicados(df, umbral=UMBRAL_CANDIDATO, umbral_fusion=UMBRAL_FUSION,
+                             max_bloque=MAX_BLOQUE):
+    """
+    Retorna un DataFrame de pares candidatos (uno por par de filas del mismo
+    bloque con similitud de nombre ≥ umbral), ordenado por similitud:
+      Fila_A, Fila_B (índice original), Nombre_A, Nombre_B, Fecha, Hora,
+      Ubicacion, Similitud, Accion ('Fusionar' o 'Revisar')
+    """
+    columnas = ['Fila_A', 'Fila_B', 'Nombre_A', 'Nombre_B', 'Fecha', 'Hora',
+                'Ubicacion', 'Similitud', 'Accion']
+
+    bloques = claves_bloque(df)
+    # Un bloque necesita fecha y hora; la ubicación puede faltar
+    util = (bloques['Fecha'] != '') & (bloques['Hora'] != '')
+    grupos = bloques[util].groupby(['Fecha', 'Hora', 'Ubicacion'], sort=False).indices
+    posiciones_util = np.flatnonzero(util.to_numpy())
+
+    # Firma por nombre distinto
+    nombres = aplicar_por_valor(df[COL_NOMBRE], normalizar_nombre)
+    firmas = {nombre: firma_minhash(nombre) for nombre in nombres.unique()}
+    nombres = nombres.to_numpy()
+    originales = df[COL_NOMBRE].to_numpy()
+    etiquetas = df.index.to_numpy()
+
+    pares = []
+    for (fecha, hora, ubicacion), miembros in grupos.items():
+        if len(miembros) < 2 or len(miembros) > max_bloque:
+            continue
+        posiciones = posiciones_util[miembros]
+        for i, a in enumerate(posiciones):
+            for b in posiciones[i + 1:]:
+                s = similitud(firmas[nombres[a]], firmas[nombres[b]])
+                if s >= umbral:
+                    accion = 'Fusionar' if umbral_fusion is not None and s >= umbral_fusion else 'Revisar'
+                    pares.append((etiquetas[a], etiquetas[b], originales[a], originales[b],
+                                  fecha, hora, ubicacion, round(s, 4), accion))
+
+    resultado = pd.DataFrame(pares, columns=columnas)
+    return resultado.sort_values('Similitud', ascending=False, kind='mergesort').reset_index(drop=True)
+
+
+def fusionar_casi_duplicados(df, pares):
+    """
+    Elimina las filas de los pares marcados 'Fusionar', conservando en cada
+    grupo conectado la primera fila del DataFrame.
+    """
+    fusionar = pares[pares['Accion'] == 'Fusionar']
+    if fusionar.empty:
+        return df
+
+    # Unión-búsqueda sobre las posiciones de las filas
+    posicion = pd.Series(np.arange(len(df)), index=df.index)
+    padre = np.arange(len(df))
+
+    def raiz(x):
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    for a, b in zip(posicion[fusionar['Fila_A']].to_numpy(), posicion[fusionar['Fila_B']].to_numpy()):
+        ra, rb = raiz(a), raiz(b)
+        if ra != rb:
+            padre[max(ra, rb)] = min(ra, rb)
+
+    conservar = np.array([raiz(x) == x for x in range(len(df))])
+    return df[conservar]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Códigos enteros canónicos de UPZ y zona
+La UPZ llega como texto libre ("32", "32 - San Blas", "32 - SAN BLAS",
+"San Blas") y la zona como "Zona 3", "ZONA 3" o "3". Cada valor distinto se
+traduce una sola vez a un código int8 (el número oficial de la UPZ / zona)
+más su etiqueta de presentación; búsquedas, cruces y validaciones trabajan
+después sobre enteros.
+"""
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from memoizacion import aplicar_por_valor
+from nomenclator import cargar_nomenclator
+
+# Códigos especiales (los códigos oficiales son siempre positivos)
+VACIO = -2
+DESCONOCIDO = -1
+
+COLUMNA_CODIGO_UPZ = 'UPZ_Codigo'
+COLUMNA_CODIGO_ZONA = 'Zona_Codigo'
+
+_tablas = {}
+
+
+def _normalizar(texto):
+    texto = ''.join(c for c in unicodedata.normalize('NFD', str(texto))
+                    if unicodedata.category(c) != 'Mn')
+    return re.sub(r'\s+', ' ', texto).strip().lower()
+
+
+def _es_vacio(valor):
+    return pd.isna(valor) or str(valor).strip() in ('', 'nan')
+
+
+def cargar_tablas():
+    """
+    Etiquetas y nombres desde el nomenclátor compilado (una vez por proceso):
+      - etiqueta_upz:  {32: '32 - SAN BLAS', ...}
+      - etiqueta_zona: {1: 'ZONA 1', ...}
+      - nombre_upz:    {'san blas': 32, '32 - san blas': 32, ...}
+    """
+    if _tablas:
+        return _tablas
+
+    nomenclator = cargar_nomenclator()
+    etiqueta_upz = {int(re.match(r'\d+', upz).group()): upz for upz in nomenclator['upz_etiquetas']}
+    etiqueta_zona = {int(zona.split()[-1]): zona for zona in nomenclator['zona_etiquetas']}
+    nombre_upz = {nombre: int(codigo) for nombre, codigo in nomenclator['codigo_upz_por_nombre'].items()}
+
+    _tablas.update(etiqueta_upz=etiqueta_upz, etiqueta_zona=etiqueta_zona, nombre_upz=nombre_upz)
+    return _tablas
+
+
+def codigo_upz(valor):
+    """'32', '32 - San Blas', 'San Blas' → 32 (VACIO / DESCONOCIDO si no aplica)"""
+    if _es_vacio(valor):
+        return VACIO
+    tablas = cargar_tablas()
+    texto = _normalizar(valor)
+
+    match = re.match(r'(\d+)\b', texto)
+    if match:
+        codigo = int(match.group(1))
+        return codigo if codigo in tablas['etiqueta_upz'] else DESCONOCIDO
+
+    if texto in tablas['nombre_upz']:
+        return tablas['nombre_upz'][texto]
+    for nombre, codigo in tablas['nombre_upz'].items():
+        if nombre in texto:
+            return codigo
+    return DESCONOCIDO
+
+
+def codigo_zona(valor):
+    """'Zona 3', 'ZONA 3', '3' → 3. Una lista ('Zona 1, Zona 2') no es una zona."""
+    if _es_vacio(valor):
+        return VACIO
+    match = re.fullmatch(r'(?:zona\s*)?(\d+)', _normalizar(valor))
+    if not match:
+        return DESCONOCIDO
+    codigo = int(match.group(1))
+    return codigo if codigo in cargar_tablas()['etiqueta_zona'] else DESCONOCIDO
+
+
+def _codificar(valores, funcion):
+    """Codifica cada valor distinto una sola vez (nulos → VACIO)"""
+    return aplicar_por_valor(valores, funcion).to_numpy(dtype=np.int8)
+
+
+def codificar_upz(valores):
+    return _codificar(valores, codigo_upz)
+
+
+def codificar_zona(valores):
+    return _codificar(valores, codigo_zona)
+
+
+def _etiquetar(codigos, etiquetas):
+    tabla = np.full(max(etiquetas) + 1, None, dtype=object)
+    for codigo, etiqueta in etiquetas.items():
+        tabla[codigo] = etiqueta
+    codigos = np.asarray(codigos)
+    resultado = np.full(len(codigos), None, dtype=object)
+    conocidos = codigos >= 0
+    resultado[conocidos] = tabla[codigos[conocidos]]
+    return resultado
+
+
+def etiquetas_upz(codigos):
+    """Códigos → '32 - SAN BLAS' (None para VACIO / DESCONOCIDO)"""
+    return _etiquetar(codigos, cargar_tablas()['etiqueta_upz'])
+
+
+def etiquetas_zona(codigos):
+    """Códigos → 'ZONA 3' (None para VACIO / DESCONOCIDO)"""
+    return _etiquetar(codigos, cargar_tablas()['etiqueta_zona'])
+
+
+def agregar_codigos(df, col_upz, col_zona):
+    """Agrega UPZ_Codigo y Zona_Codigo (int8) calculados desde las columnas de texto"""
+    if col_upz in df.columns:
+        df[COLUMNA_CODIGO_UPZ] = codificar_upz(df[col_upz])
+    if col_zona in df.columns:
+        df[COLUMNA_CODIGO_ZONA] = codificar_zona(df[col_zona])
+    return df
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detección de cruces de agenda (fact_conflictos_agenda)
+Cada actividad ocupa [inicio, inicio + duración) con inicio = Fecha_Actividad
++ Hora_Inicio. Dos actividades chocan si se solapan en el mismo lugar
+(dirección canónica) o con la misma persona responsable. Por cada llave los
+intervalos se ordenan por inicio y se recorren con una línea de barrido
+(heap de finales activos): O(n log n) más el número de cruces, sin comparar
+todos los pares. Así el tablero muestra los cruces sin auto-joins en DAX.
+"""
+
+import heapq
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from memoizacion import aplicar_por_valor
+from normalizar_direcciones import canonizar_direcciones, normalizar_texto
+
+# Duración asumida de cada actividad (no viene en el formulario)
+DURACION_MINUTOS = int(os.getenv('DURACION_ACTIVIDAD_MIN', '120'))
+
+COL_ID = 'ID_Actividad'
+COL_FECHA = 'Fecha_Actividad'
+COL_HORA = 'Hora_Inicio'
+COL_DIRECCION = 'Direccion_Actividad'
+# Responsable_Principal no entra: guarda el área o programa solicitante
+# ("Territorio Confiable"), no una persona, y uniría actividades ajenas
+COLUMNAS_RESPONSABLE = ['Responsable_Actividad']
+
+TIPO_UBICACION = 'Ubicación'
+TIPO_RESPONSABLE = 'Responsable'
+
+# Valores de relleno que no identifican a una persona
+RESPONSABLES_IGNORADOS = {'', 'NO ESPECIFICADO', 'N/A', 'NAN', 'NINGUNO'}
+
+# "ANA GARCIA-DANILO LOPEZ", "YEIMY RODRIGUEZ /KATERIN RODRIGUEZ", "A Y B"
+_SEPARADOR_PERSONAS = re.compile(r'\s*(?:[,;/]|-|\by\b)\s*')
+
+COLUMNAS_CONFLICTOS = [
+    'conflicto_id', 'Tipo_Conflicto', 'Clave', 'ID_Actividad_A', 'ID_Actividad_B',
+    'Inicio_A', 'Inicio_B', 'Fin_A', 'Fin_B', 'Solapamiento_Min',
+]
+
+
+def _hora_a_timedelta(hora):
+    """'10:00:00', '8:00', '2:30 p. m.' → Timedelta (NaT si no se reconoce)"""
+    if pd.isna(hora):
+        return pd.NaT
+    texto = str(hora).strip().lower().replace('.', '').replace('\xa0', ' ')
+    texto = texto.replace('a m', 'am').replace('p m', 'pm')
+    try:
+        return pd.Timestamp(f"2000-01-01 {texto}") - pd.Timestamp("2000-01-01")
+    except ValueError:
+        return pd.NaT
+
+
+def inicio_actividades(df):
+    """Marca de inicio de cada actividad (NaT si falta fecha u hora)"""
+    fecha = pd.to_datetime(df[COL_FECHA], dayfirst=True, errors='coerce')
+    hora = aplicar_por_valor(df[COL_HORA], _hora_a_timedelta)
+    return fecha.dt.normalize() + pd.to_timedelta(hora)
+
+
+def personas(texto):
+    """Responsables individuales normalizados de una celda"""
+    if pd.isna(texto):
+        return ()
+    texto = re.sub(r'\s+', ' ', normalizar_texto(texto))
+    nombres = {p.strip().upper() for p in _SEPARADOR_PERSONAS.split(texto)}
+    return tuple(sorted(nombres - RESPONSABLES_IGNORADOS))
+
+
+def _barrido(claves, inicio, fin):
+    """
+    Cruces por llave: ordena por (llave, inicio) y mantiene un heap con los
+    finales de los intervalos aún abiertos. Retorna pares de posiciones.
+    """
+    orden = np.lexsort((inicio, claves))
+    pares = []
+    activos = []
+    clave_actual = None
+    for pos in orden:
+        if claves[pos] != clave_actual:
+            clave_actual = claves[pos]
+            activos = []
+        while activos and activos[0][0] <= inicio[pos]:
+            heapq.heappop(activos)
+        for fin_otro, otro in activos:
+            pares.append((otro, pos, min(fin_otro, fin[pos]) - inicio[pos]))
+        heapq.heappush(activos, (fin[pos], pos))
+    return pares
+
+
+def _conflictos_por_llave(tipo, llaves, filas, inicio_min, ids, inicio, duracion):
+    """llaves/filas: una entrada por (fila, llave); retorna registros de conflicto"""
+    if len(llaves) < 2:
+        return []
+    codigos, etiquetas = pd.factorize(pd.Series(llaves))
+    inicio_fila = inicio_min[filas]
+    registros = []
+    for a, b, solape in _barrido(codigos, inicio_fila, inicio_fila + duracion):
+        fa, fb = filas[a], filas[b]
+        registros.append((
+            tipo, etiquetas[codigos[a]], ids[fa], ids[fb], inicio[fa], inicio[fb],
+            inicio[fa] + pd.Timedelta(minutes=duracion),
+            inicio[fb] + pd.Timedelta(minutes=duracion), int(solape),
+        ))
+    return registros
+
+
+def detectar_conflictos(df, duracion_minutos=DURACION_MINUTOS):
+    """
+    Construye fact_conflictos_agenda: una fila por par de actividades que se
+    solapan en el mismo lugar o con la misma persona responsable.
+    """
+    inicio = inicio_actividades(df).reset_index(drop=True)
+    con_inicio = inicio.notna().to_numpy()
+    inicio_min = np.zeros(len(df), dtype=np.int64)
+    inicio_min[con_inicio] = inicio[con_inicio].to_numpy().astype('datetime64[m]').astype(np.int64)
+    ids = df[COL_ID].to_numpy() if COL_ID in df.columns else df.index.to_numpy()
+    inicio = inicio.to_numpy()
+
+    registros = []
+
+    # Lugar: dirección canónica
+    if COL_DIRECCION in df.columns:
+        lugar = canonizar_direcciones(df[COL_DIRECCION])['Direccion_Canonica'].to_numpy()
+        filas = np.flatnonzero(con_inicio & pd.notna(lugar))
+        registros += _conflictos_por_llave(TIPO_UBICACION, lugar[filas], filas, inicio_min, ids, inicio,
+                                          duracion_minutos)
+
+    # Persona: cada responsable individual de las columnas disponibles
+    columnas = [c for c in COLUMNAS_RESPONSABLE if c in df.columns]
+    if columnas:
+        por_fila = [aplicar_por_valor(df[c], personas).to_numpy() for c in columnas]
+        llaves, filas = [], []
+        for fila in np.flatnonzero(con_inicio):
+            for persona in sorted(set().union(*(celdas[fila] for celdas in por_fila))):
+                llaves.append(persona)
+                filas.append(fila)
+        registros += _conflictos_por_llave(
+            TIPO_RESPONSABLE, np.array(llaves, dtype=object), np.array(filas, dtype=np.int64),
+            inicio_min, ids, inicio, duracion_minutos,
+        )
+
+    conflictos = pd.DataFrame(registros, columns=COLUMNAS_CONFLICTOS[1:])
+    conflictos.insert(0, 'conflicto_id', range(1, len(conflictos) + 1))
+    return conflictos
@@ -8,13 +8,12 @@ Basado en documentación oficial de San Cristóbal
 import json
 from pathlib import Path
 
+from nomenclator import construir_artefacto, ARTEFACTO_FILE
+
 # Rutas
 BASE_DIR = Path(__file__).resolve().parents[1]
 DICT_FILE = BASE_DIR / "scripts" / "diccionario_barrios_completo.json"
-
-print("\n" + "="*80)
-print("📚 CREANDO DICCIONARIO MAESTRO DE BARRIOS")
-print("="*80)
+DICT_UPZ_ZONAS = BASE_DIR / "scripts" / "diccionario_upz_zonas.json"
 
 # =====================================================================
 # DICCIONARIO OFICIAL: 206 BARRIOS → UPZ (desde PDF oficial)
@@ -190,8 +189,6 @@ barrios_por_zona = {
 # =====================================================================
 # CREAR MAPEOS INVERTIDOS (para búsqueda rápida)
 # =====================================================================
-print("\n📊 Procesando diccionarios...")
-
 def normalizar(texto):
     """Normaliza texto para búsqueda"""
     import unicodedata
@@ -199,51 +196,100 @@ def normalizar(texto):
                     if unicodedata.category(c) != 'Mn')
     return texto.lower().strip()
 
-# Mapeo: barrio_normalizado → UPZ
-barrio_a_upz = {}
-for upz, barrios in barrios_por_upz.items():
-    for barrio in barrios:
-        barrio_norm = normalizar(barrio)
-        barrio_a_upz[barrio_norm] = upz
-        # También guardar versión con mayúsculas
-        barrio_a_upz[barrio.lower()] = upz
-
-# Mapeo: barrio_normalizado → [zonas] (puede ser múltiple)
-barrio_a_zonas = {}
-for zona, barrios in barrios_por_zona.items():
-    for barrio in barrios:
-        barrio_norm = normalizar(barrio)
-        if barrio_norm not in barrio_a_zonas:
-            barrio_a_zonas[barrio_norm] = []
-        if zona not in barrio_a_zonas[barrio_norm]:
-            barrio_a_zonas[barrio_norm].append(zona)
 
-# =====================================================================
-# GUARDAR DICCIONARIO COMPLETO
-# =====================================================================
-diccionario_completo = {
-    "barrios_por_upz": barrios_por_upz,
-    "barrios_por_zona": barrios_por_zona,
-    "barrio_a_upz": barrio_a_upz,
-    "barrio_a_zonas": barrio_a_zonas,
-    "metadata": {
-        "total_barrios": sum(len(b) for b in barrios_por_upz.values()),
-        "total_upz": len(barrios_por_upz),
-        "total_zonas": len(barrios_por_zona),
-        "fecha_creacion": "2025-01-22"
+def main():
+    print("\n" + "="*80)
+    print("📚 CREANDO DICCIONARIO MAESTRO DE BARRIOS")
+    print("="*80)
+
+    print("\n📊 Procesando diccionarios...")
+
+    # Mapeo: barrio_normalizado → UPZ
+    barrio_a_upz = {}
+    for upz, barrios in barrios_por_upz.items():
+        for barrio in barrios:
+            barrio_norm = normalizar(barrio)
+            barrio_a_upz[barrio_norm] = upz
+            # También guardar versión con mayúsculas
+            barrio_a_upz[barrio.lower()] = upz
+
+    # Mapeo: barrio_normalizado → [zonas] (puede ser múltiple)
+    barrio_a_zonas = {}
+    for zona, barrios in barrios_por_zona.items():
+        for barrio in barrios:
+            barrio_norm = normalizar(barrio)
+            if barrio_norm not in barrio_a_zonas:
+                barrio_a_zonas[barrio_norm] = []
+            if zona not in barrio_a_zonas[barrio_norm]:
+                barrio_a_zonas[barrio_norm].append(zona)
+
+    # =====================================================================
+    # TABLA COMPILADA (UPZ, BARRIO) → ZONA
+    # =====================================================================
+    # Resuelve las zonas duplicadas ("Zona 1, Zona 2") sin ramificar por UPZ:
+    # para cada código de UPZ se recorren sus zonas en el orden oficial y el
+    # barrio queda en la primera zona que lo contiene. Si el barrio no aparece,
+    # se usa la última zona de la UPZ (zona por defecto).
+    with open(DICT_UPZ_ZONAS, 'r', encoding='utf-8') as f:
+        upz_zonas = json.load(f)
+
+    codigo_upz_por_nombre = {}
+    for upz in barrios_por_upz:
+        codigo, nombre = [p.strip() for p in upz.split(' - ', 1)]
+        codigo_upz_por_nombre[normalizar(upz)] = codigo
+        codigo_upz_por_nombre[normalizar(nombre)] = codigo
+
+    zona_por_upz_barrio = {}
+    zona_por_defecto_upz = {}
+    for codigo in sorted(set(codigo_upz_por_nombre.values())):
+        zonas_upz = [z.upper() for z in upz_zonas.get(codigo, [])]
+        if not zonas_upz:
+            continue
+        tabla = {}
+        for zona in zonas_upz:
+            for barrio in barrios_por_zona.get(zona, []):
+                tabla.setdefault(normalizar(barrio), zona)
+        zona_por_upz_barrio[codigo] = tabla
+        zona_por_defecto_upz[codigo] = zonas_upz[-1]
+
+    # =====================================================================
+    # GUARDAR DICCIONARIO COMPLETO
+    # =====================================================================
+    diccionario_completo = {
+        "barrios_por_upz": barrios_por_upz,
+        "barrios_por_zona": barrios_por_zona,
+        "barrio_a_upz": barrio_a_upz,
+        "barrio_a_zonas": barrio_a_zonas,
+        "codigo_upz_por_nombre": codigo_upz_por_nombre,
+        "zona_por_upz_barrio": zona_por_upz_barrio,
+        "zona_por_defecto_upz": zona_por_defecto_upz,
+        "metadata": {
+            "total_barrios": sum(len(b) for b in barrios_por_upz.values()),
+            "total_upz": len(barrios_por_upz),
+            "total_zonas": len(barrios_por_zona),
+            "fecha_creacion": "2025-01-22"
+        }
     }
-}
 
-with open(DICT_FILE, 'w', encoding='utf-8') as f:
-    json.dump(diccionario_completo, f, ensure_ascii=False, indent=2)
+    with open(DICT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(diccionario_completo, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ Diccionario guardado: {DICT_FILE}")
+
+    # Nomenclátor compilado para los scripts de enriquecimiento
+    nomenclator = construir_artefacto(DICT_FILE, ARTEFACTO_FILE)
+    print(f"✅ Nomenclátor compilado: {ARTEFACTO_FILE} (v{nomenclator['version']})")
+    print(f"\n📊 Estadísticas:")
+    print(f"   • Total barrios oficiales: {diccionario_completo['metadata']['total_barrios']}")
+    print(f"   • Total UPZ: {diccionario_completo['metadata']['total_upz']}")
+    print(f"   • Total Zonas: {diccionario_completo['metadata']['total_zonas']}")
+    print(f"   • Variantes normalizadas: {len(barrio_a_upz)}")
+    print(f"   • Pares (UPZ, barrio) → zona: {sum(len(t) for t in zona_por_upz_barrio.values())}")
+
+    print("\n" + "="*80)
+    print("✅ DICCIONARIO MAESTRO CREADO CON ÉXITO")
+    print("="*80)
 
-print(f"✅ Diccionario guardado: {DICT_FILE}")
-print(f"\n📊 Estadísticas:")
-print(f"   • Total barrios oficiales: {diccionario_completo['metadata']['total_barrios']}")
-print(f"   • Total UPZ: {diccionario_completo['metadata']['total_upz']}")
-print(f"   • Total Zonas: {diccionario_completo['metadata']['total_zonas']}")
-print(f"   • Variantes normalizadas: {len(barrio_a_upz)}")
 
-print("\n" + "="*80)
-print("✅ DICCIONARIO MAESTRO CREADO CON ÉXITO")
-print("="*80)
+if __name__ == "__main__":
+    main()
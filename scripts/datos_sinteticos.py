@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Respuestas sintéticas con la forma de las hojas de Google Forms
+Aprende un perfil de las salidas existentes:
+  - fact_actividades.csv: columnas de cada formulario (las que tienen algún
+    valor distinto del relleno del pipeline), su encabezado original y la
+    distribución de valores de cada una
+  - selección múltiple (Estrategia_Impactar, Linea_*): frecuencia de cada
+    opción y del número de opciones marcadas
+  - UPZ y Zona de forma conjunta
+  - barrios por UPZ: los observados más los del diccionario oficial
+Con ese perfil emite payloads `values` como los de spreadsheets.values.get
+para Formulario 1 y 2 de cualquier tamaño. Los payloads incluyen:
+  - filas recortadas (sin celdas vacías al final) y filas en blanco
+  - duplicados exactos
+  - variantes de encabezado y de escritura de direcciones
+
+ServicioSintetico imita service.spreadsheets().values().get(...).execute()
+para correr run_pipeline sin Google.
+
+Uso: python scripts/datos_sinteticos.py --filas 100000 [--salida sinteticos] [--semilla 0]
+     [--tasa-duplicados 0.01] [--tasa-vacias 0.005] [--sin-variantes]
+"""
+
+import argparse
+import ast
+import json
+import re
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+FACT_FILE = BASE_DIR / "fact_actividades.csv"
+DICT_BARRIOS = BASE_DIR / "scripts" / "diccionario_barrios_completo.json"
+RUN_PIPELINE = BASE_DIR / "run_pipeline.py"
+SALIDA_DIR = BASE_DIR / "sinteticos"
+
+# Hoja_Origen → nombre de la hoja en el spreadsheet
+HOJAS = {
+    'Formulario_1': 'Respuestas de formulario 1',
+    'Formulario_2': 'Respuestas de formulario 2',
+}
+
+# Columnas que agrega el pipeline (no vienen del formulario)
+DERIVADAS = {
+    'Hoja_Origen', 'UPZ_Enriquecida', 'Zona_Enriquecida', 'Estrategia', 'Barrio_Extraido',
+    'ID_Actividad', 'UPZ_Codigo', 'Zona_Codigo',
+    'upz_id', 'zona_id', 'estrategia_id', 'enfoque_id', 'estado_id', 'area_id', 'barrio_id',
+}
+
+# Valores con que rellenar_columnas_cruzadas completa las columnas ausentes
+RELLENOS = {'', 'N/A', 'No aplica', 'No especificado', 'Pendiente'}
+
+MULTISELECCION = ['Estrategia_Impactar', 'Linea_Seguridad', 'Linea_Convivencia', 'Linea_Justicia']
+SEPARADOR_OPCIONES = ', '
+
+TASA_DUPLICADOS = 0.01
+TASA_VACIAS = 0.005
+# Proporción de direcciones reescritas con otra ortografía
+TASA_VARIANTES_DIRECCION = 0.3
+
+# Reescrituras de direcciones (la primera regla que aplique, con una variante al azar)
+VARIANTES_DIRECCION = [
+    (re.compile(r'\bcalle\b', re.I), ['CL', 'Cll', 'calle', 'CALLE', 'Cl.']),
+    (re.compile(r'\bcarrera\b', re.I), ['KR', 'Cra', 'Kra', 'carrera', 'CRA.']),
+    (re.compile(r'\bdiagonal\b', re.I), ['DG', 'Dg', 'diagonal']),
+    (re.compile(r'\btransversal\b', re.I), ['TV', 'Tv', 'Transv']),
+    (re.compile(r'\bavenida\b', re.I), ['AV', 'Av.', 'avenida']),
+    (re.compile(r'\bsur\b', re.I), ['SUR', 'S', 'sur']),
+    (re.compile(r'\s*#\s*'), [' No. ', ' N° ', ' # ', ' no ']),
+]
+
+
+# =====================================================================
+# PERFIL
+# =====================================================================
+def mapeo_columnas(ruta=RUN_PIPELINE):
+    """COLUMN_MAPPING de run_pipeline.py (leído sin importar las librerías de Google)"""
+    arbol = ast.parse(Path(ruta).read_text(encoding='utf-8'))
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Assign) and any(getattr(t, 'id', None) == 'COLUMN_MAPPING' for t in nodo.targets):
+            return ast.literal_eval(nodo.value)
+    return {}
+
+
+def _distribucion(serie):
+    conteos = serie.value_counts()
+    return {'valores': conteos.index.tolist(), 'pesos': (conteos / conteos.sum()).tolist()}
+
+
+def _fecha_hoja(serie, con_hora):
+    """'2025-06-09 13:00:00' → '9/06/2025 13:00:00' (como la muestra Sheets)"""
+    fechas = pd.to_datetime(serie, errors='coerce')
+    texto = fechas.dt.day.astype('Int64').astype(str) + fechas.dt.strftime('/%m/%Y' + (' %H:%M:%S' if con_hora else ''))
+    return texto.where(fechas.notna(), serie)
+
+
+def _multiseleccion(serie):
+    """Opciones en orden de aparición, su frecuencia y la del número de marcadas"""
+    opciones, conteo_k = {}, {}
+    for celda, n in serie.value_counts().items():
+        marcadas = [o for o in celda.split(SEPARADOR_OPCIONES) if o] if celda else []
+        conteo_k[len(marcadas)] = conteo_k.get(len(marcadas), 0) + n
+        for opcion in marcadas:
+            opciones[opcion] = opciones.get(opcion, 0) + n
+    total_k = sum(conteo_k.values())
+    total_o = sum(opciones.values()) or 1
+    return {
+        'opciones': list(opciones), 'pesos': [c / total_o for c in opciones.values()],
+        'k': list(conteo_k), 'pesos_k': [c / total_k for c in conteo_k.values()],
+    }
+
+
+def _barrios(hoja, columna, codigo, barrios_por_upz):
+    """Tasa de llenado entre filas de la UPZ y barrios (observados + diccionario)"""
+    de_upz = hoja['UPZ'].str.startswith(f"{codigo} ")
+    observados = hoja.loc[de_upz, columna]
+    observados = observados[~observados.isin(RELLENOS)]
+    conteos = observados.value_counts().to_dict()
+
+    vistos = {b.upper() for b in conteos}
+    for nombre_upz, barrios in barrios_por_upz.items():
+        if nombre_upz.startswith(f"{codigo} "):
+            for barrio in barrios:
+                if barrio.upper() not in vistos:
+                    conteos[barrio] = 1
+    total = sum(conteos.values()) or 1
+    return {
+        'columna': columna,
+        'llenado': float(len(observados) / max(int(de_upz.sum()), 1)),
+        'valores': list(conteos), 'pesos': [c / total for c in conteos.values()],
+    }
+
+
+def aprender_perfil(fact_file=FACT_FILE, dict_barrios_file=DICT_BARRIOS):
+    """Perfil por formulario (serializable como JSON)"""
+    df = pd.read_csv(fact_file, sep=';', encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    with open(dict_barrios_file, 'r', encoding='utf-8') as f:
+        barrios_por_upz = json.load(f)['barrios_por_upz']
+
+    variantes = {}
+    for original, estandar in mapeo_columnas().items():
+        variantes.setdefault(estandar, []).append(original)
+
+    perfil = {}
+    for origen, hoja in df.groupby('Hoja_Origen', sort=True):
+        columnas = [c for c in df.columns if c not in DERIVADAS and not hoja[c].isin(RELLENOS).all()]
+        numeradas = origen == 'Formulario_1'
+
+        encabezados = {}
+        for col in columnas:
+            opciones = variantes.get(col, [col])
+            preferidas = [v for v in opciones if bool(re.match(r'\d', v)) == numeradas] or opciones
+            encabezados[col] = {'principal': preferidas[0], 'variantes': opciones}
+
+        marcas = pd.to_datetime(hoja['Marca_Temporal'], errors='coerce').dropna()
+        barrios = {}
+        distribuciones = {}
+        for col in columnas:
+            m = re.search(r'UPZ\s*(\d{2})', col)
+            if m and 'UPZ' in columnas:
+                barrios[m.group(1)] = _barrios(hoja, col, m.group(1), barrios_por_upz)
+            elif col in MULTISELECCION:
+                distribuciones[col] = {'tipo': 'multiple', **_multiseleccion(hoja[col])}
+            elif col == 'Fecha_Actividad':
+                distribuciones[col] = {'tipo': 'categorica', **_distribucion(_fecha_hoja(hoja[col], False))}
+            elif col not in ('Marca_Temporal', 'UPZ', 'Zona'):
+                distribuciones[col] = {'tipo': 'categorica', **_distribucion(hoja[col])}
+
+        territorio = [c for c in ('UPZ', 'Zona') if c in columnas]
+        pares = hoja[territorio].value_counts(normalize=True) if territorio else pd.Series(dtype=float)
+
+        perfil[origen] = {
+            'filas': len(hoja),
+            'columnas': columnas,
+            'encabezados': encabezados,
+            'marca_temporal': [int(marcas.min().timestamp()), int(marcas.max().timestamp())],
+            'territorio': {
+                'columnas': territorio,
+                'valores': [list(p) for p in pares.index],
+                'pesos': pares.tolist(),
+            },
+            'barrios': barrios,
+            'distribuciones': distribuciones,
+        }
+    return perfil
+
+
+# =====================================================================
+# GENERACIÓN
+# =====================================================================
+def _elegir(rng, valores, pesos, n):
+    pesos = np.asarray(pesos, dtype=float)
+    indices = rng.choice(len(valores), size=n, p=pesos / pesos.sum())
+    return np.asarray(valores, dtype=object)[indices]
+
+
+def _generar_multiple(rng, dist, n):
+    """k opciones distintas por fila (Gumbel top-k), unidas en el orden del formulario"""
+    opciones = np.asarray(dist['opciones'], dtype=object)
+    salida = np.full(n, '', dtype=object)
+    ks = _elegir(rng, dist['k'], dist['pesos_k'], n).astype(int)
+    log_pesos = np.log(np.asarray(dist['pesos'], dtype=float))
+    for k in np.unique(ks):
+        filas = np.flatnonzero(ks == k)
+        if k == 0 or not len(opciones):
+            continue
+        k = min(k, len(opciones))
+        claves = rng.gumbel(size=(len(filas), len(opciones))) + log_pesos
+        elegidas = np.sort(np.argpartition(-claves, k - 1, axis=1)[:, :k], axis=1)
+        salida[filas] = [SEPARADOR_OPCIONES.join(opciones[e]) for e in elegidas]
+    return salida
+
+
+def variar_direccion(direccion, rng):
+    """Otra ortografía de la misma dirección (abreviaturas, numeral, mayúsculas)"""
+    for patron, variantes in VARIANTES_DIRECCION:
+        if patron.search(direccion):
+            direccion = patron.sub(variantes[rng.integers(len(variantes))], direccion, count=1)
+            break
+    sorteo = rng.random()
+    if sorteo < 0.2:
+        return direccion.upper()
+    if sorteo < 0.3:
+        return direccion.lower()
+    if sorteo < 0.4:
+        return direccion.replace(' ', '  ', 1) + ' '
+    return direccion
+
+
+def _marcas_temporales(rng, rango, n):
+    segundos = np.sort(rng.integers(rango[0], rango[1] + 1, size=n))
+    fechas = pd.Series(pd.to_datetime(segundos, unit='s'))
+    return (fechas.dt.day.astype(str) + fechas.dt.strftime('/%m/%Y %H:%M:%S')).to_numpy(dtype=object)
+
+
+def _encabezado(rng, perfil_hoja, variar):
+    encabezado = []
+    for col in perfil_hoja['columnas']:
+        info = perfil_hoja['encabezados'][col]
+        nombre = info['principal']
+        if variar and rng.random() < 0.5:
+            nombre = info['variantes'][rng.integers(len(info['variantes']))]
+        if variar and rng.random() < 0.1:
+            nombre += ' '
+        encabezado.append(nombre if nombre not in encabezado else info['principal'])
+    return encabezado
+
+
+def generar_hoja(perfil_hoja, filas, rng, tasa_duplicados=TASA_DUPLICADOS, tasa_vacias=TASA_VACIAS,
+                 variar=True):
+    """Payload `values` (encabezado + filas) de una hoja con `filas` filas"""
+    vacias = rng.random(filas) < tasa_vacias
+    n = int((~vacias).sum())
+
+    datos = {'Marca_Temporal': _marcas_temporales(rng, perfil_hoja['marca_temporal'], n)}
+    for col, dist in perfil_hoja['distribuciones'].items():
+        if dist['tipo'] == 'multiple':
+            datos[col] = _generar_multiple(rng, dist, n)
+        else:
+            datos[col] = _elegir(rng, dist['valores'], dist['pesos'], n)
+
+    territorio = perfil_hoja['territorio']
+    if territorio['columnas']:
+        pares = _elegir(rng, list(range(len(territorio['valores']))), territorio['pesos'], n).astype(int)
+        valores = np.asarray(territorio['valores'], dtype=object)
+        for j, col in enumerate(territorio['columnas']):
+            datos[col] = valores[pares, j]
+
+    for codigo, info in perfil_hoja['barrios'].items():
+        columna = np.full(n, '', dtype=object)
+        con_barrio = np.flatnonzero(
+            pd.Series(datos['UPZ']).str.startswith(f"{codigo} ").to_numpy() & (rng.random(n) < info['llenado'])
+        )
+        columna[con_barrio] = _elegir(rng, info['valores'], info['pesos'], len(con_barrio))
+        datos[info['columna']] = columna
+
+    if 'Direccion_Actividad' in datos:
+        direcciones = datos['Direccion_Actividad']
+        for i in np.flatnonzero(rng.random(n) < TASA_VARIANTES_DIRECCION):
+            direcciones[i] = variar_direccion(direcciones[i], rng)
+
+    filas_datos = np.column_stack([datos[c] for c in perfil_hoja['columnas']]).tolist() if n else []
+
+    # Duplicados exactos de una respuesta anterior (reenvíos del formulario)
+    for i in np.flatnonzero(rng.random(n) < tasa_duplicados):
+        if i:
+            filas_datos[i] = list(filas_datos[rng.integers(i)])
+
+    # Como la API: sin celdas vacías al final de cada fila
+    for fila in filas_datos:
+        while fila and fila[-1] == '':
+            fila.pop()
+
+    valores = [_encabezado(rng, perfil_hoja, variar)]
+    siguiente = iter(filas_datos)
+    for vacia in vacias:
+        valores.append([] if vacia else next(siguiente))
+    return valores
+
+
+def generar_payloads(perfil, filas, semilla=0, **opciones):
+    """{nombre de hoja: values}; las filas se reparten según la proporción real"""
+    rng = np.random.default_rng(semilla)
+    total = sum(p['filas'] for p in perfil.values())
+    payloads = {}
+    restantes = filas
+    for i, (origen, perfil_hoja) in enumerate(perfil.items()):
+        n = restantes if i == len(perfil) - 1 else round(filas * perfil_hoja['filas'] / total)
+        restantes -= n
+        payloads[HOJAS.get(origen, origen)] = generar_hoja(perfil_hoja, n, rng, **opciones)
+    return payloads
+
+
+# =====================================================================
+# SERVICIO LOCAL
+# =====================================================================
+def _numero_columna(letras):
+    numero = 0
+    for letra in letras:
+        numero = numero * 26 + ord(letra) - ord('A') + 1
+    return numero
+
+
+def _limites_rango(rango):
+    """'Hoja!A2:AD5001' → (primera fila, última fila, columnas); None donde no limita"""
+    m = re.search(r'![A-Z]+(\d*):([A-Z]+)(\d*)$', rango)
+    if not m:
+        return None, None, None
+    return int(m.group(1) or 1), int(m.group(3)) if m.group(3) else None, _numero_columna(m.group(2))
+
+
+class ServicioSintetico:
+    """
+    Imita service.spreadsheets().values().get(spreadsheetId, range).execute(),
+    con rangos de columnas ('A:AD') y de filas ('A2:AD5001')
+    """
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId=None, range=''):
+        hoja = range.split('!')[0].strip("'")
+        primera, ultima, columnas = _limites_rango(range)
+        valores = self.payloads.get(hoja, [])[(primera or 1) - 1:ultima]
+        if columnas is not None:
+            valores = [fila[:columnas] for fila in valores]
+        # Como la API: sin filas vacías al final y sin 'values' si no hay datos
+        while valores and not any(valores[-1]):
+            valores = valores[:-1]
+        respuesta = {'range': range, 'majorDimension': 'ROWS'}
+        if valores:
+            respuesta['values'] = valores
+        return SimpleNamespace(execute=lambda: respuesta)
+
+
+def cargar_servicio(directorio=SALIDA_DIR):
+    """ServicioSintetico con los payloads guardados por este script"""
+    payloads = {}
+    for ruta in sorted(Path(directorio).glob('*.json')):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            contenido = json.load(f)
+        payloads[contenido['hoja']] = contenido['values']
+    return ServicioSintetico(payloads)
+
+
+def guardar_payloads(payloads, directorio=SALIDA_DIR):
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    rutas = []
+    for hoja, valores in payloads.items():
+        ruta = directorio / f"{hoja.lower().replace(' ', '_')}.json"
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({'hoja': hoja, 'majorDimension': 'ROWS', 'values': valores}, f, ensure_ascii=False)
+        rutas.append(ruta)
+    return rutas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filas', type=int, default=100_000, help='Filas en total (ambos formularios)')
+    parser.add_argument('--salida', type=Path, default=SALIDA_DIR)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--tasa-duplicados', type=float, default=TASA_DUPLICADOS)
+    parser.add_argument('--tasa-vacias', type=float, default=TASA_VACIAS)
+    parser.add_argument('--sin-variantes', action='store_true', help='Encabezados fijos por formulario')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print(f"🧪 GENERANDO RESPUESTAS SINTÉTICAS ({args.filas:,} filas)")
+    print("="*80)
+
+    inicio = time.perf_counter()
+    perfil = aprender_perfil()
+    for origen, p in perfil.items():
+        print(f"   📋 {origen}: {len(p['columnas'])} columnas, {p['filas']} filas reales")
+
+    payloads = generar_payloads(
+        perfil, args.filas, args.semilla,
+        tasa_duplicados=args.tasa_duplicados, tasa_vacias=args.tasa_vacias, variar=not args.sin_variantes,
+    )
+    for ruta in guardar_payloads(payloads, args.salida):
+        print(f"   💾 {ruta}")
+    print(f"\n✅ Generado en {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,125 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
-def deduplicar_agendamiento(df: pd.DataFrame) -> pd.DataFrame:
+from normalizar_direcciones import canonizar_direcciones
+
+COLUMNAS_CLAVE = [
+    "1. Nombre de la actividad",
+    "7. Dirección donde se realiza la actividad",
+    "10. Fecha de la actividad",
+    "11. Hora de inicio"
+]
+
+COLUMNA_MARCA = "Marca temporal"
+
+
+def _filas_iguales(a: pd.DataFrame, b: pd.DataFrame) -> np.ndarray:
+    """Compara dos tablas fila a fila (nulo == nulo)"""
+    iguales = np.ones(len(a), dtype=bool)
+    for col in a.columns:
+        x, y = a[col].to_numpy(dtype=object), b[col].to_numpy(dtype=object)
+        iguales &= (x == y) | (pd.isna(x) & pd.isna(y))
+    return iguales
+
+
+def agrupar_por_llave(llave: pd.DataFrame) -> np.ndarray:
+    """
+    Asigna un número de grupo a cada fila según su llave compuesta.
+
+    La llave se resume columna a columna en un hash de 64 bits
+    (pd.util.hash_pandas_object). Luego se verifica que todas las filas de un
+    mismo hash tengan la misma llave; si hay colisión se agrupa por los
+    valores exactos.
+    """
+    hashes = pd.util.hash_pandas_object(llave, index=False).to_numpy()
+    grupos, unicos = pd.factorize(hashes)
+
+    # Primera fila de cada grupo (factorize numera en orden de aparición)
+    primera = np.empty(len(unicos), dtype=np.int64)
+    primera[grupos[::-1]] = np.arange(len(grupos))[::-1]
+    representante = llave.iloc[primera[grupos]]
+
+    if not _filas_iguales(llave, representante).all():
+        print("⚠️  Colisión de hash en la llave de deduplicación: se agrupa por valores exactos")
+        grupos = llave.groupby(list(llave.columns), dropna=False, sort=False).ngroup().to_numpy()
+
+    return grupos
+
+
+def deduplicar_agendamiento(df: pd.DataFrame, auditoria: bool = False):
     """
     Deduplica actividades de agendamiento usando una llave compuesta inteligente.
     La llave evita que actividades idénticas aparezcan duplicadas.
 
     Llave de deduplicación:
     - Nombre de la actividad
-    - Dirección donde se realiza la actividad
+    - Dirección donde se realiza la actividad (clave canónica)
     - Fecha de la actividad
     - Hora de inicio
 
     Si existen duplicados:
-    → Conserva la fila más nueva según 'Marca temporal'
-    """
+    → Conserva la fila más nueva según 'Marca temporal' (en empate, la primera)
 
-    columnas_clave = [
-        "1. Nombre de la actividad",
-        "7. Dirección donde se realiza la actividad",
-        "10. Fecha de la actividad",
-        "11. Hora de inicio"
-    ]
+    Las filas conservadas mantienen su orden original. Con auditoria=True
+    retorna además una tabla con una fila por llave duplicada.
+    """
 
     # Validación: asegurar que las columnas existen
-    for col in columnas_clave + ["Marca temporal"]:
+    for col in COLUMNAS_CLAVE + [COLUMNA_MARCA]:
         if col not in df.columns:
             raise ValueError(f"Falta la columna requerida para deduplicar: {col}")
 
-    # Marcar duplicados
-    df["_llave"] = (
-        df[columnas_clave]
-        .astype(str)
-        .apply(lambda x: "||".join(x), axis=1)
-    )
+    # Llave compuesta (la dirección se compara por su clave canónica)
+    llave = df[COLUMNAS_CLAVE].copy()
+    col_direccion = "7. Dirección donde se realiza la actividad"
+    llave[col_direccion] = canonizar_direcciones(llave[col_direccion])["Direccion_Canonica"]
+    grupos = agrupar_por_llave(llave)
+
+    # Marca temporal a datetime; sin fecha = la más antigua
+    df = df.copy()
+    df[COLUMNA_MARCA] = pd.to_datetime(df[COLUMNA_MARCA], errors="coerce")
+    marca = df[COLUMNA_MARCA].fillna(pd.Timestamp.min).reset_index(drop=True)
 
-    # Convertir marca temporal a datetime para ordenar
-    df["Marca temporal"] = pd.to_datetime(df["Marca temporal"], errors="coerce")
+    # Fila más reciente por grupo: un solo groupby lineal, sin ordenar el frame
+    conservadas = np.sort(marca.groupby(grupos, sort=False).idxmax().to_numpy())
+    df_sin_duplicados = df.iloc[conservadas]
 
-    # Ordenar de más reciente → menos reciente
-    df = df.sort_values(by="Marca temporal", ascending=False)
+    if not auditoria:
+        return df_sin_duplicados
+
+    return df_sin_duplicados, tabla_auditoria(df, llave, grupos, conservadas)
+
+
+def tabla_auditoria(df: pd.DataFrame, llave: pd.DataFrame, grupos: np.ndarray,
+                    conservadas: np.ndarray) -> pd.DataFrame:
+    """
+    Una fila por llave con duplicados: valores de la llave, cantidad de filas,
+    fila conservada (índice original), su marca temporal y filas descartadas.
+    """
+    tamanos = np.bincount(grupos)
+    duplicada = tamanos[grupos] > 1
+    if not duplicada.any():
+        return pd.DataFrame(columns=COLUMNAS_CLAVE + [
+            "Filas", "Fila_Conservada", "Marca_Conservada", "Filas_Descartadas"
+        ])
 
-    # Eliminar duplicados dejando solo el más reciente
-    df_sin_duplicados = df.drop_duplicates(subset="_llave", keep="first")
+    conservada_por_grupo = np.empty(len(tamanos), dtype=np.int64)
+    conservada_por_grupo[grupos[conservadas]] = conservadas
 
-    # Limpiar columnas auxiliares
-    df_sin_duplicados = df_sin_duplicados.drop(columns=["_llave"])
+    posiciones = np.flatnonzero(duplicada)
+    etiquetas = df.index.to_numpy()
+    descartes = pd.Series(etiquetas[posiciones].astype(str), index=grupos[posiciones])
+    descartes = descartes[posiciones != conservada_por_grupo[grupos[posiciones]]]
+    descartadas = descartes.groupby(level=0, sort=False).agg(", ".join)
 
-    return df_sin_duplicados
+    filas_grupo = conservada_por_grupo[descartadas.index.to_numpy()]
+    auditoria = llave.iloc[filas_grupo].reset_index(drop=True)
+    auditoria["Filas"] = tamanos[descartadas.index.to_numpy()]
+    auditoria["Fila_Conservada"] = etiquetas[filas_grupo]
+    auditoria["Marca_Conservada"] = df[COLUMNA_MARCA].iloc[filas_grupo].to_numpy()
+    auditoria["Filas_Descartadas"] = descartadas.to_numpy()
+    return auditoria
 
 
 if __name__ == "__main__":
@@ -2,58 +2,80 @@
 # -*- coding: utf-8 -*-
 """
 Enriquece fact_actividades con barrios extraídos desde direcciones
-Usa 4 métodos de extracción + validación Zona-UPZ
+Usa 5 métodos de extracción + validación Zona-UPZ
 VERSIÓN 2: Corrige TODAS las zonas duplicadas
 """
 
+import argparse
 import pandas as pd
-import json
 import re
+import time
 from pathlib import Path
-from difflib import get_close_matches
+
+from indice_segmentos import indice_vacio, actualizar_indice, buscar_barrio
+from normalizar_direcciones import canonizar_direcciones
+from validacion_zona_upz import construir_motor, validar, CONFLICTO
+from nomenclator import cargar_nomenclator, buscar_exacto, buscar_aproximado
+from codigos_territoriales import codificar_upz
+from instrumentacion import nueva_medicion, registrar_metodo, registrar_direccion, guardar_reporte, imprimir_resumen
+from perfilado import agregar_argumentos, sesion_desde_args, perfil, imprimir_sesion
 
 # Rutas
 BASE_DIR = Path(__file__).resolve().parents[1]
 DICT_FILE = BASE_DIR / "scripts" / "diccionario_barrios_completo.json"
 FACT_FILE = BASE_DIR / "fact_actividades_limpio_fixed.csv"
 OUTPUT_FILE = BASE_DIR / "dimensiones" / "fact_actividades_enriquecido.csv"
+METRICAS_FILE = BASE_DIR / "dimensiones" / "metricas_extraccion_barrios.json"
+
+# Recursos compartidos por los métodos de extracción (cargar_recursos)
+nomenclator = None
+barrio_a_upz = barrio_a_zonas = None
+zona_por_defecto_upz = zona_por_llave = None
 
-print("\n" + "="*80)
-print("🔍 ENRIQUECIENDO ACTIVIDADES CON BARRIOS V2")
-print("="*80)
+# Índice de tramos de la ejecución en curso (lo reconstruye extraer_barrios)
+indice_segmentos = indice_vacio()
 
 # =====================================================================
 # CARGAR DATOS CON MANEJO ROBUSTO DE CSV
 # =====================================================================
-print("\n📥 Cargando datos...")
-
-# Cargar fact_actividades con manejo robusto de comillas y delimitadores
-try:
-    df = pd.read_csv(
-        FACT_FILE, 
-        encoding='utf-8',
-        sep=';',
-        quotechar='"',
-        escapechar='\\',
-        on_bad_lines='warn',
-        low_memory=False
-    )
-    print(f"✅ Actividades cargadas: {len(df)} registros")
-except Exception as e:
-    print(f"⚠️  Error al cargar CSV: {e}")
-    print("🔧 Intentando con parámetros alternativos...")
-    df = pd.read_csv(FACT_FILE, encoding='utf-8', sep=';', engine='python')
-    print(f"✅ Actividades cargadas: {len(df)} registros")
-
-# Cargar diccionario
-with open(DICT_FILE, 'r', encoding='utf-8') as f:
-    diccionario = json.load(f)
-
-barrio_a_upz = diccionario['barrio_a_upz']
-barrio_a_zonas = diccionario['barrio_a_zonas']
-barrios_conocidos = list(barrio_a_upz.keys())
-
-print(f"✅ Diccionario cargado: {len(barrios_conocidos)} barrios")
+def leer_actividades(ruta=FACT_FILE):
+    """Carga fact_actividades con manejo robusto de comillas y delimitadores"""
+    try:
+        df = pd.read_csv(
+            ruta, 
+            encoding='utf-8',
+            sep=';',
+            quotechar='"',
+            escapechar='\\',
+            on_bad_lines='warn',
+            low_memory=False
+        )
+        print(f"✅ Actividades cargadas: {len(df)} registros")
+    except Exception as e:
+        print(f"⚠️  Error al cargar CSV: {e}")
+        print("🔧 Intentando con parámetros alternativos...")
+        df = pd.read_csv(ruta, encoding='utf-8', sep=';', engine='python')
+        print(f"✅ Actividades cargadas: {len(df)} registros")
+    return df
+
+
+def cargar_recursos():
+    """Nomenclátor compilado (una vez por proceso)"""
+    global nomenclator, barrio_a_upz, barrio_a_zonas, zona_por_defecto_upz, zona_por_llave
+    if nomenclator is not None:
+        return
+
+    # Cargar nomenclátor compilado (se recompila solo si cambió el diccionario)
+    nomenclator = cargar_nomenclator(DICT_FILE)
+
+    barrio_a_upz = nomenclator['barrio_a_upz']
+    barrio_a_zonas = nomenclator['barrio_a_zonas']
+
+    # Tabla compilada (UPZ, barrio) → zona, con llaves 'codigo|barrio'
+    zona_por_defecto_upz = nomenclator['zona_por_defecto_upz']
+    zona_por_llave = nomenclator['zona_por_llave']
+
+    print(f"✅ Diccionario cargado: {len(nomenclator['nombres'])} barrios")
 
 # =====================================================================
 # FUNCIONES DE EXTRACCIÓN
@@ -69,282 +91,141 @@ def normalizar(texto):
                     if unicodedata.category(c) != 'Mn')
     return texto.lower().strip()
 
+# Patrones de barrio explícito (BARRIO X, BRR. X, B. X)
+PATRONES_BARRIO = [
+    r'barrio\s+([a-z\s]+?)(?:\s+calle|\s+carrera|\s+diagonal|\s+transversal|$)',
+    r'brr\.?\s+([a-z\s]+?)(?:\s+calle|\s+carrera|\s+diagonal|\s+transversal|$)',
+    r'b\.?\s+([a-z\s]+?)(?:\s+calle|\s+carrera|\s+diagonal|\s+transversal|$)',
+]
+
+
+def _metodo_exacto(direccion, direccion_norm):
+    """Búsqueda exacta (autómata del nomenclátor)"""
+    return buscar_exacto(nomenclator, direccion_norm), None
+
+
+def _metodo_patron(direccion, direccion_norm):
+    for patron in PATRONES_BARRIO:
+        match = re.search(patron, direccion_norm)
+        if match:
+            barrio = buscar_aproximado(nomenclator, match.group(1).strip(), cutoff=0.80)
+            if barrio:
+                return barrio, None
+    return None, None
+
+
+def _metodo_aproximado(direccion, direccion_norm):
+    """Fuzzy 85%+ sobre cada palabra de 4+ letras"""
+    for palabra in re.findall(r'\b[a-z]{4,}\b', direccion_norm):
+        barrio = buscar_aproximado(nomenclator, palabra, cutoff=0.85)
+        if barrio:
+            return barrio, None
+    return None, None
+
+
+def _metodo_compuesto(direccion, direccion_norm):
+    """2+ palabras coincidentes de un barrio compuesto"""
+    for barrio, palabras_barrio in nomenclator['compuestos']:
+        coincidencias = sum(1 for p in palabras_barrio if p in direccion_norm)
+        if coincidencias >= 2:
+            return barrio, None
+    return None, None
+
+
+def _metodo_segmento(direccion, direccion_norm):
+    """Tramo de vía aprendido (índice de segmentos)"""
+    return buscar_barrio(indice_segmentos, direccion)
+
+
+# Cascada en orden de precisión: el primer método que resuelve gana
+METODOS_EXTRACCION = [
+    ('Exacto', _metodo_exacto),
+    ('Patron', _metodo_patron),
+    ('Aproximado', _metodo_aproximado),
+    ('Compuesto', _metodo_compuesto),
+]
+
+# Último recurso, en una segunda pasada: usa el índice de tramos construido
+# con las resoluciones Exacto/Patron de la misma ejecución
+METODO_SEGMENTO = ('Segmento', _metodo_segmento)
+
+# Latencia y aciertos por método (reporte JSON al final; se reinicia por ejecución)
+medicion_extraccion = nueva_medicion([metodo for metodo, _ in METODOS_EXTRACCION + [METODO_SEGMENTO]])
+
+
+def _resultado(barrio, upz_metodo, metodo):
+    return barrio, barrio_a_upz.get(barrio) or upz_metodo, barrio_a_zonas.get(barrio, []), metodo
+
+
+def elegir_resultado(votos):
+    """
+    Resultado de un lugar entre sus escrituras: {(barrio, metodo): [filas,
+    resultado]}. Gana el de más filas; a igualdad, el método más preciso de
+    la cascada y luego el barrio en orden alfabético.
+    """
+    if not votos:
+        return None, None, None, None
+    orden = {metodo: i for i, (metodo, _) in enumerate(METODOS_EXTRACCION)}
+    (barrio, metodo), (_, resultado) = min(
+        votos.items(), key=lambda item: (-item[1][0], orden[item[0][1]], item[0][0])
+    )
+    return resultado
+
+
 def extraer_barrio(direccion):
     """
-    Extrae barrio usando 4 métodos:
+    Extrae barrio usando 4 métodos (el 5.º, Segmento, lo aplica
+    extraer_barrios a las direcciones que quedan sin resolver):
     1. Exacto
     2. Patrón (BARRIO X, BRR. X, B. X)
     3. Aproximado (fuzzy 85%+)
     4. Compuesto (2+ palabras)
     
+    Cada método se cronometra en medicion_extraccion.
     Retorna: (barrio, upz, zonas_lista, metodo)
     """
     if pd.isna(direccion) or str(direccion).strip() == "":
         return None, None, None, None
     
+    inicio = time.perf_counter()
     direccion_norm = normalizar(direccion)
+    resultado = (None, None, None, None)
     
-    # MÉTODO 1: Búsqueda exacta
-    for barrio in barrios_conocidos:
-        if barrio in direccion_norm:
-            upz = barrio_a_upz.get(barrio)
-            zonas = barrio_a_zonas.get(barrio, [])
-            return barrio, upz, zonas, 'Exacto'
-    
-    # MÉTODO 2: Patrones comunes
-    patrones = [
-        r'barrio\s+([a-z\s]+?)(?:\s+calle|\s+carrera|\s+diagonal|\s+transversal|$)',
-        r'brr\.?\s+([a-z\s]+?)(?:\s+calle|\s+carrera|\s+diagonal|\s+transversal|$)',
-        r'b\.?\s+([a-z\s]+?)(?:\s+calle|\s+carrera|\s+diagonal|\s+transversal|$)',
-    ]
-    
-    for patron in patrones:
-        match = re.search(patron, direccion_norm)
-        if match:
-            barrio_extraido = match.group(1).strip()
-            matches = get_close_matches(barrio_extraido, barrios_conocidos, n=1, cutoff=0.80)
-            if matches:
-                barrio = matches[0]
-                upz = barrio_a_upz.get(barrio)
-                zonas = barrio_a_zonas.get(barrio, [])
-                return barrio, upz, zonas, 'Patron'
-    
-    # MÉTODO 3: Aproximado (fuzzy)
-    palabras = re.findall(r'\b[a-z]{4,}\b', direccion_norm)
-    for palabra in palabras:
-        matches = get_close_matches(palabra, barrios_conocidos, n=1, cutoff=0.85)
-        if matches:
-            barrio = matches[0]
-            upz = barrio_a_upz.get(barrio)
-            zonas = barrio_a_zonas.get(barrio, [])
-            return barrio, upz, zonas, 'Aproximado'
-    
-    # MÉTODO 4: Compuesto (2+ palabras coincidentes)
-    for barrio in barrios_conocidos:
-        palabras_barrio = barrio.split()
-        if len(palabras_barrio) >= 2:
-            coincidencias = sum(1 for p in palabras_barrio if p in direccion_norm)
-            if coincidencias >= 2:
-                upz = barrio_a_upz.get(barrio)
-                zonas = barrio_a_zonas.get(barrio, [])
-                return barrio, upz, zonas, 'Compuesto'
+    for metodo, buscar in METODOS_EXTRACCION:
+        t0 = time.perf_counter()
+        barrio, upz_metodo = buscar(direccion, direccion_norm)
+        registrar_metodo(medicion_extraccion, metodo, time.perf_counter() - t0, bool(barrio))
+        if barrio:
+            resultado = _resultado(barrio, upz_metodo, metodo)
+            break
     
-    return None, None, None, None
+    registrar_direccion(medicion_extraccion, direccion, time.perf_counter() - inicio, resultado[3])
+    return resultado
 
 
-def seleccionar_zona_correcta(barrio, upz, zonas_posibles):
+def seleccionar_zonas_correctas(barrios, upzs, zonas_actuales):
     """
-    Selecciona la zona correcta cuando un barrio está en múltiples zonas.
-    Usa el UPZ y el nombre del barrio para determinar la zona precisa.
+    Selecciona la zona correcta para filas cuyo barrio/UPZ cae en varias zonas.
+    Usa la tabla compilada (UPZ, barrio) → zona de crear_diccionario_barrios.py:
+    un solo map sobre todas las filas en lugar de ramificar fila por fila.
     """
-    if not zonas_posibles:
-        return None
-    
-    # Si solo hay una zona, devolver esa
-    if len(zonas_posibles) == 1:
-        return zonas_posibles[0].upper()
-    
-    # Normalizar UPZ
-    upz_norm = normalizar(upz) if upz else ""
-    barrio_norm = normalizar(barrio) if barrio else ""
-    
-    # Mapeo específico UPZ 32 (SAN BLAS) - Zona 1 vs Zona 2
-    if "32" in upz_norm or "san blas" in upz_norm:
-        barrios_zona1 = {
-            'aguas claras', 'amapolas', 'amapolas ii sector', 'buenavista suroriental',
-            'corinto', 'el balcon de la castana', 'el futuro', 'el ramajal', 
-            'la castana', 'la cecilia', 'la gran colombia', 'la sagrada familia',
-            'las acacias', 'las mercedes', 'los alpes', 'los laureles sur oriental i sector',
-            'los laureles sur oriental ii sector', 'macarena de los alpes', 'manila',
-            'montecarlo', 'nueva espana', 'ramajal', 'san blas', 'san blas ii sector',
-            'san cristobal alto', 'triangulo alto', 'vitelma'
-        }
-        if barrio_norm in barrios_zona1:
-            return "ZONA 1"
-        else:
-            return "ZONA 2"
-    
-    # Mapeo específico UPZ 50 (LA GLORIA) - Zona 3 vs Zona 8
-    elif "50" in upz_norm or "la gloria" in upz_norm:
-        barrios_zona3 = {
-            'altamira chiquita', 'altamira sector san jose', 'bellavista sur oriental',
-            'el poblado', 'la arboleda', 'la gloria', 'la grovana', 'la nueva gloria',
-            'los alpes del zipa', 'los altos del zuque', 'los puentes', 'miraflores',
-            'moralva', 'panorama', 'puente colorado', 'quindio', 'quindio ii sector',
-            'san jose oriental', 'villa anita sur oriental'
-        }
-        if barrio_norm in barrios_zona3:
-            return "ZONA 3"
-        else:
-            return "ZONA 8"
-    
-    # Mapeo específico UPZ 51 (LOS LIBERTADORES) - Zona 5 vs Zona 7
-    elif "51" in upz_norm or "los libertadores" in upz_norm:
-        barrios_zona5 = {
-            'bosque de san jose', 'ciudad de londres', 'juan rey', 'juan rey ii',
-            'la arboleda', 'la belleza', 'la nueva gloria', 'la nueva gloria ii sector',
-            'los libertadores', 'los libertadores bosque diamante triangulo',
-            'los libertadores sector el tesoro', 'los libertadores sector la colina',
-            'los libertadores sector san ignacio', 'los libertadores sector san isidro',
-            'los libertadores sector san jose', 'los libertadores sector san luis',
-            'los libertadores sector san miguel', 'los pinos', 'nueva delly',
-            'nueva delly parte alta', 'republica del canada el pinar', 'san manuel',
-            'san rafael sur oriental', 'sierras del sur oriente', 'valparaiso',
-            'villa aurora', 'villa begonia'
-        }
-        if barrio_norm in barrios_zona5:
-            return "ZONA 5"
-        else:
-            return "ZONA 7"
-    
-    # UPZ sin ambigüedad
-    elif "33" in upz_norm or "sosiego" in upz_norm:
-        return "ZONA 6"
-    elif "34" in upz_norm or "20 de julio" in upz_norm:
-        return "ZONA 4"
-    
-    # Por defecto, tomar la primera zona disponible
-    return zonas_posibles[0].upper() if zonas_posibles else None
-
-def validar_zona_upz(zona, upz):
-    """Valida consistencia Zona-UPZ"""
-    upz_zonas_validas = {
-        "32 - san blas": ["zona 1", "zona 2"],
-        "33 - sosiego": ["zona 6"],
-        "34 - 20 de julio": ["zona 4"],
-        "50 - la gloria": ["zona 3", "zona 8"],
-        "51 - los libertadores": ["zona 5", "zona 7"]
-    }
-    
-    if pd.isna(zona) or pd.isna(upz):
-        return True, None
-    
-    zona_norm = normalizar(zona)
-    upz_norm = normalizar(upz)
-    
-    if upz_norm in upz_zonas_validas:
-        zonas_esperadas = upz_zonas_validas[upz_norm]
-        if zona_norm in zonas_esperadas:
-            return True, None
-        else:
-            return False, f"Inconsistencia: {zona} no corresponde con {upz}"
-    
-    return True, None
-
-# =====================================================================
-# APLICAR EXTRACCIÓN
-# =====================================================================
-print("\n🔍 Extrayendo barrios de direcciones...")
-
-# Crear columnas nuevas
-df['Barrio_Extraido'] = None
-df['UPZ_Enriquecida'] = df['Nombre_UPZ']
-df['Zona_Enriquecida'] = df['Zona']
-df['Zonas_Posibles'] = None
-df['Metodo_Extraccion'] = None
-df['Validacion_Zona_UPZ'] = None
-df['Observaciones'] = None
-
-extracciones_exitosas = 0
-upz_completadas = 0
-zona_completadas = 0
-
-for idx, row in df.iterrows():
-    direccion = row['Direccion_Actividad']
-    
-    # Extraer barrio
-    barrio, upz_ext, zonas_ext, metodo = extraer_barrio(direccion)
-    
-    if barrio:
-        df.at[idx, 'Barrio_Extraido'] = barrio.title()
-        df.at[idx, 'Metodo_Extraccion'] = metodo
-        extracciones_exitosas += 1
-        
-        # Guardar zonas posibles
-        if zonas_ext:
-            df.at[idx, 'Zonas_Posibles'] = ', '.join(zonas_ext)
-        
-        # Completar UPZ si está vacía
-        upz_actual = row['Nombre_UPZ']
-        if pd.isna(upz_actual) or str(upz_actual).strip() == "":
-            df.at[idx, 'UPZ_Enriquecida'] = upz_ext
-            upz_completadas += 1
-
-# =====================================================================
-# CORRECCIÓN MASIVA DE ZONAS DUPLICADAS (TODOS LOS REGISTROS)
-# =====================================================================
-print("\n🔧 Corrigiendo todas las zonas duplicadas...")
-
-zonas_corregidas = 0
-
-for idx, row in df.iterrows():
-    zona_actual = row['Zona_Enriquecida']
-    upz_enriquecida = row['UPZ_Enriquecida']
-    barrio = row['Barrio_Extraido']
-    
-    # Si la zona tiene coma (duplicada)
-    if pd.notna(zona_actual) and ',' in str(zona_actual):
-        # Parsear las zonas
-        zonas_duplicadas = [z.strip() for z in str(zona_actual).split(',')]
-        
-        # Corregir usando UPZ + Barrio (si existe)
-        zona_corregida = seleccionar_zona_correcta(barrio, upz_enriquecida, zonas_duplicadas)
-        
-        if zona_corregida:
-            df.at[idx, 'Zona_Enriquecida'] = zona_corregida
-            if barrio:
-                df.at[idx, 'Observaciones'] = f"Zona duplicada corregida con barrio: {zona_actual} → {zona_corregida}"
-            else:
-                df.at[idx, 'Observaciones'] = f"Zona duplicada corregida con UPZ: {zona_actual} → {zona_corregida}"
-            zonas_corregidas += 1
-            zona_completadas += 1
-
-print(f"✅ Zonas duplicadas corregidas: {zonas_corregidas}")
-
-# =====================================================================
-# VALIDACIÓN ZONA-UPZ
-# =====================================================================
-print("\n🔍 Validando consistencia Zona-UPZ...")
+    zonas_listas = zonas_actuales.astype(str).str.split(',')
+    primera_zona = zonas_listas.str[0].str.strip().str.upper()
 
-inconsistencias = 0
+    # Código canónico de UPZ (int8); las llaves de la tabla usan el número como texto
+    cod_upz = pd.Series(codificar_upz(upzs), index=upzs.index)
+    codigos = cod_upz.astype(str).where(cod_upz >= 0)
+    barrios_norm = barrios.map({b: normalizar(b) for b in barrios.dropna().unique()})
 
-for idx, row in df.iterrows():
-    zona_final = df.at[idx, 'Zona_Enriquecida']
-    upz_final = df.at[idx, 'UPZ_Enriquecida']
-    
-    es_valido, mensaje = validar_zona_upz(zona_final, upz_final)
-    
-    if not es_valido:
-        df.at[idx, 'Validacion_Zona_UPZ'] = 'Inconsistente'
-        if not pd.notna(df.at[idx, 'Observaciones']):
-            df.at[idx, 'Observaciones'] = mensaje
-        inconsistencias += 1
-    else:
-        df.at[idx, 'Validacion_Zona_UPZ'] = 'Válido'
+    llaves = codigos + '|' + barrios_norm
+    zona = llaves.map(zona_por_llave)
+    zona = zona.fillna(codigos.map(zona_por_defecto_upz))
+    zona = zona.fillna(primera_zona)
 
-# =====================================================================
-# ESTADÍSTICAS
-# =====================================================================
-print("\n" + "="*80)
-print("📊 RESULTADOS DE EXTRACCIÓN")
-print("="*80)
-
-print(f"\n✅ Barrios extraídos: {extracciones_exitosas}/{len(df)} ({extracciones_exitosas/len(df)*100:.1f}%)")
-print(f"✅ UPZ completadas: {upz_completadas}")
-print(f"✅ Zonas completadas/corregidas: {zona_completadas}")
-print(f"⚠️  Inconsistencias finales: {inconsistencias}")
-
-# Desglose por método
-if 'Metodo_Extraccion' in df.columns:
-    print("\n📋 Por método de extracción:")
-    metodos = df['Metodo_Extraccion'].value_counts()
-    for metodo, count in metodos.items():
-        print(f"   {metodo}: {count} ({count/len(df)*100:.1f}%)")
+    # Una sola zona en la lista: no hay ambigüedad
+    una_zona = zonas_listas.str.len() == 1
+    return zona.where(~una_zona, primera_zona)
 
-# =====================================================================
-# AGREGAR ID_ACTIVIDAD CON PREFIJO DE HOJA
-# =====================================================================
-print("\n🔢 Agregando ID_Actividad con prefijo de hoja...")
 
 # Crear ID basado en Hoja_Origen y número de fila
 def generar_id(row, idx_por_hoja):
@@ -364,37 +245,261 @@ def generar_id(row, idx_por_hoja):
     
     return f"{prefijo}_{numero}"
 
-# Contador por hoja
-idx_por_hoja = {}
-for hoja in df['Hoja_Origen'].unique():
-    idx_por_hoja[hoja] = 1
 
-# Generar IDs
-df.insert(0, 'ID_Actividad', df.apply(lambda row: generar_id(row, idx_por_hoja), axis=1))
+def enriquecer_actividades(df, dicc_upz_zonas=None):
+    """
+    Etapa en memoria: extrae barrios, corrige zonas duplicadas, valida
+    Zona-UPZ y agrega ID_Actividad. Retorna el DataFrame enriquecido.
+    """
+    return completar_actividades(df, extraer_barrios(df), dicc_upz_zonas)
 
-print(f"✅ ID_Actividad agregado con prefijos H1_ y H2_")
-print(f"   Hoja 1: {(df['ID_Actividad'].str.startswith('H1_')).sum()} registros")
-print(f"   Hoja 2: {(df['ID_Actividad'].str.startswith('H2_')).sum()} registros")
 
-# =====================================================================
-# GUARDAR CON DELIMITADOR PUNTO Y COMA
-# =====================================================================
-df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8', sep=';')
-print(f"\n💾 Guardado: {OUTPUT_FILE}")
-
-# Calidad de datos
-print("\n📊 Calidad de datos:")
-total = len(df)
-completitud = {
-    'Barrio': f"{(df['Barrio_Extraido'].notna().sum()/total*100):.1f}%",
-    'UPZ': f"{(df['UPZ_Enriquecida'].notna().sum()/total*100):.1f}%",
-    'Zona': f"{(df['Zona_Enriquecida'].notna().sum()/total*100):.1f}%",
-    'Validación': f"{((df['Validacion_Zona_UPZ'] == 'Válido').sum()/total*100):.1f}%"
-}
-
-for campo, porcentaje in completitud.items():
-    print(f"   {campo}: {porcentaje}")
-
-print("\n" + "="*80)
-print("✅ ENRIQUECIMIENTO COMPLETADO CON ÉXITO")
-print("="*80)
\ No newline at end of file
+def extraer_barrios(df):
+    """
+    Barrio, UPZ completada, zonas posibles y método por fila (mismo índice
+    que df). Solo lee Direccion_Actividad y Nombre_UPZ (y Marca_Temporal
+    para el índice de tramos); escribe las métricas de la cascada.
+    """
+    global medicion_extraccion, indice_segmentos
+    cargar_recursos()
+    medicion_extraccion = nueva_medicion([metodo for metodo, _ in METODOS_EXTRACCION])
+
+    # =====================================================================
+    # APLICAR EXTRACCIÓN
+    # =====================================================================
+    print("\n🔍 Extrayendo barrios de direcciones...")
+
+    extraccion = pd.DataFrame(index=df.index)
+    extraccion['Barrio_Extraido'] = None
+    extraccion['UPZ_Enriquecida'] = df['Nombre_UPZ']
+    extraccion['Zonas_Posibles'] = None
+    extraccion['Metodo_Extraccion'] = None
+
+    # Caché de extracción por dirección canónica: cada escritura distinta se
+    # extrae una vez y el lugar toma el resultado más frecuente entre sus
+    # escrituras (ponderado por filas), así no depende del orden de las filas
+    claves_direccion = canonizar_direcciones(df['Direccion_Actividad'])['Direccion_Canonica']
+    escrituras = pd.DataFrame({'clave': claves_direccion, 'direccion': df['Direccion_Actividad']}).value_counts()
+    cache_extraccion = {}
+    representantes = {}
+    for clave, grupo in escrituras.groupby(level='clave', sort=False):
+        votos = {}
+        for (_, direccion), filas in grupo.items():
+            resultado = extraer_barrio(direccion)
+            if resultado[0] is not None:
+                actual = votos.setdefault(resultado[::3], [0, resultado])
+                actual[0] += filas
+        cache_extraccion[clave] = elegir_resultado(votos)
+        # Escritura más frecuente (la menor si empatan) para la segunda pasada
+        representantes[clave] = min(grupo.items(), key=lambda item: (-item[1], item[0][1]))[0][1]
+
+    # Índice de tramos con las filas resueltas por Exacto/Patron y segunda
+    # pasada (Segmento) sobre las direcciones que quedaron sin resolver
+    sin_resultado = (None, None, None, None)
+    resultados = pd.DataFrame(
+        [cache_extraccion.get(c, sin_resultado) if pd.notna(c) else sin_resultado for c in claves_direccion],
+        index=df.index, columns=['Barrio_Extraido', 'UPZ_Extraida', 'Zonas', 'Metodo_Extraccion'],
+    )
+    upz_vacia = df['Nombre_UPZ'].isna() | (df['Nombre_UPZ'].astype(str).str.strip() == "")
+    resultados['UPZ_Enriquecida'] = df['Nombre_UPZ'].where(~upz_vacia, resultados['UPZ_Extraida'])
+    columnas_fila = [c for c in ('Direccion_Actividad', 'Marca_Temporal') if c in df.columns]
+    indice_segmentos = indice_vacio()
+    filas_indexadas = actualizar_indice(indice_segmentos, resultados.join(df[columnas_fila]))
+    print(f"✅ Índice de tramos: {filas_indexadas} filas, {len(indice_segmentos['segmentos'])} tramos")
+
+    metodo_segmento, buscar_segmento = METODO_SEGMENTO
+    for clave, resultado in cache_extraccion.items():
+        if resultado[0] is not None:
+            continue
+        t0 = time.perf_counter()
+        barrio, upz_metodo = buscar_segmento(representantes[clave], None)
+        registrar_metodo(medicion_extraccion, metodo_segmento, time.perf_counter() - t0, bool(barrio))
+        if barrio:
+            cache_extraccion[clave] = _resultado(barrio, upz_metodo, metodo_segmento)
+
+    for idx, direccion, upz_actual in zip(df.index, df['Direccion_Actividad'], df['Nombre_UPZ']):
+        clave = claves_direccion.at[idx]
+        
+        # Asignar barrio
+        if pd.isna(clave):
+            continue
+        barrio, upz_ext, zonas_ext, metodo = cache_extraccion[clave]
+        
+        if barrio:
+            extraccion.at[idx, 'Barrio_Extraido'] = barrio.title()
+            extraccion.at[idx, 'Metodo_Extraccion'] = metodo
+            
+            # Guardar zonas posibles
+            if zonas_ext:
+                extraccion.at[idx, 'Zonas_Posibles'] = ', '.join(zonas_ext)
+            
+            # Completar UPZ si está vacía
+            if pd.isna(upz_actual) or str(upz_actual).strip() == "":
+                extraccion.at[idx, 'UPZ_Enriquecida'] = upz_ext
+
+    print(f"✅ Direcciones distintas resueltas: {len(cache_extraccion)} (de {df['Direccion_Actividad'].notna().sum()} con dato)")
+
+    # Reporte de latencia/aciertos por método de la cascada
+    reporte_extraccion = guardar_reporte(
+        medicion_extraccion, METRICAS_FILE,
+        filas=len(df), direcciones_distintas=len(cache_extraccion),
+    )
+    print("\n⏱️  Extracción por método:")
+    imprimir_resumen(reporte_extraccion)
+    print(f"💾 Métricas de extracción: {METRICAS_FILE}")
+
+    return extraccion
+
+
+def completar_actividades(df, extraccion, dicc_upz_zonas=None):
+    """
+    Une la extracción de barrios a df, corrige zonas duplicadas, valida
+    Zona-UPZ (diccionario_upz_zonas.json si no se pasa) y agrega ID_Actividad.
+    """
+    cargar_recursos()
+    df = df.copy()
+
+    # Crear columnas nuevas
+    df['Barrio_Extraido'] = extraccion['Barrio_Extraido']
+    df['UPZ_Enriquecida'] = extraccion['UPZ_Enriquecida']
+    df['Zona_Enriquecida'] = df['Zona']
+    df['Zonas_Posibles'] = extraccion['Zonas_Posibles']
+    df['Metodo_Extraccion'] = extraccion['Metodo_Extraccion']
+    df['Validacion_Zona_UPZ'] = None
+    df['Observaciones'] = None
+
+    extraidos = df['Barrio_Extraido'].notna()
+    upz_vacia = df['Nombre_UPZ'].isna() | (df['Nombre_UPZ'].astype(str).str.strip() == "")
+    extracciones_exitosas = int(extraidos.sum())
+    upz_completadas = int((extraidos & upz_vacia).sum())
+    zona_completadas = 0
+
+    # =====================================================================
+    # CORRECCIÓN MASIVA DE ZONAS DUPLICADAS (TODOS LOS REGISTROS)
+    # =====================================================================
+    print("\n🔧 Corrigiendo todas las zonas duplicadas...")
+
+    # Si la zona tiene coma (duplicada), corregir usando UPZ + Barrio (si existe)
+    zona_actual = df['Zona_Enriquecida']
+    con_coma = zona_actual.notna() & zona_actual.astype(str).str.contains(',', regex=False)
+
+    duplicadas = df.loc[con_coma]
+    zona_corregida = seleccionar_zonas_correctas(
+        duplicadas['Barrio_Extraido'], duplicadas['UPZ_Enriquecida'], duplicadas['Zona_Enriquecida']
+    )
+    criterio = duplicadas['Barrio_Extraido'].notna().map({True: 'barrio', False: 'UPZ'})
+
+    df.loc[con_coma, 'Observaciones'] = (
+        "Zona duplicada corregida con " + criterio + ": "
+        + duplicadas['Zona_Enriquecida'].astype(str) + " → " + zona_corregida
+    )
+    df.loc[con_coma, 'Zona_Enriquecida'] = zona_corregida
+
+    zonas_corregidas = int(con_coma.sum())
+    zona_completadas += zonas_corregidas
+
+    print(f"✅ Zonas duplicadas corregidas: {zonas_corregidas}")
+
+    # =====================================================================
+    # VALIDACIÓN ZONA-UPZ
+    # =====================================================================
+    print("\n🔍 Validando consistencia Zona-UPZ...")
+
+    # Matriz de compatibilidad construida desde diccionario_upz_zonas.json
+    motor_zonas = construir_motor(dicc_upz_zonas)
+    resultado = validar(df['UPZ_Enriquecida'], df['Zona_Enriquecida'], motor_zonas)
+    inconsistente = resultado['Estado'] == CONFLICTO
+
+    df['Validacion_Zona_UPZ'] = inconsistente.map({True: 'Inconsistente', False: 'Válido'})
+    mensaje = (
+        "Inconsistencia: " + df['Zona_Enriquecida'].astype(str)
+        + " no corresponde con " + df['UPZ_Enriquecida'].astype(str)
+    )
+    sin_observacion = inconsistente & df['Observaciones'].isna()
+    df.loc[sin_observacion, 'Observaciones'] = mensaje[sin_observacion]
+    inconsistencias = int(inconsistente.sum())
+
+    # =====================================================================
+    # ESTADÍSTICAS
+    # =====================================================================
+    print("\n" + "="*80)
+    print("📊 RESULTADOS DE EXTRACCIÓN")
+    print("="*80)
+
+    print(f"\n✅ Barrios extraídos: {extracciones_exitosas}/{len(df)} ({extracciones_exitosas/len(df)*100:.1f}%)")
+    print(f"✅ UPZ completadas: {upz_completadas}")
+    print(f"✅ Zonas completadas/corregidas: {zona_completadas}")
+    print(f"⚠️  Inconsistencias finales: {inconsistencias}")
+
+    # Desglose por método
+    if 'Metodo_Extraccion' in df.columns:
+        print("\n📋 Por método de extracción:")
+        metodos = df['Metodo_Extraccion'].value_counts()
+        for metodo, count in metodos.items():
+            print(f"   {metodo}: {count} ({count/len(df)*100:.1f}%)")
+
+    # =====================================================================
+    # AGREGAR ID_ACTIVIDAD CON PREFIJO DE HOJA
+    # =====================================================================
+    print("\n🔢 Agregando ID_Actividad con prefijo de hoja...")
+
+    # Contador por hoja
+    idx_por_hoja = {}
+    for hoja in df['Hoja_Origen'].unique():
+        idx_por_hoja[hoja] = 1
+
+    # Generar IDs
+    df.insert(0, 'ID_Actividad', df.apply(lambda row: generar_id(row, idx_por_hoja), axis=1))
+
+    print(f"✅ ID_Actividad agregado con prefijos H1_ y H2_")
+    print(f"   Hoja 1: {(df['ID_Actividad'].str.startswith('H1_')).sum()} registros")
+    print(f"   Hoja 2: {(df['ID_Actividad'].str.startswith('H2_')).sum()} registros")
+
+    return df
+
+
+def reportar_calidad(df):
+    """Completitud de barrio, UPZ, zona y validación"""
+    print("\n📊 Calidad de datos:")
+    total = len(df)
+    completitud = {
+        'Barrio': f"{(df['Barrio_Extraido'].notna().sum()/total*100):.1f}%",
+        'UPZ': f"{(df['UPZ_Enriquecida'].notna().sum()/total*100):.1f}%",
+        'Zona': f"{(df['Zona_Enriquecida'].notna().sum()/total*100):.1f}%",
+        'Validación': f"{((df['Validacion_Zona_UPZ'] == 'Válido').sum()/total*100):.1f}%"
+    }
+
+    for campo, porcentaje in completitud.items():
+        print(f"   {campo}: {porcentaje}")
+
+
+def main(argv=None):
+    parser = agregar_argumentos(argparse.ArgumentParser(description='Enriquece actividades con barrios'))
+    sesion_perfil = sesion_desde_args(parser.parse_args(argv))
+
+    print("\n" + "="*80)
+    print("🔍 ENRIQUECIENDO ACTIVIDADES CON BARRIOS V2")
+    print("="*80)
+    print("\n📥 Cargando datos...")
+    df = leer_actividades()
+    with perfil(sesion_perfil, 'extraccion_barrios'):
+        extraccion = extraer_barrios(df)
+    with perfil(sesion_perfil, 'completar_actividades'):
+        df = completar_actividades(df, extraccion)
+
+    # =====================================================================
+    # GUARDAR CON DELIMITADOR PUNTO Y COMA
+    # =====================================================================
+    df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8', sep=';')
+    print(f"\n💾 Guardado: {OUTPUT_FILE}")
+
+    reportar_calidad(df)
+
+    print("\n" + "="*80)
+    print("✅ ENRIQUECIMIENTO COMPLETADO CON ÉXITO")
+    print("="*80)
+    imprimir_sesion(sesion_perfil)
+
+
+if __name__ == "__main__":
+    main()
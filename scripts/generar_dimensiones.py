@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import os
 
+from normalizar_direcciones import canonizar_direcciones, COLUMNAS_CANONICAS
+
 # ============================
 #  DICCIONARIOS EN ESPAÑOL
 # ============================
@@ -21,11 +23,6 @@ meses_es = {
     9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
 }
 
-# ============================
-#   CREAR CARPETA OUTPUT
-# ============================
-os.makedirs("dimensiones", exist_ok=True)
-
 # ============================
 #   FUNCIÓN: DIM FECHA
 # ============================
@@ -82,9 +79,21 @@ def generar_dim_ubicacion(df):
         print("⚠ No se encontraron columnas para dimensión ubicación")
         return
     
-    dim = df[cols_existentes].drop_duplicates().reset_index(drop=True)
+    dim = df[cols_existentes]
+    cols_llave = cols_existentes
+    cols_canonicas = []
+    
+    # Variantes de escritura de la misma dirección → una sola ubicación
+    # (se conserva la primera escritura encontrada como representativa)
+    if "Direccion_Actividad" in cols_existentes:
+        canonicas = canonizar_direcciones(df["Direccion_Actividad"])
+        dim = pd.concat([dim, canonicas], axis=1)
+        cols_canonicas = COLUMNAS_CANONICAS
+        cols_llave = ["Direccion_Canonica"] + [c for c in cols_existentes if c != "Direccion_Actividad"]
+    
+    dim = dim.drop_duplicates(subset=cols_llave).reset_index(drop=True)
     dim["id_ubicacion"] = dim.index + 1
-    col_order = ["id_ubicacion"] + cols_existentes
+    col_order = ["id_ubicacion"] + cols_existentes + cols_canonicas
     dim = dim[col_order]
     
     os.makedirs("dimensiones", exist_ok=True)
@@ -147,8 +156,8 @@ def generar_todas_las_dimensiones():
 # ============================
 #   EJECUCIÓN DIRECTA (OPCIONAL)
 # ============================
-if __name__ == "__main__":
-    # Si ejecutas este archivo directamente (no desde run_pipeline.py)
+def main():
+    """Ejecución directa (no desde run_pipeline.py)"""
     if os.path.exists("Reporte Actividades.xlsx"):
         df = pd.read_excel("Reporte Actividades.xlsx")
         
@@ -158,4 +167,8 @@ if __name__ == "__main__":
         
         print("\n🎉 ETL COMPLETO: Todas las dimensiones fueron generadas exitosamente.")
     else:
-        print("❌ No se encontró Reporte Actividades.xlsx")
\ No newline at end of file
+        print("❌ No se encontró Reporte Actividades.xlsx")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,16 @@ a partir de fact_actividades_enriquecido.csv y diccionarios
 VERSION CORREGIDA - Rutas y lógica actualizadas
 """
 
+import argparse
 import pandas as pd
 import json
 import re
 from pathlib import Path
 from datetime import datetime
 
+from tareas_paralelas import WORKERS, tarea, ejecutar_tareas, imprimir_tiempos
+from perfilado import agregar_argumentos, sesion_desde_args, perfil, imprimir_sesion
+
 # =====================================================================
 # CONFIGURACIÓN DE RUTAS (CORREGIDAS)
 # =====================================================================
@@ -19,9 +23,6 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DIMENSIONES_DIR = BASE_DIR / "dimensiones"
 SCRIPTS_DIR = BASE_DIR / "scripts"
 
-# Crear carpeta si no existe
-DIMENSIONES_DIR.mkdir(exist_ok=True)
-
 # Archivos de entrada (RUTAS CORREGIDAS Y FLEXIBLES)
 FACT_ENRIQUECIDO = BASE_DIR / "fact_actividades_enriquecido.csv"
 FACT_LIMPIO = BASE_DIR / "fact_actividades_limpio.csv"
@@ -32,99 +33,62 @@ FACT_ACTIVIDADES = FACT_ENRIQUECIDO if FACT_ENRIQUECIDO.exists() else FACT_LIMPI
 DICT_UPZ_ZONAS = SCRIPTS_DIR / "diccionario_upz_zonas.json"
 DICT_BARRIOS = SCRIPTS_DIR / "diccionario_barrios_completo.json"
 
-print("\n" + "="*80)
-print("🚀 GENERANDO MODELO DIMENSIONAL COMPLETO PARA POWER BI")
-print("="*80)
-
-# =====================================================================
-# 1. CARGAR DATOS BASE
-# =====================================================================
-print("\n📥 Cargando datos base...")
-
-# Verificar que existe el archivo enriquecido
-if not FACT_ACTIVIDADES.exists():
-    print(f"❌ Error: No se encuentra {FACT_ACTIVIDADES}")
-    print("   Ejecuta primero: python scripts/enriquecer_con_barrios.py")
-    exit(1)
-
-df_actividades = pd.read_csv(FACT_ACTIVIDADES, encoding='utf-8-sig', sep=';')
-print(f"✅ fact_actividades_enriquecido.csv cargado: {len(df_actividades)} registros")
-
-# Verificar columna Barrio_Extraido
-if 'Barrio_Extraido' in df_actividades.columns:
-    barrios_con_dato = df_actividades['Barrio_Extraido'].notna().sum()
-    print(f"   📍 Barrios extraídos: {barrios_con_dato}/{len(df_actividades)} ({barrios_con_dato/len(df_actividades)*100:.1f}%)")
-
-# Cargar diccionario UPZ-Zonas
-if DICT_UPZ_ZONAS.exists():
-    with open(DICT_UPZ_ZONAS, 'r', encoding='utf-8') as f:
-        upz_zonas = json.load(f)
-    print(f"✅ Diccionario UPZ-Zonas cargado: {len(upz_zonas)} UPZ")
-else:
-    print("⚠️  Diccionario UPZ-Zonas no encontrado, creando versión básica...")
-    upz_zonas = {
-        "32 - San Blas": ["Zona 1", "Zona 2"],
-        "33 - Sosiego": ["Zona 6"],
-        "34 - 20 de Julio": ["Zona 4"],
-        "50 - La Gloria": ["Zona 3", "Zona 8"],
-        "51 - Los Libertadores": ["Zona 5", "Zona 7"]
-    }
-
-# Cargar diccionario completo de barrios
-if DICT_BARRIOS.exists():
-    with open(DICT_BARRIOS, 'r', encoding='utf-8') as f:
-        dict_barrios = json.load(f)
-    print(f"✅ Diccionario de barrios cargado: {dict_barrios['metadata']['total_barrios']} barrios oficiales")
-else:
-    print("❌ Diccionario de barrios no encontrado")
-    print("   Ejecuta primero: python scripts/crear_diccionario_barrios.py")
-    exit(1)
-
-# =====================================================================
-# 2. GENERAR ID_ACTIVIDAD si no existe
-# =====================================================================
-if 'ID_Actividad' not in df_actividades.columns:
-    print("\n⚠️  Generando ID_Actividad único...")
-    import hashlib
-    
-    def generar_id(row):
-        # Crear ID único basado en campos clave
-        campos = f"{row.get('Nombre_Actividad', '')}{row.get('Fecha_Actividad', '')}{row.get('Hora_Inicio', '')}{row.get('Direccion_Actividad', '')}"
-        return hashlib.md5(campos.encode()).hexdigest()[:12].upper()
-    
-    df_actividades['ID_Actividad'] = df_actividades.apply(generar_id, axis=1)
-    print(f"✅ ID_Actividad generado para {len(df_actividades)} registros")
-
-# =====================================================================
-# 3. GENERAR dim_zonas.csv
-# =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO dim_zonas.csv")
-print("="*80)
-
-zonas_data = []
-for i in range(1, 9):
-    zonas_data.append({
-        'ID_Zona': i,
-        'Zona': f'Zona {i}',
-        'Nombre_Zona': f'Zona {i}',
-        'Numero_Zona': i
-    })
-
-df_dim_zonas = pd.DataFrame(zonas_data)
-output_path = DIMENSIONES_DIR / "dim_zonas.csv"
-df_dim_zonas.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ dim_zonas.csv generado ({len(df_dim_zonas)} zonas)")
-
-# =====================================================================
-# 4. GENERAR dim_upz.csv
-# =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO dim_upz.csv")
-print("="*80)
 
-upz_data = []
-upz_info = {
+def cargar_actividades():
+    """fact_actividades enriquecido (o limpio si aún no existe)"""
+    # =====================================================================
+    # 1. CARGAR DATOS BASE
+    # =====================================================================
+    print("\n📥 Cargando datos base...")
+
+    # Verificar que existe el archivo enriquecido
+    if not FACT_ACTIVIDADES.exists():
+        print(f"❌ Error: No se encuentra {FACT_ACTIVIDADES}")
+        print("   Ejecuta primero: python scripts/enriquecer_con_barrios.py")
+        exit(1)
+
+    df_actividades = pd.read_csv(FACT_ACTIVIDADES, encoding='utf-8-sig', sep=';')
+    print(f"✅ fact_actividades_enriquecido.csv cargado: {len(df_actividades)} registros")
+
+    # Verificar columna Barrio_Extraido
+    if 'Barrio_Extraido' in df_actividades.columns:
+        barrios_con_dato = df_actividades['Barrio_Extraido'].notna().sum()
+        print(f"   📍 Barrios extraídos: {barrios_con_dato}/{len(df_actividades)} ({barrios_con_dato/len(df_actividades)*100:.1f}%)")
+
+    return df_actividades
+
+
+def cargar_diccionarios():
+    """Diccionario UPZ-Zonas (o versión básica) y diccionario de barrios"""
+    # Cargar diccionario UPZ-Zonas
+    if DICT_UPZ_ZONAS.exists():
+        with open(DICT_UPZ_ZONAS, 'r', encoding='utf-8') as f:
+            upz_zonas = json.load(f)
+        print(f"✅ Diccionario UPZ-Zonas cargado: {len(upz_zonas)} UPZ")
+    else:
+        print("⚠️  Diccionario UPZ-Zonas no encontrado, creando versión básica...")
+        upz_zonas = {
+            "32 - San Blas": ["Zona 1", "Zona 2"],
+            "33 - Sosiego": ["Zona 6"],
+            "34 - 20 de Julio": ["Zona 4"],
+            "50 - La Gloria": ["Zona 3", "Zona 8"],
+            "51 - Los Libertadores": ["Zona 5", "Zona 7"]
+        }
+
+    # Cargar diccionario completo de barrios
+    if DICT_BARRIOS.exists():
+        with open(DICT_BARRIOS, 'r', encoding='utf-8') as f:
+            dict_barrios = json.load(f)
+        print(f"✅ Diccionario de barrios cargado: {dict_barrios['metadata']['total_barrios']} barrios oficiales")
+    else:
+        print("❌ Diccionario de barrios no encontrado")
+        print("   Ejecuta primero: python scripts/crear_diccionario_barrios.py")
+        exit(1)
+
+    return upz_zonas, dict_barrios
+
+
+UPZ_INFO = {
     "32 - San Blas": {"codigo": 32, "nombre": "San Blas", "zona_principal": "Zona 1"},
     "33 - Sosiego": {"codigo": 33, "nombre": "Sosiego", "zona_principal": "Zona 6"},
     "34 - 20 de Julio": {"codigo": 34, "nombre": "20 de Julio", "zona_principal": "Zona 4"},
@@ -132,300 +96,381 @@ upz_info = {
     "51 - Los Libertadores": {"codigo": 51, "nombre": "Los Libertadores", "zona_principal": "Zona 5"}
 }
 
-for upz_key, info in upz_info.items():
-    zonas_asoc = upz_zonas.get(upz_key, [])
-    upz_data.append({
-        'ID_UPZ': info['codigo'],
-        'UPZ': upz_key,
-        'Codigo_UPZ': info['codigo'],
-        'Nombre_UPZ': info['nombre'],
-        'Zona_Principal': info['zona_principal'],
-        'Zonas_Asociadas': ', '.join(zonas_asoc)
-    })
-
-df_dim_upz = pd.DataFrame(upz_data)
-output_path = DIMENSIONES_DIR / "dim_upz.csv"
-df_dim_upz.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ dim_upz.csv generado ({len(df_dim_upz)} UPZ)")
+# Unidad con la que se reporta el conteo de cada tabla
+UNIDADES = {
+    'dim_zonas.csv': 'zonas',
+    'dim_upz.csv': 'UPZ',
+    'bridge_upz_zonas.csv': 'relaciones',
+    'dim_barrios.csv': 'barrios',
+    'dim_estrategias.csv': 'estrategias',
+    'fact_estrategias.csv': 'relaciones',
+    'fact_lineas.csv': 'líneas',
+    'bridge_barrios_zonas.csv': 'relaciones',
+}
+
 
 # =====================================================================
-# 5. GENERAR bridge_upz_zonas.csv
+# 3. dim_zonas.csv
 # =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO bridge_upz_zonas.csv")
-print("="*80)
-
-bridge_upz_zonas_data = []
-for upz, zonas in upz_zonas.items():
-    zona_principal = upz_info.get(upz, {}).get('zona_principal', '')
-    for zona in zonas:
-        bridge_upz_zonas_data.append({
-            'UPZ': upz,
-            'Zona': zona,
-            'Es_Zona_Principal': 'Sí' if zona == zona_principal else 'No'
+def construir_dim_zonas():
+    zonas_data = []
+    for i in range(1, 9):
+        zonas_data.append({
+            'ID_Zona': i,
+            'Zona': f'Zona {i}',
+            'Nombre_Zona': f'Zona {i}',
+            'Numero_Zona': i
         })
+    return pd.DataFrame(zonas_data)
 
-df_bridge_upz_zonas = pd.DataFrame(bridge_upz_zonas_data)
-output_path = DIMENSIONES_DIR / "bridge_upz_zonas.csv"
-df_bridge_upz_zonas.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ bridge_upz_zonas.csv generado ({len(df_bridge_upz_zonas)} relaciones)")
 
 # =====================================================================
-# 6. GENERAR dim_barrios.csv (DESDE DICCIONARIO OFICIAL)
+# 4. dim_upz.csv
 # =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO dim_barrios.csv")
-print("="*80)
-
-barrios_por_upz = dict_barrios['barrios_por_upz']
-barrio_a_upz = dict_barrios['barrio_a_upz']
-
-# Crear dim_barrios desde diccionario oficial (197 barrios)
-barrios_data = []
-id_counter = 1
-
-for upz, barrios in barrios_por_upz.items():
-    for barrio in barrios:
-        barrios_data.append({
-            'ID_Barrio': id_counter,
-            'Barrio': barrio,
-            'Barrio_Normalizado': barrio.lower().strip(),
-            'UPZ': upz,
-            'Fuente': 'Diccionario Oficial'
+def construir_dim_upz(upz_zonas):
+    upz_data = []
+    for upz_key, info in UPZ_INFO.items():
+        zonas_asoc = upz_zonas.get(upz_key, [])
+        upz_data.append({
+            'ID_UPZ': info['codigo'],
+            'UPZ': upz_key,
+            'Codigo_UPZ': info['codigo'],
+            'Nombre_UPZ': info['nombre'],
+            'Zona_Principal': info['zona_principal'],
+            'Zonas_Asociadas': ', '.join(zonas_asoc)
         })
-        id_counter += 1
-
-# AGREGAR barrios extraídos que no están en el diccionario oficial
-if 'Barrio_Extraido' in df_actividades.columns:
-    barrios_extraidos = df_actividades['Barrio_Extraido'].dropna().unique()
-    barrios_oficiales_norm = {b.lower().strip() for b in [item['Barrio'] for item in barrios_data]}
-    
-    nuevos_barrios = 0
-    for barrio_ext in barrios_extraidos:
-        if barrio_ext.lower().strip() not in barrios_oficiales_norm:
-            # Barrio encontrado en actividades pero no en diccionario oficial
-            barrios_data.append({
-                'ID_Barrio': id_counter,
-                'Barrio': barrio_ext,
-                'Barrio_Normalizado': barrio_ext.lower().strip(),
-                'UPZ': None,
-                'Fuente': 'Extraído de Actividades'
-            })
-            id_counter += 1
-            nuevos_barrios += 1
-    
-    if nuevos_barrios > 0:
-        print(f"   📍 {nuevos_barrios} barrios adicionales encontrados en actividades")
-
-df_dim_barrios = pd.DataFrame(barrios_data)
-output_path = DIMENSIONES_DIR / "dim_barrios.csv"
-df_dim_barrios.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ dim_barrios.csv generado ({len(df_dim_barrios)} barrios)")
-print(f"   • Oficiales: {len([b for b in barrios_data if b['Fuente'] == 'Diccionario Oficial'])}")
-print(f"   • Extraídos: {len([b for b in barrios_data if b['Fuente'] == 'Extraído de Actividades'])}")
+    return pd.DataFrame(upz_data)
+
 
 # =====================================================================
-# 7. GENERAR dim_estrategias.csv
+# 5. bridge_upz_zonas.csv
 # =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO dim_estrategias.csv")
-print("="*80)
-
-estrategias_data = [
-    {'ID_Estrategia': 1, 'Estrategia': 'Seguridad', 'Descripcion': 'Actividades de Seguridad Ciudadana'},
-    {'ID_Estrategia': 2, 'Estrategia': 'Convivencia', 'Descripcion': 'Actividades de Convivencia y Reconciliación'},
-    {'ID_Estrategia': 3, 'Estrategia': 'Justicia', 'Descripcion': 'Actividades de Justicia y Acceso a Derechos'}
-]
+def construir_bridge_upz_zonas(upz_zonas):
+    bridge_upz_zonas_data = []
+    for upz, zonas in upz_zonas.items():
+        zona_principal = UPZ_INFO.get(upz, {}).get('zona_principal', '')
+        for zona in zonas:
+            bridge_upz_zonas_data.append({
+                'UPZ': upz,
+                'Zona': zona,
+                'Es_Zona_Principal': 'Sí' if zona == zona_principal else 'No'
+            })
+    return pd.DataFrame(bridge_upz_zonas_data)
 
-df_dim_estrategias = pd.DataFrame(estrategias_data)
-output_path = DIMENSIONES_DIR / "dim_estrategias.csv"
-df_dim_estrategias.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ dim_estrategias.csv generado ({len(df_dim_estrategias)} estrategias)")
 
 # =====================================================================
-# 8. GENERAR fact_estrategias.csv
+# 6. dim_barrios.csv (DESDE DICCIONARIO OFICIAL)
 # =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO fact_estrategias.csv")
-print("="*80)
+def construir_dim_barrios(df_actividades, dict_barrios):
+    barrios_por_upz = dict_barrios['barrios_por_upz']
 
-fact_estrategias_rows = []
+    # Crear dim_barrios desde diccionario oficial (197 barrios)
+    barrios_data = []
+    id_counter = 1
 
-# Columna de estrategias
-col_estrategias = 'Estrategia_Impactar'
+    for upz, barrios in barrios_por_upz.items():
+        for barrio in barrios:
+            barrios_data.append({
+                'ID_Barrio': id_counter,
+                'Barrio': barrio,
+                'Barrio_Normalizado': barrio.lower().strip(),
+                'UPZ': upz,
+                'Fuente': 'Diccionario Oficial'
+            })
+            id_counter += 1
+
+    # AGREGAR barrios extraídos que no están en el diccionario oficial
+    if 'Barrio_Extraido' in df_actividades.columns:
+        barrios_extraidos = df_actividades['Barrio_Extraido'].dropna().unique()
+        barrios_oficiales_norm = {b.lower().strip() for b in [item['Barrio'] for item in barrios_data]}
+
+        for barrio_ext in barrios_extraidos:
+            if barrio_ext.lower().strip() not in barrios_oficiales_norm:
+                # Barrio encontrado en actividades pero no en diccionario oficial
+                barrios_data.append({
+                    'ID_Barrio': id_counter,
+                    'Barrio': barrio_ext,
+                    'Barrio_Normalizado': barrio_ext.lower().strip(),
+                    'UPZ': None,
+                    'Fuente': 'Extraído de Actividades'
+                })
+                id_counter += 1
+
+    return pd.DataFrame(barrios_data)
 
-if col_estrategias in df_actividades.columns:
-    for idx, row in df_actividades.iterrows():
-        id_actividad = row['ID_Actividad']
-        estrategias_str = row.get(col_estrategias, '')
-        
-        if pd.notna(estrategias_str) and str(estrategias_str).strip():
-            # Separar por comas
-            estrategias_lista = [e.strip() for e in str(estrategias_str).split(',')]
-            
-            for estrategia in estrategias_lista:
-                if estrategia:
-                    # Normalizar nombre
-                    estrategia_norm = estrategia.title()
-                    
-                    fact_estrategias_rows.append({
-                        'ID_Actividad': id_actividad,
-                        'Estrategia': estrategia_norm,
-                        'ID_Estrategia': 1 if 'seguridad' in estrategia.lower() else 
-                                       2 if 'convivencia' in estrategia.lower() else 
-                                       3 if 'justicia' in estrategia.lower() else None
-                    })
-
-df_fact_estrategias = pd.DataFrame(fact_estrategias_rows)
-output_path = DIMENSIONES_DIR / "fact_estrategias.csv"
-df_fact_estrategias.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ fact_estrategias.csv generado ({len(df_fact_estrategias)} relaciones)")
 
 # =====================================================================
-# 9. GENERAR fact_lineas.csv
+# 7. dim_estrategias.csv
 # =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO fact_lineas.csv")
-print("="*80)
+def construir_dim_estrategias():
+    estrategias_data = [
+        {'ID_Estrategia': 1, 'Estrategia': 'Seguridad', 'Descripcion': 'Actividades de Seguridad Ciudadana'},
+        {'ID_Estrategia': 2, 'Estrategia': 'Convivencia', 'Descripcion': 'Actividades de Convivencia y Reconciliación'},
+        {'ID_Estrategia': 3, 'Estrategia': 'Justicia', 'Descripcion': 'Actividades de Justicia y Acceso a Derechos'}
+    ]
+    return pd.DataFrame(estrategias_data)
 
-fact_lineas_rows = []
 
-# Columnas de líneas estratégicas
-columnas_lineas = {
-    'Seguridad': 'Linea_Seguridad',
-    'Convivencia': 'Linea_Convivencia',
-    'Justicia': 'Linea_Justicia'
-}
+# =====================================================================
+# 8. fact_estrategias.csv
+# =====================================================================
+def construir_fact_estrategias(df_actividades):
+    fact_estrategias_rows = []
+
+    # Columna de estrategias
+    col_estrategias = 'Estrategia_Impactar'
 
-for tipo_estrategia, col_linea in columnas_lineas.items():
-    if col_linea in df_actividades.columns:
+    if col_estrategias in df_actividades.columns:
         for idx, row in df_actividades.iterrows():
             id_actividad = row['ID_Actividad']
-            lineas_str = row.get(col_linea, '')
+            estrategias_str = row.get(col_estrategias, '')
             
-            if pd.notna(lineas_str) and str(lineas_str).strip() and str(lineas_str) != 'N/A':
+            if pd.notna(estrategias_str) and str(estrategias_str).strip():
                 # Separar por comas
-                lineas_lista = [l.strip() for l in str(lineas_str).split(',')]
+                estrategias_lista = [e.strip() for e in str(estrategias_str).split(',')]
                 
-                for linea in lineas_lista:
-                    if linea and linea != 'N/A':
-                        fact_lineas_rows.append({
+                for estrategia in estrategias_lista:
+                    if estrategia:
+                        # Normalizar nombre
+                        estrategia_norm = estrategia.title()
+                        
+                        fact_estrategias_rows.append({
                             'ID_Actividad': id_actividad,
-                            'Tipo_Estrategia': tipo_estrategia,
-                            'Linea_Estrategica': linea,
-                            'ID_Estrategia': 1 if tipo_estrategia == 'Seguridad' else 
-                                           2 if tipo_estrategia == 'Convivencia' else 3
+                            'Estrategia': estrategia_norm,
+                            'ID_Estrategia': 1 if 'seguridad' in estrategia.lower() else 
+                                           2 if 'convivencia' in estrategia.lower() else 
+                                           3 if 'justicia' in estrategia.lower() else None
                         })
 
-df_fact_lineas = pd.DataFrame(fact_lineas_rows)
-output_path = DIMENSIONES_DIR / "fact_lineas.csv"
-df_fact_lineas.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ fact_lineas.csv generado ({len(df_fact_lineas)} líneas)")
+    return pd.DataFrame(fact_estrategias_rows)
+
 
 # =====================================================================
-# 10. GENERAR bridge_barrios_zonas.csv
+# 9. fact_lineas.csv
 # =====================================================================
-print("\n" + "="*80)
-print("📊 GENERANDO bridge_barrios_zonas.csv")
-print("="*80)
+def construir_fact_lineas(df_actividades):
+    fact_lineas_rows = []
+
+    # Columnas de líneas estratégicas
+    columnas_lineas = {
+        'Seguridad': 'Linea_Seguridad',
+        'Convivencia': 'Linea_Convivencia',
+        'Justicia': 'Linea_Justicia'
+    }
 
-# Usar diccionario oficial
-barrios_por_zona = dict_barrios['barrios_por_zona']
+    for tipo_estrategia, col_linea in columnas_lineas.items():
+        if col_linea in df_actividades.columns:
+            for idx, row in df_actividades.iterrows():
+                id_actividad = row['ID_Actividad']
+                lineas_str = row.get(col_linea, '')
+                
+                if pd.notna(lineas_str) and str(lineas_str).strip() and str(lineas_str) != 'N/A':
+                    # Separar por comas
+                    lineas_lista = [l.strip() for l in str(lineas_str).split(',')]
+                    
+                    for linea in lineas_lista:
+                        if linea and linea != 'N/A':
+                            fact_lineas_rows.append({
+                                'ID_Actividad': id_actividad,
+                                'Tipo_Estrategia': tipo_estrategia,
+                                'Linea_Estrategica': linea,
+                                'ID_Estrategia': 1 if tipo_estrategia == 'Seguridad' else 
+                                               2 if tipo_estrategia == 'Convivencia' else 3
+                            })
 
-bridge_barrios_zonas_rows = []
+    return pd.DataFrame(fact_lineas_rows)
 
-for zona, barrios in barrios_por_zona.items():
-    for barrio in barrios:
-        bridge_barrios_zonas_rows.append({
-            'Barrio': barrio,
-            'Zona': zona,
-            'Fuente': 'Diccionario Oficial'
-        })
 
-# Agregar relaciones de actividades enriquecidas
-if 'Barrio_Extraido' in df_actividades.columns and 'Zona_Enriquecida' in df_actividades.columns:
-    relaciones_actividades = df_actividades[['Barrio_Extraido', 'Zona_Enriquecida']].dropna().drop_duplicates()
-    
-    for _, row in relaciones_actividades.iterrows():
-        barrio = row['Barrio_Extraido']
-        zona = row['Zona_Enriquecida']
-        
-        # Verificar si ya existe
-        existe = any(
-            r['Barrio'].lower().strip() == barrio.lower().strip() and 
-            r['Zona'].lower().strip() == zona.lower().strip() 
-            for r in bridge_barrios_zonas_rows
-        )
-        
-        if not existe:
+# =====================================================================
+# 10. bridge_barrios_zonas.csv
+# =====================================================================
+def construir_bridge_barrios_zonas(df_actividades, dict_barrios):
+    # Usar diccionario oficial
+    barrios_por_zona = dict_barrios['barrios_por_zona']
+
+    bridge_barrios_zonas_rows = []
+
+    for zona, barrios in barrios_por_zona.items():
+        for barrio in barrios:
             bridge_barrios_zonas_rows.append({
                 'Barrio': barrio,
                 'Zona': zona,
-                'Fuente': 'Actividades'
+                'Fuente': 'Diccionario Oficial'
             })
 
-df_bridge_barrios_zonas = pd.DataFrame(bridge_barrios_zonas_rows)
-output_path = DIMENSIONES_DIR / "bridge_barrios_zonas.csv"
-df_bridge_barrios_zonas.to_csv(output_path, index=False, encoding='utf-8-sig')
-print(f"✅ bridge_barrios_zonas.csv generado ({len(df_bridge_barrios_zonas)} relaciones)")
-print(f"   • Del diccionario: {len([r for r in bridge_barrios_zonas_rows if r['Fuente'] == 'Diccionario Oficial'])}")
-print(f"   • De actividades: {len([r for r in bridge_barrios_zonas_rows if r['Fuente'] == 'Actividades'])}")
+    # Agregar relaciones de actividades enriquecidas
+    if 'Barrio_Extraido' in df_actividades.columns and 'Zona_Enriquecida' in df_actividades.columns:
+        relaciones_actividades = df_actividades[['Barrio_Extraido', 'Zona_Enriquecida']].dropna().drop_duplicates()
+        
+        for _, row in relaciones_actividades.iterrows():
+            barrio = row['Barrio_Extraido']
+            zona = row['Zona_Enriquecida']
+            
+            # Verificar si ya existe
+            existe = any(
+                r['Barrio'].lower().strip() == barrio.lower().strip() and 
+                r['Zona'].lower().strip() == zona.lower().strip() 
+                for r in bridge_barrios_zonas_rows
+            )
+            
+            if not existe:
+                bridge_barrios_zonas_rows.append({
+                    'Barrio': barrio,
+                    'Zona': zona,
+                    'Fuente': 'Actividades'
+                })
+
+    return pd.DataFrame(bridge_barrios_zonas_rows)
+
+
+def reportar_tabla(nombre, tabla):
+    """Encabezado y conteo de una tabla generada"""
+    print("\n" + "="*80)
+    print(f"📊 GENERANDO {nombre}")
+    print("="*80)
+
+    if nombre == 'dim_barrios.csv':
+        extraidos = int((tabla['Fuente'] == 'Extraído de Actividades').sum()) if len(tabla) else 0
+        if extraidos > 0:
+            print(f"   📍 {extraidos} barrios adicionales encontrados en actividades")
+
+    print(f"✅ {nombre} generado ({len(tabla)} {UNIDADES[nombre]})")
+
+    if nombre == 'dim_barrios.csv':
+        print(f"   • Oficiales: {int((tabla['Fuente'] == 'Diccionario Oficial').sum()) if len(tabla) else 0}")
+        print(f"   • Extraídos: {extraidos}")
+    elif nombre == 'bridge_barrios_zonas.csv':
+        print(f"   • Del diccionario: {int((tabla['Fuente'] == 'Diccionario Oficial').sum()) if len(tabla) else 0}")
+        print(f"   • De actividades: {int((tabla['Fuente'] == 'Actividades').sum()) if len(tabla) else 0}")
+
+
+def generar_modelo(df_actividades, upz_zonas, dict_barrios, workers=WORKERS):
+    """
+    Etapa en memoria: construye las dimensiones, hechos y puentes del modelo.
+    Las tablas no dependen entre sí y se construyen en paralelo
+    (tareas_paralelas.py); se reportan en el orden de declaración.
+    Retorna (df_actividades con ID_Actividad/ID_Barrio, {archivo: tabla}).
+    """
+    df_actividades = df_actividades.copy()
+
+    # =====================================================================
+    # 2. GENERAR ID_ACTIVIDAD si no existe
+    # =====================================================================
+    if 'ID_Actividad' not in df_actividades.columns:
+        print("\n⚠️  Generando ID_Actividad único...")
+        import hashlib
+        
+        def generar_id(row):
+            # Crear ID único basado en campos clave
+            campos = f"{row.get('Nombre_Actividad', '')}{row.get('Fecha_Actividad', '')}{row.get('Hora_Inicio', '')}{row.get('Direccion_Actividad', '')}"
+            return hashlib.md5(campos.encode()).hexdigest()[:12].upper()
+        
+        df_actividades['ID_Actividad'] = df_actividades.apply(generar_id, axis=1)
+        print(f"✅ ID_Actividad generado para {len(df_actividades)} registros")
+
+    # =====================================================================
+    # 3–10. TABLAS INDEPENDIENTES
+    # =====================================================================
+    tablas, tiempos = ejecutar_tareas([
+        tarea('dim_zonas.csv', construir_dim_zonas),
+        tarea('dim_upz.csv', construir_dim_upz, upz_zonas),
+        tarea('bridge_upz_zonas.csv', construir_bridge_upz_zonas, upz_zonas),
+        tarea('dim_barrios.csv', construir_dim_barrios, df_actividades, dict_barrios),
+        tarea('dim_estrategias.csv', construir_dim_estrategias),
+        tarea('fact_estrategias.csv', construir_fact_estrategias, df_actividades),
+        tarea('fact_lineas.csv', construir_fact_lineas, df_actividades),
+        tarea('bridge_barrios_zonas.csv', construir_bridge_barrios_zonas, df_actividades, dict_barrios),
+    ], workers=workers)
+
+    for nombre, tabla in tablas.items():
+        reportar_tabla(nombre, tabla)
+
+    print("\n⏱️  Tiempo por tabla:")
+    imprimir_tiempos(tiempos)
+
+    # =====================================================================
+    # 11. ACTUALIZAR fact_actividades con ID_Barrio
+    # =====================================================================
+    print("\n" + "="*80)
+    print("📊 ACTUALIZANDO fact_actividades con ID_Barrio")
+    print("="*80)
+
+    df_dim_barrios = tablas['dim_barrios.csv']
+
+    # Crear mapeo barrio → ID_Barrio
+    barrio_to_id = dict(zip(
+        df_dim_barrios['Barrio_Normalizado'],
+        df_dim_barrios['ID_Barrio']
+    ))
+
+    # Agregar columna ID_Barrio
+    if 'Barrio_Extraido' in df_actividades.columns:
+        df_actividades['ID_Barrio'] = df_actividades['Barrio_Extraido'].apply(
+            lambda x: barrio_to_id.get(str(x).lower().strip()) if pd.notna(x) else None
+        )
+        
+        barrios_mapeados = df_actividades['ID_Barrio'].notna().sum()
+        print(f"✅ ID_Barrio asignado a {barrios_mapeados}/{len(df_actividades)} actividades ({barrios_mapeados/len(df_actividades)*100:.1f}%)")
 
-# =====================================================================
-# 11. ACTUALIZAR fact_actividades con ID_Barrio
-# =====================================================================
-print("\n" + "="*80)
-print("📊 ACTUALIZANDO fact_actividades con ID_Barrio")
-print("="*80)
-
-# Crear mapeo barrio → ID_Barrio
-barrio_to_id = dict(zip(
-    df_dim_barrios['Barrio_Normalizado'],
-    df_dim_barrios['ID_Barrio']
-))
-
-# Agregar columna ID_Barrio
-if 'Barrio_Extraido' in df_actividades.columns:
-    df_actividades['ID_Barrio'] = df_actividades['Barrio_Extraido'].apply(
-        lambda x: barrio_to_id.get(str(x).lower().strip()) if pd.notna(x) else None
-    )
-    
-    barrios_mapeados = df_actividades['ID_Barrio'].notna().sum()
-    print(f"✅ ID_Barrio asignado a {barrios_mapeados}/{len(df_actividades)} actividades ({barrios_mapeados/len(df_actividades)*100:.1f}%)")
-    
-    # Guardar fact_actividades actualizado
-    output_path = BASE_DIR / "fact_actividades_enriquecido.csv"
-    df_actividades.to_csv(output_path, index=False, encoding='utf-8-sig')
-    print(f"💾 fact_actividades_enriquecido.csv actualizado con ID_Barrio")
+    return df_actividades, tablas
 
-# =====================================================================
-# 12. RESUMEN FINAL
-# =====================================================================
-print("\n" + "="*80)
-print("📊 RESUMEN DE TABLAS GENERADAS")
-print("="*80)
-
-tablas_generadas = [
-    ("dim_zonas.csv", len(df_dim_zonas)),
-    ("dim_upz.csv", len(df_dim_upz)),
-    ("dim_barrios.csv", len(df_dim_barrios)),
-    ("dim_estrategias.csv", len(df_dim_estrategias)),
-    ("fact_estrategias.csv", len(df_fact_estrategias)),
-    ("fact_lineas.csv", len(df_fact_lineas)),
-    ("bridge_upz_zonas.csv", len(df_bridge_upz_zonas)),
-    ("bridge_barrios_zonas.csv", len(df_bridge_barrios_zonas))
-]
-
-print("\n✅ Archivos creados en dimensiones/:\n")
-for nombre, filas in tablas_generadas:
-    print(f"   📄 {nombre:<30} {filas:>5} registros")
-
-print("\n" + "="*80)
-print("🎉 MODELO DIMENSIONAL COMPLETO GENERADO CON ÉXITO")
-print("="*80)
-print(f"\n📂 Ubicación: {DIMENSIONES_DIR}")
-print("\n🚀 Próximos pasos:")
-print("   1. Revisar archivos en dimensiones/")
-print("   2. Actualizar GitHub Actions")
-print("   3. Importar en Power BI desde GitHub URLs")
-print("="*80)
+
+def guardar_modelo(df_actividades, tablas):
+    """Escribe las tablas en dimensiones/ y el fact con ID_Barrio"""
+    for nombre, tabla in tablas.items():
+        tabla.to_csv(DIMENSIONES_DIR / nombre, index=False, encoding='utf-8-sig')
+
+    if 'ID_Barrio' in df_actividades.columns:
+        output_path = BASE_DIR / "fact_actividades_enriquecido.csv"
+        df_actividades.to_csv(output_path, index=False, encoding='utf-8-sig')
+        print(f"💾 fact_actividades_enriquecido.csv actualizado con ID_Barrio")
+
+
+def imprimir_resumen(tablas):
+    """Conteo de registros por tabla generada"""
+    # =====================================================================
+    # 12. RESUMEN FINAL
+    # =====================================================================
+    print("\n" + "="*80)
+    print("📊 RESUMEN DE TABLAS GENERADAS")
+    print("="*80)
+
+    tablas_generadas = [(nombre, len(tabla)) for nombre, tabla in tablas.items()]
+
+    print("\n✅ Archivos creados en dimensiones/:\n")
+    for nombre, filas in tablas_generadas:
+        print(f"   📄 {nombre:<30} {filas:>5} registros")
+
+    print("\n" + "="*80)
+    print("🎉 MODELO DIMENSIONAL COMPLETO GENERADO CON ÉXITO")
+    print("="*80)
+    print(f"\n📂 Ubicación: {DIMENSIONES_DIR}")
+    print("\n🚀 Próximos pasos:")
+    print("   1. Revisar archivos en dimensiones/")
+    print("   2. Actualizar GitHub Actions")
+    print("   3. Importar en Power BI desde GitHub URLs")
+    print("="*80)
+
+
+def main(argv=None):
+    parser = agregar_argumentos(argparse.ArgumentParser(description='Genera el modelo dimensional completo'))
+    sesion_perfil = sesion_desde_args(parser.parse_args(argv))
+
+    # Crear carpeta si no existe
+    DIMENSIONES_DIR.mkdir(exist_ok=True)
+
+    print("\n" + "="*80)
+    print("🚀 GENERANDO MODELO DIMENSIONAL COMPLETO PARA POWER BI")
+    print("="*80)
+
+    df_actividades = cargar_actividades()
+    with perfil(sesion_perfil, 'generar_modelo'):
+        df_actividades, tablas = generar_modelo(df_actividades, *cargar_diccionarios())
+    with perfil(sesion_perfil, 'guardar_modelo'):
+        guardar_modelo(df_actividades, tablas)
+    imprimir_resumen(tablas)
+    imprimir_sesion(sesion_perfil)
+
+
+if __name__ == "__main__":
+    main()
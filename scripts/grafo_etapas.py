@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ejecución de etapas como grafo con caché por contenido
+Cada nodo declara sus entradas: fuentes (archivos como los diccionarios, o
+valores en memoria como las respuestas de Sheets) y artefactos de etapas
+anteriores. La huella de una etapa es el sha256 de su nombre, la versión de
+su código (contenido de los módulos que la implementan) y las huellas de sus
+entradas; su resultado se guarda en disco con esa huella. Una etapa solo se
+ejecuta si su huella no está en caché, así que cambiar un diccionario
+recalcula las etapas que lo leen y las que dependen de ellas, nada más.
+
+En un proceso de larga vida (modo vigilancia) se puede pasar `memoria`: la
+última versión de cada etapa queda en memoria y se sirve sin leer el disco.
+
+Las etapas servidas desde caché no repiten sus efectos secundarios (reportes
+de auditoría, métricas); las funciones de etapa no deben mutar sus entradas.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import time
+from graphlib import TopologicalSorter
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+CACHE_DIR = Path(os.getenv('CACHE_ETAPAS_DIR', BASE_DIR / '.cache_etapas'))
+
+# Versiones en caché que se conservan por etapa (las más recientes)
+MAX_VERSIONES = int(os.getenv('CACHE_ETAPAS_VERSIONES', '3'))
+
+# Cambiar para invalidar toda la caché (p. ej. al cambiar de versión de pandas)
+VERSION_CACHE = f"1|pandas {pd.__version__}"
+
+
+# =====================================================================
+# DECLARACIÓN DE NODOS
+# =====================================================================
+def fuente_archivo(nombre, ruta, cargar):
+    """Archivo de entrada; la huella es el sha256 de sus bytes (o 'ausente')"""
+    return {'nombre': nombre, 'tipo': 'archivo', 'ruta': Path(ruta), 'cargar': cargar, 'entradas': []}
+
+
+def fuente_valor(nombre, valor):
+    """Valor ya en memoria (DataFrame o JSON serializable)"""
+    return {'nombre': nombre, 'tipo': 'valor', 'valor': valor, 'entradas': []}
+
+
+def etapa(nombre, funcion, entradas, modulos=(), version=''):
+    """
+    funcion(*valores de entradas) → artefacto. La versión de código incluye
+    el módulo de la función más los `modulos` indicados (nombres importables).
+    """
+    return {
+        'nombre': nombre, 'tipo': 'etapa', 'funcion': funcion,
+        'entradas': list(entradas), 'modulos': list(modulos), 'version': version,
+    }
+
+
+# =====================================================================
+# HUELLAS
+# =====================================================================
+def _sha256(*partes):
+    h = hashlib.sha256()
+    for parte in partes:
+        h.update(parte if isinstance(parte, bytes) else str(parte).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def huella_valor(valor):
+    """Huella estable de un DataFrame/Series (contenido + columnas) o de un JSON"""
+    if isinstance(valor, pd.DataFrame):
+        filas = pd.util.hash_pandas_object(valor, index=True).to_numpy()
+        return _sha256(list(valor.columns), list(valor.dtypes.astype(str)), filas.tobytes())
+    if isinstance(valor, pd.Series):
+        return _sha256(valor.name, str(valor.dtype), pd.util.hash_pandas_object(valor).to_numpy().tobytes())
+    return _sha256(json.dumps(valor, sort_keys=True, default=str, ensure_ascii=False))
+
+
+def huella_archivo(ruta):
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return _sha256('ausente', ruta.name)
+    return _sha256(ruta.read_bytes())
+
+
+def version_codigo(nodo):
+    """sha256 del código fuente del módulo de la función y de los módulos declarados"""
+    archivos = {inspect.getsourcefile(nodo['funcion'])}
+    archivos.update(inspect.getsourcefile(importlib.import_module(m)) for m in nodo['modulos'])
+    return _sha256(nodo['version'], *(Path(a).read_bytes() for a in sorted(archivos)))
+
+
+def calcular_huellas(nodos):
+    """Huella de cada nodo en orden topológico (sin ejecutar ninguna etapa)"""
+    por_nombre = {n['nombre']: n for n in nodos}
+    orden = list(TopologicalSorter({n['nombre']: n['entradas'] for n in nodos}).static_order())
+    faltantes = [e for e in orden if e not in por_nombre]
+    if faltantes:
+        raise ValueError(f"Entradas sin nodo declarado: {faltantes}")
+
+    huellas = {}
+    for nombre in orden:
+        nodo = por_nombre[nombre]
+        if nodo['tipo'] == 'archivo':
+            huellas[nombre] = huella_archivo(nodo['ruta'])
+        elif nodo['tipo'] == 'valor':
+            huellas[nombre] = huella_valor(nodo['valor'])
+        else:
+            huellas[nombre] = _sha256(
+                VERSION_CACHE, nombre, version_codigo(nodo), *(huellas[e] for e in nodo['entradas'])
+            )
+    return orden, huellas
+
+
+# =====================================================================
+# CACHÉ
+# =====================================================================
+def _ruta_cache(cache_dir, nombre, huella):
+    return Path(cache_dir) / f"{nombre}-{huella[:24]}.pkl"
+
+
+def _guardar_cache(ruta, valor):
+    """Escritura atómica y poda de versiones antiguas de la misma etapa"""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(ruta.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, ruta)
+
+    nombre = ruta.name.rsplit('-', 1)[0]
+    anteriores = sorted(ruta.parent.glob(f"{nombre}-*.pkl"), key=lambda r: r.stat().st_mtime, reverse=True)
+    for vieja in anteriores[MAX_VERSIONES:]:
+        vieja.unlink(missing_ok=True)
+
+
+# =====================================================================
+# EJECUCIÓN
+# =====================================================================
+def _llamar(nombre, funcion, argumentos):
+    return funcion(*argumentos)
+
+
+def ejecutar_grafo(nodos, objetivos=None, cache_dir=CACHE_DIR, usar_cache=True, ejecutar=_llamar, memoria=None):
+    """
+    Resuelve los `objetivos` (por defecto, las etapas finales). Cada etapa se
+    toma de la caché si su huella ya existe; si no, se ejecuta (resolviendo
+    antes solo las entradas necesarias) y se guarda. `ejecutar(nombre,
+    funcion, argumentos)` envuelve cada ejecución (p. ej. para medirla).
+    `memoria` ({nombre: (huella, valor)}) se consulta antes que el disco y
+    se actualiza con cada etapa resuelta.
+    Retorna ({nombre: valor} de los objetivos, {nombre: (estado, segundos)}).
+    """
+    por_nombre = {n['nombre']: n for n in nodos}
+    orden, huellas = calcular_huellas(nodos)
+    if objetivos is None:
+        usados = {e for n in nodos for e in n['entradas']}
+        objetivos = [n for n in orden if por_nombre[n]['tipo'] == 'etapa' and n not in usados]
+
+    valores = {}
+    registro = {}
+
+    def resolver(nombre):
+        if nombre in valores:
+            return valores[nombre]
+        nodo = por_nombre[nombre]
+        inicio = time.perf_counter()
+
+        if nodo['tipo'] == 'valor':
+            valores[nombre] = nodo['valor']
+            return valores[nombre]
+        if nodo['tipo'] == 'archivo':
+            valores[nombre] = nodo['cargar'](nodo['ruta'])
+            registro[nombre] = ('fuente', time.perf_counter() - inicio)
+            return valores[nombre]
+
+        if memoria is not None and memoria.get(nombre, (None,))[0] == huellas[nombre]:
+            valores[nombre] = memoria[nombre][1]
+            registro[nombre] = ('memoria', time.perf_counter() - inicio)
+            return valores[nombre]
+
+        ruta = _ruta_cache(cache_dir, nombre, huellas[nombre])
+        if usar_cache and ruta.exists():
+            with open(ruta, 'rb') as f:
+                valores[nombre] = pickle.load(f)
+            registro[nombre] = ('caché', time.perf_counter() - inicio)
+            if memoria is not None:
+                memoria[nombre] = (huellas[nombre], valores[nombre])
+            return valores[nombre]
+
+        argumentos = [resolver(e) for e in nodo['entradas']]
+        inicio = time.perf_counter()
+        valores[nombre] = ejecutar(nombre, nodo['funcion'], argumentos)
+        registro[nombre] = ('ejecutada', time.perf_counter() - inicio)
+        if usar_cache:
+            _guardar_cache(ruta, valores[nombre])
+        if memoria is not None:
+            memoria[nombre] = (huellas[nombre], valores[nombre])
+        return valores[nombre]
+
+    for nombre in objetivos:
+        resolver(nombre)
+
+    return {nombre: valores[nombre] for nombre in objetivos}, registro
+
+
+def imprimir_registro(registro, salida=print):
+    """Estado y tiempo de cada nodo resuelto"""
+    iconos = {'ejecutada': '▶️ ', 'caché': '♻️ ', 'memoria': '🧠', 'fuente': '📥'}
+    for nombre, (estado, segundos) in registro.items():
+        salida(f"   {iconos.get(estado, '  ')} {nombre:<30} {estado:<10} {segundos:8.2f} s")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente de claves de negocio ya procesadas
+Guarda el hash de 64 bits de CLAVE_DUPLICADO (Marca_Temporal,
+Email_Responsable, Nombre_Actividad) de cada respuesta en un arreglo uint64
+ordenado (.npy). Así una carga incremental puede descartar respuestas ya
+vistas sin recargar el histórico: la pertenencia de un lote se resuelve con
+búsqueda binaria, en tiempo proporcional al tamaño del lote.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def _texto_clave(serie):
+    """Texto estable entre ejecuciones (fechas en ISO, nulos como '')"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime('%Y-%m-%d %H:%M:%S').fillna('')
+    return serie.astype(object).where(serie.notna(), '').astype(str).str.strip()
+
+
+def hash_claves(df, columnas):
+    """Hash uint64 por fila de la clave compuesta (columna a columna)"""
+    clave = pd.DataFrame({col: _texto_clave(df[col]) for col in columnas})
+    return pd.util.hash_pandas_object(clave, index=False).to_numpy(dtype=np.uint64)
+
+
+def indice_vacio():
+    return np.empty(0, dtype=np.uint64)
+
+
+def cargar_indice(ruta):
+    """Carga el índice (vacío si no existe)"""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return indice_vacio()
+    return np.load(ruta).astype(np.uint64, copy=False)
+
+
+def guardar_indice(indice, ruta):
+    """Escritura atómica: un fallo a mitad no deja el índice corrupto"""
+    ruta = Path(ruta)
+    tmp = ruta.with_name(ruta.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, indice)
+    os.replace(tmp, ruta)
+
+
+def contiene(indice, hashes):
+    """Máscara booleana: qué hashes del lote ya están en el índice"""
+    if len(indice) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    posiciones = np.searchsorted(indice, hashes)
+    posiciones[posiciones == len(indice)] = 0
+    return indice[posiciones] == hashes
+
+
+def agregar(indice, hashes):
+    """Retorna el índice con los hashes nuevos del lote (ordenado, sin repetidos)"""
+    nuevos = np.unique(hashes)
+    nuevos = nuevos[~contiene(indice, nuevos)]
+    if len(nuevos) == 0:
+        return indice
+    return np.sort(np.concatenate([indice, nuevos]), kind='mergesort')
+
+
+def filtrar_nuevos(df, indice, columnas):
+    """
+    Separa un lote en respuestas nuevas y ya vistas (contra el índice y
+    dentro del propio lote, conservando la primera). Retorna
+    (df_nuevos, hashes_nuevos, cantidad_ya_vistas).
+    """
+    hashes = hash_claves(df, columnas)
+    nueva = ~contiene(indice, hashes) & ~pd.Series(hashes).duplicated().to_numpy()
+    return df[nueva], hashes[nueva], int((~nueva).sum())
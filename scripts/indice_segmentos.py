@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice aprendido tramo de vía → barrio/UPZ
+Se construye con las direcciones que ya fueron resueltas por métodos de alta
+precisión (Exacto, Patron) y permite resolver en O(1) direcciones que no
+mencionan el barrio ('Calle 72a bis sur #13-21').
+El índice no se guarda en disco: como el pipeline reprocesa todo el
+histórico, se reconstruye en cada ejecución con las filas resueltas de esa
+misma ejecución (el resultado depende solo de los datos, no de corridas
+anteriores ni de la máquina).
+"""
+
+import hashlib
+
+import pandas as pd
+
+from normalizar_direcciones import clave_segmento
+
+# Solo se aprende de métodos que leen el barrio en la propia dirección
+METODOS_CONFIABLES = ('Exacto', 'Patron')
+
+# Un tramo solo resuelve si tiene suficientes votos y un barrio dominante
+MIN_VOTOS = 2
+MIN_PROPORCION = 0.75
+
+
+def indice_vacio():
+    return {"segmentos": {}}
+
+
+def _huella_fila(direccion, barrio, marca):
+    campos = f"{direccion}|{barrio}|{marca}"
+    return hashlib.md5(campos.encode()).hexdigest()[:16]
+
+
+def actualizar_indice(indice, df, col_direccion='Direccion_Actividad',
+                      col_barrio='Barrio_Extraido', col_upz='UPZ_Enriquecida',
+                      col_metodo='Metodo_Extraccion', col_marca='Marca_Temporal'):
+    """
+    Agrega al índice las filas resueltas por METODOS_CONFIABLES (las filas
+    repetidas de df se cuentan una vez). Retorna el número de filas agregadas.
+    """
+    resueltas = df[df[col_metodo].isin(METODOS_CONFIABLES) & df[col_barrio].notna()]
+    if resueltas.empty:
+        return 0
+
+    ya_indexadas = set()
+    segmentos = indice["segmentos"]
+    marcas = resueltas[col_marca] if col_marca in resueltas.columns else pd.Series('', index=resueltas.index)
+    nuevas = 0
+
+    for direccion, barrio, upz, marca in zip(resueltas[col_direccion], resueltas[col_barrio],
+                                             resueltas[col_upz], marcas):
+        huella = _huella_fila(direccion, barrio, marca)
+        if huella in ya_indexadas:
+            continue
+        ya_indexadas.add(huella)
+
+        clave = clave_segmento(direccion)
+        if clave is None:
+            continue
+
+        barrio = str(barrio).lower().strip()
+        entrada = segmentos.setdefault(clave, {"barrios": {}, "upz": {}})
+        entrada["barrios"][barrio] = entrada["barrios"].get(barrio, 0) + 1
+        if pd.notna(upz) and str(upz).strip():
+            upz = str(upz).strip()
+            entrada["upz"][upz] = entrada["upz"].get(upz, 0) + 1
+        nuevas += 1
+
+    return nuevas
+
+
+def buscar_barrio(indice, direccion, min_votos=MIN_VOTOS, min_proporcion=MIN_PROPORCION):
+    """
+    Busca el tramo de la dirección en el índice.
+    Retorna (barrio, upz) si hay un barrio dominante, si no (None, None).
+    """
+    clave = clave_segmento(direccion)
+    if clave is None:
+        return None, None
+
+    entrada = indice["segmentos"].get(clave)
+    if not entrada:
+        return None, None
+
+    barrio, votos = max(entrada["barrios"].items(), key=lambda item: item[1])
+    total = sum(entrada["barrios"].values())
+    if votos < min_votos or votos / total < min_proporcion:
+        return None, None
+
+    upz = max(entrada["upz"].items(), key=lambda item: item[1])[0] if entrada["upz"] else None
+    return barrio, upz
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentación liviana de la cascada de extracción de barrios
+Por cada método acumula llamadas, aciertos, tiempo total y las latencias
+individuales (para percentiles); además conserva las direcciones más lentas
+de toda la cascada. El resumen se escribe como JSON junto a las salidas.
+"""
+
+import heapq
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Direcciones más lentas que se conservan en el reporte
+MAX_LENTAS = 20
+
+PERCENTILES = (50, 90, 99)
+
+
+def nueva_medicion(metodos, max_lentas=MAX_LENTAS):
+    """Crea el acumulador para los métodos dados (en orden de la cascada)"""
+    return {
+        'metodos': {
+            metodo: {'llamadas': 0, 'aciertos': 0, 'segundos': 0.0, 'latencias': []}
+            for metodo in metodos
+        },
+        'cascada': {'llamadas': 0, 'aciertos': 0, 'segundos': 0.0, 'latencias': []},
+        'lentas': [],
+        'max_lentas': max_lentas,
+        'inicio': time.time(),
+    }
+
+
+def registrar_metodo(medicion, metodo, segundos, acierto):
+    """Registra una llamada a un método de la cascada"""
+    stats = medicion['metodos'].setdefault(
+        metodo, {'llamadas': 0, 'aciertos': 0, 'segundos': 0.0, 'latencias': []}
+    )
+    stats['llamadas'] += 1
+    stats['aciertos'] += int(acierto)
+    stats['segundos'] += segundos
+    stats['latencias'].append(segundos)
+
+
+def registrar_direccion(medicion, direccion, segundos, metodo):
+    """Registra el recorrido completo de una dirección por la cascada"""
+    stats = medicion['cascada']
+    stats['llamadas'] += 1
+    stats['aciertos'] += int(metodo is not None)
+    stats['segundos'] += segundos
+    stats['latencias'].append(segundos)
+
+    # Min-heap de tamaño fijo: la raíz es la más rápida de las lentas
+    entrada = (segundos, str(direccion), metodo or 'Sin resolver')
+    if len(medicion['lentas']) < medicion['max_lentas']:
+        heapq.heappush(medicion['lentas'], entrada)
+    elif segundos > medicion['lentas'][0][0]:
+        heapq.heapreplace(medicion['lentas'], entrada)
+
+
+def _resumir(stats):
+    latencias = np.asarray(stats['latencias'], dtype=float) * 1000
+    resumen = {
+        'llamadas': stats['llamadas'],
+        'aciertos': stats['aciertos'],
+        'tasa_acierto': round(stats['aciertos'] / stats['llamadas'], 4) if stats['llamadas'] else None,
+        'total_ms': round(stats['segundos'] * 1000, 3),
+        'media_ms': round(float(latencias.mean()), 4) if latencias.size else None,
+    }
+    for p in PERCENTILES:
+        resumen[f'p{p}_ms'] = round(float(np.percentile(latencias, p)), 4) if latencias.size else None
+    resumen['max_ms'] = round(float(latencias.max()), 4) if latencias.size else None
+    return resumen
+
+
+def resumen(medicion):
+    """Resumen serializable: por método, cascada completa y direcciones lentas"""
+    metodos = {metodo: _resumir(stats) for metodo, stats in medicion['metodos'].items()}
+    total_metodos = sum(stats['segundos'] for stats in medicion['metodos'].values())
+    for metodo, stats in medicion['metodos'].items():
+        metodos[metodo]['proporcion_tiempo'] = (
+            round(stats['segundos'] / total_metodos, 4) if total_metodos else None
+        )
+
+    return {
+        'generado': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+        'duracion_s': round(time.time() - medicion['inicio'], 3),
+        'cascada': _resumir(medicion['cascada']),
+        'metodos': metodos,
+        'direcciones_lentas': [
+            {'direccion': direccion, 'ms': round(segundos * 1000, 4), 'metodo': metodo}
+            for segundos, direccion, metodo in sorted(medicion['lentas'], reverse=True)
+        ],
+    }
+
+
+def guardar_reporte(medicion, ruta, **extra):
+    """Escribe el resumen como JSON; `extra` agrega campos de contexto"""
+    reporte = resumen(medicion)
+    reporte.update(extra)
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    return reporte
+
+
+def imprimir_resumen(reporte):
+    """Tabla corta por método (el método dominante queda a la vista)"""
+    print(f"   {'Método':<12}{'Llamadas':>10}{'Aciertos':>10}{'Total ms':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for metodo, stats in reporte['metodos'].items():
+        if not stats['llamadas']:
+            continue
+        print(f"   {metodo:<12}{stats['llamadas']:>10}{stats['aciertos']:>10}"
+              f"{stats['total_ms']:>12.1f}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
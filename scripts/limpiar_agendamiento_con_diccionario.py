@@ -2,6 +2,14 @@ import pandas as pd
 import json
 import os
 
+from normalizar_direcciones import canonizar_direcciones
+from casi_duplicados import detectar_casi_duplicados, fusionar_casi_duplicados, UMBRAL_FUSION
+from codigos_territoriales import codificar_upz
+from memoizacion import aplicar_por_valor
+from validacion_zona_upz import (
+    construir_motor, validar, CONFLICTO, UPZ_ZONA_VACIAS, UPZ_VACIA, UPZ_DESCONOCIDA
+)
+
 # -------------------------------------------------------
 # 1) Cargar diccionario UPZ ↔ ZONAS
 # -------------------------------------------------------
@@ -33,63 +41,32 @@ def limpiar_nombre_upz(upz, correcciones):
 # -------------------------------------------------------
 # 3) Asignar zonas según el diccionario
 # -------------------------------------------------------
-def asignar_zonas(codigo_upz, diccionario):
-    codigo_upz = str(codigo_upz).strip()
-
-    if codigo_upz in diccionario:
-        return ", ".join(diccionario[codigo_upz])
-
-    return "SIN ZONA"
+def asignar_zonas(upz, motor):
+    """Zonas de cada UPZ por su código canónico ("SIN ZONA" si no se reconoce)"""
+    codigos = codificar_upz(upz)
+    zonas = pd.Series("SIN ZONA", index=upz.index, dtype=object)
+    conocida = codigos >= 0
+    conocida[conocida] = motor["conocida"][codigos[conocida]]
+    zonas[conocida] = motor["zonas_texto"][codigos[conocida]]
+    return zonas
 
 # -------------------------------------------------------
-# 3B) Validar compatibilidad UPZ ↔ ZONA
+# 4) PROCESO PRINCIPAL
 # -------------------------------------------------------
-def validar_upz_zona(upz, zona, diccionario):
+def limpiar_actividades(df, dicc_upz_zonas=None):
     """
-    Valida que la UPZ y Zona sean compatibles.
-    Retorna: (upz_correcta, zona_correcta, mensaje_error)
+    Etapa en memoria: deduplica, corrige UPZ, asigna y valida zonas.
+    Los reportes de auditoría (duplicados, conflictos, errores) se siguen
+    escribiendo como CSV; el DataFrame limpio se retorna sin tocar disco.
     """
-    # Si no hay UPZ, no podemos validar
-    if pd.isna(upz) or str(upz).strip() == "":
-        if pd.isna(zona) or str(zona).strip() == "":
-            return upz, zona, "UPZ y Zona vacías"
-        return upz, zona, "UPZ vacía pero tiene Zona"
-    
-    upz_str = str(upz).strip()
-    zona_str = str(zona).strip() if not pd.isna(zona) else ""
-    
-    # Buscar UPZ en diccionario
-    if upz_str not in diccionario:
-        return upz, zona, f"UPZ '{upz_str}' no existe en diccionario"
-    
-    # Obtener zonas válidas para esta UPZ
-    zonas_validas = diccionario[upz_str]
-    
-    # Si no hay zona declarada, asignar todas las válidas
-    if not zona_str or zona_str == "":
-        zona_correcta = ", ".join(zonas_validas)
-        return upz, zona_correcta, None
-    
-    # Si hay zona declarada, validar que sea compatible
-    if zona_str in zonas_validas:
-        return upz, zona, None  # Todo correcto
-    else:
-        # CONFLICTO: La zona declarada NO corresponde a la UPZ
-        zona_correcta = ", ".join(zonas_validas)
-        return upz, zona_correcta, f"CONFLICTO: Zona '{zona_str}' no corresponde a UPZ '{upz_str}'. Zonas correctas: {zona_correcta}"
+    if dicc_upz_zonas is None:
+        dicc_upz_zonas = cargar_diccionario()
+    return validar_zonas(depurar_actividades(df), dicc_upz_zonas)
 
-# -------------------------------------------------------
-# 4) PROCESO PRINCIPAL
-# -------------------------------------------------------
-def procesar_archivo():
-    print(">>> Iniciando limpieza del archivo de actividades...")
 
-    # 1. Cargar diccionario
-    dicc_upz_zonas = cargar_diccionario()
-
-    # 2. Cargar archivo original (Google Sheets exportado)
-    df = pd.read_csv("fact_actividades.csv")
-    print(f"📥 Archivo cargado: {df.shape[0]} registros")
+def depurar_actividades(df):
+    """Duplicados, casi-duplicados y nombres de UPZ (no usa el diccionario)"""
+    df = df.copy()
 
     # -------------------------------------------------------
     # 🔥 2.1 DEDUPLICACIÓN (MEJORADO - EXCLUIR VACÍOS)
@@ -118,15 +95,24 @@ def procesar_archivo():
         print(f"  → Registros con información incompleta: {len(registros_incompletos)}")
         
         # PASO 2: Aplicar deduplicación SOLO a registros completos
-        mascara_duplicados = registros_completos.duplicated(subset=columnas_clave, keep=False)
+        # La dirección se compara por su clave canónica ("Cra 10 # 20-30 sur"
+        # y "KR 10 NO 20 30 SUR" son el mismo lugar)
+        registros_completos["_direccion_canonica"] = (
+            canonizar_direcciones(registros_completos["Direccion_Actividad"])["Direccion_Canonica"]
+        )
+        llave_dedup = [c if c != "Direccion_Actividad" else "_direccion_canonica" for c in columnas_clave]
+        mascara_duplicados = registros_completos.duplicated(subset=llave_dedup, keep=False)
         
         if mascara_duplicados.sum() > 0:
-            df_duplicados = registros_completos[mascara_duplicados].copy()
+            df_duplicados = registros_completos[mascara_duplicados].drop(columns=["_direccion_canonica"])
             df_duplicados.to_csv("duplicados_detectados.csv", index=False, encoding="utf-8-sig")
             print(f"⚠ Se detectaron {mascara_duplicados.sum()} registros duplicados")
         
         # PASO 3: Eliminar duplicados (mantener el primero)
-        registros_completos = registros_completos.drop_duplicates(subset=columnas_clave, keep="first")
+        registros_completos = (
+            registros_completos.drop_duplicates(subset=llave_dedup, keep="first")
+            .drop(columns=["_direccion_canonica"])
+        )
         
         # PASO 4: Recombinar registros completos (sin duplicados) + incompletos
         df = pd.concat([registros_completos, registros_incompletos], ignore_index=True)
@@ -143,6 +129,28 @@ def procesar_archivo():
         faltantes = [col for col in columnas_clave if col not in df.columns]
         print(f"⚠ No fue posible aplicar deduplicación: faltan columnas {faltantes}")
 
+    # -------------------------------------------------------
+    # 🔎 2.2 CASI-DUPLICADOS (mismo día, hora y lugar; nombre parecido)
+    # -------------------------------------------------------
+    columnas_bloque = ["Nombre_Actividad", "Direccion_Actividad", "Fecha_Actividad", "Hora_Inicio"]
+
+    if all(col in df.columns for col in columnas_bloque):
+        print("🔎 Buscando casi-duplicados...")
+        umbral_fusion = os.getenv("UMBRAL_FUSION_CASI_DUPLICADOS")
+        umbral_fusion = float(umbral_fusion) if umbral_fusion else UMBRAL_FUSION
+        pares = detectar_casi_duplicados(df, umbral_fusion=umbral_fusion)
+
+        if len(pares) > 0:
+            pares.to_csv("casi_duplicados_detectados.csv", index=False, encoding="utf-8-sig")
+            print(f"⚠ {len(pares)} pares candidatos. Archivo: casi_duplicados_detectados.csv")
+
+            antes = df.shape[0]
+            df = fusionar_casi_duplicados(df, pares)
+            if df.shape[0] < antes:
+                print(f"✓ {antes - df.shape[0]} casi-duplicados fusionados (similitud ≥ {umbral_fusion})")
+        else:
+            print("✓ Sin casi-duplicados")
+
     # -------------------------------------------------------
     # 3. Limpiar UPZ
     # -------------------------------------------------------
@@ -150,10 +158,18 @@ def procesar_archivo():
 
     if "Nombre_UPZ" in df.columns:
         correcciones = {}
-        df["Nombre_UPZ"] = df["Nombre_UPZ"].apply(lambda x: limpiar_nombre_upz(x, correcciones))
+        df["Nombre_UPZ"] = aplicar_por_valor(df["Nombre_UPZ"], limpiar_nombre_upz, correcciones)
     else:
         print("⚠ No se encontró columna 'Nombre_UPZ'")
 
+    return df
+
+
+def validar_zonas(df, dicc_upz_zonas):
+    """Asigna zonas y valida/corrige UPZ ↔ Zona con el diccionario"""
+    df = df.copy()
+    motor = construir_motor(dicc_upz_zonas)
+
     # -------------------------------------------------------
     # 4. Asignar zonas (CORREGIDO)
     # -------------------------------------------------------
@@ -167,7 +183,7 @@ def procesar_archivo():
         col_upz = "Nombre_UPZ"
 
     if col_upz:
-        df["Zonas_Asignadas"] = df[col_upz].apply(lambda x: asignar_zonas(x, dicc_upz_zonas))
+        df["Zonas_Asignadas"] = asignar_zonas(df[col_upz], motor)
         print(f"  → Usando columna: {col_upz}")
     else:
         print("⚠ No se encontró columna de UPZ, asignando 'SIN ZONA'")
@@ -187,44 +203,52 @@ def procesar_archivo():
     correcciones_count = 0
 
     if tiene_nombre and tiene_zona:
-        for i, row in df.iterrows():
-            upz = row.get("Nombre_UPZ", "")
-            zona = row.get("Zona", "")
-            
-            upz_correcta, zona_correcta, error = validar_upz_zona(upz, zona, dicc_upz_zonas)
-            
-            if error:
-                if "CONFLICTO" in error:
-                    conflictos.append({
-                        "Fila": i + 1,
-                        "UPZ_Original": upz,
-                        "Zona_Original": zona,
-                        "Zona_Correcta": zona_correcta,
-                        "Error": error
-                    })
-                    # CORREGIR automáticamente
-                    df.at[i, "Zona"] = zona_correcta
-                    df.at[i, "Zonas_Asignadas"] = zona_correcta
-                    correcciones_count += 1
-                else:
-                    errores.append({
-                        "Fila": i + 1,
-                        "UPZ": upz,
-                        "Zona": zona,
-                        "Error": error
-                    })
+        # Matriz de compatibilidad UPZ × Zona: una sola pasada vectorizada
+        resultado = validar(df["Nombre_UPZ"], df["Zona"], motor)
+        estado = resultado["Estado"]
+        zona_correcta = resultado["Zona_Correcta"]
+        fila = pd.Series(df.index + 1, index=df.index)
+        upz_txt = df["Nombre_UPZ"].astype(str).str.strip()
+        zona_txt = df["Zona"].fillna("").astype(str).str.strip()
+
+        es_conflicto = estado == CONFLICTO
+        conflictos = pd.DataFrame({
+            "Fila": fila[es_conflicto],
+            "UPZ_Original": df.loc[es_conflicto, "Nombre_UPZ"],
+            "Zona_Original": df.loc[es_conflicto, "Zona"],
+            "Zona_Correcta": zona_correcta[es_conflicto],
+            "Error": (
+                "CONFLICTO: Zona '" + zona_txt + "' no corresponde a UPZ '" + upz_txt
+                + "'. Zonas correctas: " + zona_correcta.fillna("")
+            )[es_conflicto],
+        })
+        # CORREGIR automáticamente
+        df.loc[es_conflicto, "Zona"] = zona_correcta[es_conflicto]
+        df.loc[es_conflicto, "Zonas_Asignadas"] = zona_correcta[es_conflicto]
+        correcciones_count = int(es_conflicto.sum())
+
+        mensajes_error = pd.Series(None, index=df.index, dtype=object)
+        mensajes_error[estado == UPZ_ZONA_VACIAS] = "UPZ y Zona vacías"
+        mensajes_error[estado == UPZ_VACIA] = "UPZ vacía pero tiene Zona"
+        desconocida = estado == UPZ_DESCONOCIDA
+        mensajes_error[desconocida] = "UPZ '" + upz_txt[desconocida] + "' no existe en diccionario"
+        es_error = mensajes_error.notna()
+        errores = pd.DataFrame({
+            "Fila": fila[es_error],
+            "UPZ": df.loc[es_error, "Nombre_UPZ"],
+            "Zona": df.loc[es_error, "Zona"],
+            "Error": mensajes_error[es_error],
+        })
         
         # Exportar conflictos detectados
         if len(conflictos) > 0:
-            df_conflictos = pd.DataFrame(conflictos)
-            df_conflictos.to_csv("conflictos_upz_zona.csv", index=False, encoding="utf-8-sig")
+            conflictos.to_csv("conflictos_upz_zona.csv", index=False, encoding="utf-8-sig")
             print(f"⚠ Se detectaron {len(conflictos)} conflictos UPZ-Zona. Archivo: conflictos_upz_zona.csv")
             print(f"✓ {correcciones_count} zonas corregidas automáticamente")
         
         # Exportar errores (UPZ vacías, etc.)
         if len(errores) > 0:
-            df_err = pd.DataFrame(errores)
-            df_err.to_csv("errores_upz.csv", index=False, encoding="utf-8-sig")
+            errores.to_csv("errores_upz.csv", index=False, encoding="utf-8-sig")
             print(f"⚠ Se detectaron {len(errores)} errores de UPZ. Archivo: errores_upz.csv")
         
         if len(conflictos) == 0 and len(errores) == 0:
@@ -233,6 +257,30 @@ def procesar_archivo():
     else:
         print("⚠ No hay columnas suficientes para validar UPZ ↔ Zona")
 
+    return df
+
+
+def leer_actividades(ruta="fact_actividades.csv"):
+    """
+    fact_actividades.csv tal como esté en disco: run_pipeline.py lo escribe
+    con ';' y los scripts sueltos (mapear_columnas.py) con ','. El separador
+    se toma del encabezado.
+    """
+    with open(ruta, "r", encoding="utf-8-sig") as f:
+        encabezado = f.readline()
+    sep = ";" if encabezado.count(";") > encabezado.count(",") else ","
+    return pd.read_csv(ruta, sep=sep, encoding="utf-8-sig")
+
+
+def procesar_archivo():
+    print(">>> Iniciando limpieza del archivo de actividades...")
+
+    # Cargar archivo original (Google Sheets exportado)
+    df = leer_actividades()
+    print(f"📥 Archivo cargado: {df.shape[0]} registros")
+
+    df = limpiar_actividades(df)
+
     # -------------------------------------------------------
     # EXPORT FINAL
     # -------------------------------------------------------
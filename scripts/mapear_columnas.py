@@ -45,6 +45,7 @@ MAPEO_COLUMNAS = {
     "8. UPZ a la Que Pertenece la Actividad": "Nombre_UPZ",
     "UPZ a la Que Pertenece la Actividad": "Nombre_UPZ",
     "Nombre_UPZ.1": "Nombre_UPZ",  # ← AGREGAR ESTA
+    "UPZ": "Nombre_UPZ",  # fact_actividades.csv de run_pipeline.py
     "9. Zona a la que Pertenece la Actividad": "Zona",
     "Zona a la que Pertenece la Actividad": "Zona",
     "Zona.1": "Zona",  # ← AGREGAR ESTA
@@ -86,14 +87,10 @@ MAPEO_COLUMNAS = {
 # ============================
 #   FUNCIÓN PRINCIPAL
 # ============================
-def mapear_columnas_sheets():
+def estandarizar_columnas(df):
     """
-    Lee fact_actividades.csv y renombra las columnas según el mapeo
+    Etapa en memoria: renombra las columnas según el mapeo
     """
-    print(">>> Mapeando nombres de columnas...")
-    
-    # Leer archivo
-    df = pd.read_csv("fact_actividades.csv")
     print(f"📊 Registros antes del mapeo: {len(df)}")
     print(f"📋 Columnas antes: {len(df.columns)}")
     
@@ -117,11 +114,24 @@ def mapear_columnas_sheets():
         if len(columnas_cambiadas) > 5:
             print(f"  ... y {len(columnas_cambiadas) - 5} más")
     
+    print(f"📋 Columnas después: {len(df_renamed.columns)}")
+    return df_renamed
+
+
+def mapear_columnas_sheets():
+    """
+    Lee fact_actividades.csv y renombra las columnas según el mapeo
+    """
+    print(">>> Mapeando nombres de columnas...")
+    
+    # Leer archivo
+    df = pd.read_csv("fact_actividades.csv")
+    df_renamed = estandarizar_columnas(df)
+    
     # Guardar archivo mapeado
     df_renamed.to_csv("fact_actividades.csv", index=False, encoding="utf-8-sig")
     
     print(f"✓ Archivo guardado con columnas estandarizadas")
-    print(f"📋 Columnas después: {len(df_renamed.columns)}")
     
     return df_renamed
 
@@ -5,135 +5,170 @@ Mejora la extracción de barrios usando UPZ/Zona cuando no hay barrio en direcci
 """
 
 import pandas as pd
-import json
 from pathlib import Path
 
+from nomenclator import cargar_nomenclator
+from codigos_territoriales import DESCONOCIDO, cargar_tablas, codificar_upz, codificar_zona
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 FACT_FILE = BASE_DIR / "fact_actividades_enriquecido.csv"
 DICT_BARRIOS = BASE_DIR / "scripts" / "diccionario_barrios_completo.json"
 
-print("\n" + "="*80)
-print("🔧 MEJORANDO EXTRACCIÓN DE BARRIOS USANDO UPZ/ZONA")
-print("="*80)
-
-# Cargar datos
-df = pd.read_csv(FACT_FILE, encoding='utf-8', sep=';')
-print(f"✅ Cargadas {len(df)} actividades")
-
-with open(DICT_BARRIOS, 'r', encoding='utf-8') as f:
-    dict_barrios = json.load(f)
-
-barrios_por_upz = dict_barrios['barrios_por_upz']
-barrios_por_zona = dict_barrios['barrios_por_zona']
-
-# Análisis inicial
-sin_barrio = df['Barrio_Extraido'].isna().sum()
-print(f"⚠️  Actividades sin barrio: {sin_barrio}/{len(df)} ({sin_barrio/len(df)*100:.1f}%)")
-
 # =====================================================================
 # ESTRATEGIA DE ASIGNACIÓN
 # =====================================================================
-print("\n📋 Aplicando estrategias de asignación...")
-
-asignaciones = {
-    'upz_unico': 0,
-    'zona_upz': 0,
-    'zona_unica': 0,
-    'sin_asignar': 0
-}
-
-for idx, row in df.iterrows():
-    # Si ya tiene barrio, continuar
-    if pd.notna(row['Barrio_Extraido']):
-        continue
-    
-    upz = row.get('UPZ_Enriquecida') or row.get('Nombre_UPZ')
-    zona = row.get('Zona_Enriquecida') or row.get('Zona')
-    
-    # Normalizar UPZ (manejo de mayúsculas)
-    if pd.notna(upz):
-        upz_norm = None
-        for upz_key in barrios_por_upz.keys():
-            if upz.upper() in upz_key.upper():
-                upz_norm = upz_key
-                break
-    else:
-        upz_norm = None
+
+def asignar_por_claves(upz_key, zona_key, barrios_por_upz, barrios_por_zona):
+    """
+    Aplica las estrategias en orden para un par (UPZ, Zona).
+    Retorna (barrio, metodo, observacion, estrategia).
+    """
+    barrios_upz = barrios_por_upz.get(upz_key, [])
+    barrios_zona = barrios_por_zona.get(zona_key, [])
     
     # ESTRATEGIA 1: UPZ con un solo barrio principal
-    if upz_norm and upz_norm in barrios_por_upz:
-        barrios = barrios_por_upz[upz_norm]
-        if len(barrios) == 1:
-            df.at[idx, 'Barrio_Extraido'] = barrios[0]
-            df.at[idx, 'Metodo_Extraccion'] = 'UPZ Único'
-            asignaciones['upz_unico'] += 1
-            continue
+    if len(barrios_upz) == 1:
+        return barrios_upz[0], 'UPZ Único', None, 'upz_unico'
     
     # ESTRATEGIA 2: Cruce Zona-UPZ (barrio más común)
-    if pd.notna(zona) and upz_norm:
-        # Obtener barrios de la zona
-        zona_norm = f"ZONA {zona.split()[-1]}" if 'zona' not in zona.lower() else zona.upper()
-        barrios_zona = barrios_por_zona.get(zona_norm, [])
-        
-        # Filtrar por UPZ
-        barrios_upz = barrios_por_upz.get(upz_norm, [])
-        
-        # Intersección
-        barrios_comunes = [b for b in barrios_zona if b in barrios_upz]
-        
+    if upz_key and zona_key:
+        barrios_upz_set = set(barrios_upz)
+        barrios_comunes = [b for b in barrios_zona if b in barrios_upz_set]
         if len(barrios_comunes) == 1:
-            df.at[idx, 'Barrio_Extraido'] = barrios_comunes[0]
-            df.at[idx, 'Metodo_Extraccion'] = 'Zona-UPZ'
-            asignaciones['zona_upz'] += 1
-            continue
+            return barrios_comunes[0], 'Zona-UPZ', None, 'zona_upz'
         elif len(barrios_comunes) > 1:
             # Tomar el primero (más representativo)
-            df.at[idx, 'Barrio_Extraido'] = barrios_comunes[0]
-            df.at[idx, 'Metodo_Extraccion'] = 'Zona-UPZ (Múltiple)'
-            df.at[idx, 'Observaciones'] = f"Posibles: {', '.join(barrios_comunes[:3])}"
-            asignaciones['zona_upz'] += 1
-            continue
+            return (barrios_comunes[0], 'Zona-UPZ (Múltiple)',
+                    f"Posibles: {', '.join(barrios_comunes[:3])}", 'zona_upz')
     
     # ESTRATEGIA 3: Solo zona (barrio más representativo)
-    if pd.notna(zona):
-        zona_norm = f"ZONA {zona.split()[-1]}" if 'zona' not in zona.lower() else zona.upper()
-        barrios_zona = barrios_por_zona.get(zona_norm, [])
-        
-        if len(barrios_zona) == 1:
-            df.at[idx, 'Barrio_Extraido'] = barrios_zona[0]
-            df.at[idx, 'Metodo_Extraccion'] = 'Zona Única'
-            asignaciones['zona_unica'] += 1
-            continue
+    if len(barrios_zona) == 1:
+        return barrios_zona[0], 'Zona Única', None, 'zona_unica'
     
-    # No se pudo asignar
-    asignaciones['sin_asignar'] += 1
-
-# =====================================================================
-# RESULTADOS
-# =====================================================================
-print("\n" + "="*80)
-print("📊 RESULTADOS DE MEJORA")
-print("="*80)
-
-barrios_final = df['Barrio_Extraido'].notna().sum()
-print(f"\n✅ Barrios totales: {barrios_final}/{len(df)} ({barrios_final/len(df)*100:.1f}%)")
-print(f"   📈 Mejora: +{barrios_final - (len(df) - sin_barrio)} barrios")
-
-print("\n📋 Por estrategia de asignación:")
-for estrategia, count in asignaciones.items():
-    if count > 0:
-        print(f"   {estrategia}: {count} ({count/len(df)*100:.1f}%)")
-
-print("\n📋 Por método de extracción (todos):")
-metodos = df['Metodo_Extraccion'].value_counts()
-for metodo, count in metodos.items():
-    print(f"   {metodo}: {count} ({count/len(df)*100:.1f}%)")
-
-# Guardar
-output_file = BASE_DIR / "fact_actividades_enriquecido.csv"
-df.to_csv(output_file, index=False, encoding='utf-8')
-print(f"\n💾 Guardado: {output_file}")
-
-print("\n" + "="*80)
-print("✅ MEJORA COMPLETADA")
-print("="*80)
+    return None, None, None, 'sin_asignar'
+
+
+def primera_columna(df, col_a, col_b):
+    """Equivale a row.get(col_a) or row.get(col_b)"""
+    a = df[col_a] if col_a in df.columns else pd.Series(None, index=df.index, dtype=object)
+    if col_b not in df.columns:
+        return a
+    return a.where(a.notna() & (a.astype(str) != ''), df[col_b])
+
+
+def construir_tabla_asignacion(nomenclator):
+    """
+    Tabla precalculada sobre todos los pares (código UPZ, código zona)
+    (DESCONOCIDO = sin UPZ / sin zona reconocida)
+    """
+    barrios_por_upz = nomenclator['barrios_por_upz']
+    barrios_por_zona = nomenclator['barrios_por_zona']
+
+    # Código canónico → etiqueta del diccionario ('32 - SAN BLAS', 'ZONA 3')
+    tablas = cargar_tablas()
+    etiqueta_upz = tablas['etiqueta_upz']
+    etiqueta_zona = tablas['etiqueta_zona']
+
+    return pd.DataFrame(
+        [
+            (cod_upz, cod_zona, *asignar_por_claves(etiqueta_upz.get(cod_upz, ''), etiqueta_zona.get(cod_zona, ''),
+                                                    barrios_por_upz, barrios_por_zona))
+            for cod_upz in [DESCONOCIDO] + list(etiqueta_upz)
+            for cod_zona in [DESCONOCIDO] + list(etiqueta_zona)
+        ],
+        columns=['_upz_codigo', '_zona_codigo', '_barrio', '_metodo', '_observacion', '_estrategia'],
+    ).astype({'_upz_codigo': 'int8', '_zona_codigo': 'int8'})
+
+
+def mejorar_extraccion(df):
+    """
+    Etapa en memoria: asigna barrio por UPZ/Zona a las filas que no lo
+    tienen. Retorna el DataFrame actualizado.
+    """
+    df = df.copy()
+    tabla_asignacion = construir_tabla_asignacion(cargar_nomenclator(DICT_BARRIOS))
+
+    # Análisis inicial
+    sin_barrio = df['Barrio_Extraido'].isna().sum()
+    print(f"⚠️  Actividades sin barrio: {sin_barrio}/{len(df)} ({sin_barrio/len(df)*100:.1f}%)")
+
+    print("\n📋 Aplicando estrategias de asignación...")
+
+    sin_barrio_mask = df['Barrio_Extraido'].isna()
+    pendientes = df.loc[sin_barrio_mask]
+
+    # Códigos canónicos (cada valor distinto de UPZ/Zona se resuelve una sola vez);
+    # vacío y desconocido usan la misma fila de la tabla
+    upz = primera_columna(pendientes, 'UPZ_Enriquecida', 'Nombre_UPZ')
+    zona = primera_columna(pendientes, 'Zona_Enriquecida', 'Zona')
+    claves = pd.DataFrame({
+        '_upz_codigo': codificar_upz(upz).clip(min=DESCONOCIDO),
+        '_zona_codigo': codificar_zona(zona).clip(min=DESCONOCIDO),
+    }, index=pendientes.index)
+
+    asignado = (
+        claves.reset_index()
+        .merge(tabla_asignacion, on=['_upz_codigo', '_zona_codigo'], how='left')
+        .set_index(claves.index.name or 'index')
+    )
+
+    con_barrio = asignado['_barrio'].notna()
+    filas = asignado.index[con_barrio]
+    df.loc[filas, 'Barrio_Extraido'] = asignado.loc[filas, '_barrio']
+    df.loc[filas, 'Metodo_Extraccion'] = asignado.loc[filas, '_metodo']
+    con_observacion = asignado['_observacion'].notna()
+    df.loc[asignado.index[con_observacion], 'Observaciones'] = asignado.loc[con_observacion, '_observacion']
+
+    conteo = asignado['_estrategia'].value_counts()
+    asignaciones = {
+        estrategia: int(conteo.get(estrategia, 0))
+        for estrategia in ('upz_unico', 'zona_upz', 'zona_unica', 'sin_asignar')
+    }
+
+    # =====================================================================
+    # RESULTADOS
+    # =====================================================================
+    print("\n" + "="*80)
+    print("📊 RESULTADOS DE MEJORA")
+    print("="*80)
+
+    barrios_final = df['Barrio_Extraido'].notna().sum()
+    print(f"\n✅ Barrios totales: {barrios_final}/{len(df)} ({barrios_final/len(df)*100:.1f}%)")
+    print(f"   📈 Mejora: +{barrios_final - (len(df) - sin_barrio)} barrios")
+
+    print("\n📋 Por estrategia de asignación:")
+    for estrategia, count in asignaciones.items():
+        if count > 0:
+            print(f"   {estrategia}: {count} ({count/len(df)*100:.1f}%)")
+
+    print("\n📋 Por método de extracción (todos):")
+    metodos = df['Metodo_Extraccion'].value_counts()
+    for metodo, count in metodos.items():
+        print(f"   {metodo}: {count} ({count/len(df)*100:.1f}%)")
+
+    return df
+
+
+def main():
+    print("\n" + "="*80)
+    print("🔧 MEJORANDO EXTRACCIÓN DE BARRIOS USANDO UPZ/ZONA")
+    print("="*80)
+
+    # Cargar datos
+    df = pd.read_csv(FACT_FILE, encoding='utf-8', sep=';')
+    print(f"✅ Cargadas {len(df)} actividades")
+
+    df = mejorar_extraccion(df)
+
+    # Guardar
+    output_file = BASE_DIR / "fact_actividades_enriquecido.csv"
+    df.to_csv(output_file, index=False, encoding='utf-8')
+    print(f"\n💾 Guardado: {output_file}")
+
+    print("\n" + "="*80)
+    print("✅ MEJORA COMPLETADA")
+    print("="*80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Apply memoizado por valor distinto
+Las columnas del agendamiento (UPZ, zona, estado...) tienen pocas decenas de
+valores distintos repetidos en miles de filas. aplicar_por_valor ejecuta una
+transformación escalar una sola vez por valor (factorize → apply → take) y
+devuelve el mismo resultado que Series.apply.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def aplicar_por_valor(serie, funcion, *args, **kwargs):
+    """
+    Equivale a serie.apply(lambda x: funcion(x, *args, **kwargs)), pero
+    llamando a `funcion` una vez por valor distinto (los nulos incluidos,
+    con el primer nulo de la serie como argumento).
+    """
+    if not isinstance(serie, pd.Series):
+        serie = pd.Series(serie)
+    codigos, unicos = pd.factorize(serie)
+    resultados = [funcion(valor, *args, **kwargs) for valor in unicos]
+
+    nulos = codigos == -1
+    if nulos.any():
+        resultados.append(funcion(serie[nulos].iloc[0], *args, **kwargs))
+        codigos = np.where(nulos, len(resultados) - 1, codigos)
+
+    tabla = pd.Series(resultados, dtype=None if resultados else object)
+    resultado = tabla.take(codigos)
+    resultado.index = serie.index
+    resultado.name = serie.name
+    return resultado
+
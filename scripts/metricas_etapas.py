@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas por etapa del pipeline
+Cada etapa se mide con `medir(metricas, nombre)`. Se registran:
+  - tiempo de reloj y de CPU
+  - filas de entrada y de salida (de entrada solo cuentan los DataFrames
+    que recibe la etapa: los dicts de dimensiones o tablas son de consulta)
+  - pico de RSS del proceso (siempre; es una sola llamada a getrusage)
+  - bytes escritos
+  - pico de memoria de Python por etapa (tracemalloc, sobre la memoria al
+    iniciar la etapa), solo con METRICAS_TRACEMALLOC=1: tracemalloc encarece
+    cada asignación y hace el pipeline varias veces más lento
+Cada ejecución agrega una línea JSON a pipeline_metrics.jsonl. Con ese
+historial se ve qué etapa se degrada a medida que crecen las hojas.
+
+Con POOL_DIMENSIONES=procesos el CPU y la memoria de los workers no se cuentan.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICAS_FILE = os.getenv('METRICAS_FILE', 'pipeline_metrics.jsonl')
+
+# Opcional: tracemalloc agrega costo a cada asignación (5x más lento en una
+# corrida de 5k filas); METRICAS_TRACEMALLOC=1 lo activa para diagnosticar
+USAR_TRACEMALLOC = os.getenv('METRICAS_TRACEMALLOC', '0') == '1'
+
+MB = 1024 * 1024
+
+
+def nuevas_metricas():
+    """Acumulador de una ejecución (inicia tracemalloc si corresponde)"""
+    if USAR_TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return {
+        'inicio': datetime.now().isoformat(timespec='seconds'),
+        'reloj': time.perf_counter(),
+        'cpu': time.process_time(),
+        'etapas': [],
+    }
+
+
+def contar_filas(valor):
+    """Filas de un DataFrame, o suma de las filas de los DataFrames de un dict/lista"""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return len(valor)
+    if isinstance(valor, dict):
+        partes = valor.values()
+    elif isinstance(valor, (list, tuple)):
+        partes = valor
+    else:
+        return None
+    conteos = [c for c in map(contar_filas, partes) if c is not None]
+    return sum(conteos) if conteos else None
+
+
+def entradas_principales(argumentos):
+    """
+    Argumentos de una etapa que cuentan como filas de entrada: los DataFrames.
+    crear_tabla_hechos(actividades, dimensiones) procesa las actividades; las
+    filas de las dimensiones no deben inflar el rendimiento (filas/s).
+    """
+    return [a for a in argumentos if isinstance(a, (pd.DataFrame, pd.Series))]
+
+
+def rss_pico_mb():
+    """Máximo RSS del proceso hasta ahora (KB en Linux, bytes en macOS)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (MB if sys.platform == 'darwin' else 1024), 1)
+
+
+@contextmanager
+def medir(metricas, etapa, entrada=None):
+    """
+    Mide el bloque como una etapa. El bloque puede completar
+    registro['filas_salida'] y registro['bytes_escritos'].
+    """
+    registro = {
+        'etapa': etapa,
+        'estado': 'ejecutada',
+        'filas_entrada': contar_filas(entrada),
+        'filas_salida': None,
+        'bytes_escritos': 0,
+    }
+    memoria_inicial = 0
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+    reloj, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield registro
+    finally:
+        registro['reloj_s'] = round(time.perf_counter() - reloj, 4)
+        registro['cpu_s'] = round(time.process_time() - cpu, 4)
+        registro['memoria_pico_mb'] = (
+            round((tracemalloc.get_traced_memory()[1] - memoria_inicial) / MB, 2)
+            if tracemalloc.is_tracing() else None
+        )
+        registro['rss_pico_mb'] = rss_pico_mb()
+        metricas['etapas'].append(registro)
+
+
+def ejecutor(metricas):
+    """Para ejecutar_grafo(ejecutar=...): mide cada etapa que se ejecuta"""
+    def ejecutar(nombre, funcion, argumentos):
+        with medir(metricas, nombre, entradas_principales(argumentos)) as registro:
+            valor = funcion(*argumentos)
+            registro['filas_salida'] = contar_filas(valor)
+        return valor
+    return ejecutar
+
+
+def registrar_cache(metricas, registro_grafo):
+    """Etapas servidas desde caché o memoria (solo tiempo de lectura)"""
+    for nombre, (estado, segundos) in registro_grafo.items():
+        if estado in ('caché', 'memoria'):
+            metricas['etapas'].append({'etapa': nombre, 'estado': estado, 'reloj_s': round(segundos, 4)})
+
+
+def cerrar_metricas(metricas, estado, ruta=METRICAS_FILE, **extra):
+    """Agrega la línea de la ejecución al historial JSONL y la retorna"""
+    linea = {
+        'inicio': metricas['inicio'],
+        'estado': estado,
+        'reloj_s': round(time.perf_counter() - metricas['reloj'], 4),
+        'cpu_s': round(time.process_time() - metricas['cpu'], 4),
+        'rss_pico_mb': rss_pico_mb(),
+        **extra,
+        'etapas': metricas['etapas'],
+    }
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(linea, ensure_ascii=False, default=str) + '\n')
+    return linea
+
+
+def imprimir_metricas(linea, salida=print):
+    """Tabla corta por etapa"""
+    salida(f"   {'Etapa':<24}{'Estado':<11}{'Reloj s':>9}{'CPU s':>9}{'Filas ent':>11}"
+           f"{'Filas sal':>11}{'Mem MB':>9}{'Bytes':>12}")
+    for e in linea['etapas']:
+        def celda(clave, ancho, formato=''):
+            valor = e.get(clave)
+            return f"{'-' if valor is None else format(valor, formato):>{ancho}}"
+        salida(f"   {e['etapa']:<24}{e['estado']:<11}{celda('reloj_s', 9, '.3f')}{celda('cpu_s', 9, '.3f')}"
+               f"{celda('filas_entrada', 11)}{celda('filas_salida', 11)}"
+               f"{celda('memoria_pico_mb', 9, '.1f')}{celda('bytes_escritos', 12)}")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Nomenclátor compilado de barrios (artefacto binario versionado)
+Se genera desde diccionario_barrios_completo.json y contiene, ya derivados:
+  - nombres normalizados y códigos enteros de barrio, UPZ y zona
+  - arreglos barrio → UPZ y barrio → zonas
+  - autómata Aho-Corasick para la búsqueda exacta en direcciones
+  - índice por longitud para la búsqueda aproximada (get_close_matches)
+  - palabras de los barrios compuestos y tablas de zona por (UPZ, barrio)
+La carga es perezosa y se valida contra el mtime/hash del JSON fuente, así
+los consumidores no recalculan nada al importar.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import pickle
+from collections import deque
+from difflib import get_close_matches
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DICT_FILE = BASE_DIR / "scripts" / "diccionario_barrios_completo.json"
+ARTEFACTO_FILE = BASE_DIR / "scripts" / "nomenclator_barrios.pkl"
+
+VERSION_NOMENCLATOR = 1
+
+_cache = {}
+
+
+# =====================================================================
+# COMPILACIÓN
+# =====================================================================
+def _compilar_automata(nombres):
+    """
+    Aho-Corasick sobre los nombres. Para cada estado guarda el menor id de
+    barrio reconocido (incluyendo los heredados por enlaces de falla), que es
+    lo que necesita la búsqueda exacta: el primer barrio de la lista que
+    aparece en la dirección.
+    """
+    transiciones = [{}]
+    mejor = [-1]
+    for id_barrio, nombre in enumerate(nombres):
+        estado = 0
+        for caracter in nombre:
+            siguiente = transiciones[estado].get(caracter)
+            if siguiente is None:
+                siguiente = len(transiciones)
+                transiciones[estado][caracter] = siguiente
+                transiciones.append({})
+                mejor.append(-1)
+            estado = siguiente
+        if mejor[estado] == -1 or id_barrio < mejor[estado]:
+            mejor[estado] = id_barrio
+
+    falla = [0] * len(transiciones)
+    cola = deque(transiciones[0].values())
+    while cola:
+        estado = cola.popleft()
+        for caracter, siguiente in transiciones[estado].items():
+            f = falla[estado]
+            while f and caracter not in transiciones[f]:
+                f = falla[f]
+            destino = transiciones[f].get(caracter, 0)
+            falla[siguiente] = destino if destino != siguiente else 0
+            heredado = mejor[falla[siguiente]]
+            if heredado != -1 and (mejor[siguiente] == -1 or heredado < mejor[siguiente]):
+                mejor[siguiente] = heredado
+            cola.append(siguiente)
+
+    return {'transiciones': transiciones, 'falla': falla, 'mejor': mejor}
+
+
+def compilar(diccionario):
+    """Deriva todas las estructuras de búsqueda desde el diccionario JSON"""
+    barrio_a_upz = diccionario['barrio_a_upz']
+    barrio_a_zonas = diccionario['barrio_a_zonas']
+    nombres = list(barrio_a_upz.keys())
+
+    upz_etiquetas = list(diccionario['barrios_por_upz'].keys())
+    zona_etiquetas = list(diccionario['barrios_por_zona'].keys())
+    codigo_upz = {upz: i for i, upz in enumerate(upz_etiquetas)}
+    codigo_zona = {zona: i for i, zona in enumerate(zona_etiquetas)}
+
+    barrio_upz = np.array([codigo_upz.get(barrio_a_upz[n], -1) for n in nombres], dtype=np.int8)
+    barrio_zonas = np.zeros((len(nombres), len(zona_etiquetas)), dtype=bool)
+    for i, nombre in enumerate(nombres):
+        for zona in barrio_a_zonas.get(nombre, []):
+            barrio_zonas[i, codigo_zona[zona]] = True
+
+    # Índice difuso: nombres ordenados por longitud para acotar candidatos
+    por_longitud = sorted(range(len(nombres)), key=lambda i: (len(nombres[i]), i))
+    indice_difuso = {
+        'longitudes': [len(nombres[i]) for i in por_longitud],
+        'nombres': [nombres[i] for i in por_longitud],
+    }
+
+    compuestos = [(nombre, nombre.split()) for nombre in nombres if len(nombre.split()) >= 2]
+
+    zona_por_llave = {
+        f"{codigo}|{barrio}": zona
+        for codigo, tabla in diccionario.get('zona_por_upz_barrio', {}).items()
+        for barrio, zona in tabla.items()
+    }
+
+    return {
+        'version': VERSION_NOMENCLATOR,
+        'nombres': nombres,
+        'codigo_barrio': {n: i for i, n in enumerate(nombres)},
+        'upz_etiquetas': upz_etiquetas,
+        'zona_etiquetas': zona_etiquetas,
+        'barrio_upz': barrio_upz,
+        'barrio_zonas': barrio_zonas,
+        'barrio_a_upz': barrio_a_upz,
+        'barrio_a_zonas': barrio_a_zonas,
+        'barrios_por_upz': diccionario['barrios_por_upz'],
+        'barrios_por_zona': diccionario['barrios_por_zona'],
+        'automata': _compilar_automata(nombres),
+        'indice_difuso': indice_difuso,
+        'compuestos': compuestos,
+        'codigo_upz_por_nombre': diccionario.get('codigo_upz_por_nombre', {}),
+        'zona_por_defecto_upz': diccionario.get('zona_por_defecto_upz', {}),
+        'zona_por_llave': zona_por_llave,
+    }
+
+
+def construir_artefacto(ruta_fuente=DICT_FILE, ruta_artefacto=ARTEFACTO_FILE):
+    """Compila el JSON fuente y guarda el artefacto binario"""
+    with open(ruta_fuente, 'rb') as f:
+        contenido = f.read()
+    nomenclator = compilar(json.loads(contenido.decode('utf-8')))
+    nomenclator['huella_fuente'] = hashlib.sha256(contenido).hexdigest()
+    nomenclator['mtime_fuente'] = os.stat(ruta_fuente).st_mtime_ns
+
+    tmp = Path(f"{ruta_artefacto}.tmp")
+    with open(tmp, 'wb') as f:
+        pickle.dump(nomenclator, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, ruta_artefacto)
+    return nomenclator
+
+
+# =====================================================================
+# CARGA PEREZOSA
+# =====================================================================
+def _artefacto_vigente(nomenclator, ruta_fuente):
+    if nomenclator.get('version') != VERSION_NOMENCLATOR:
+        return False
+    if nomenclator.get('mtime_fuente') == os.stat(ruta_fuente).st_mtime_ns:
+        return True
+    with open(ruta_fuente, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest() == nomenclator.get('huella_fuente')
+
+
+def cargar_nomenclator(ruta_fuente=DICT_FILE, ruta_artefacto=ARTEFACTO_FILE):
+    """
+    Retorna el nomenclátor compilado. Se carga una sola vez por proceso y solo
+    se recompila si el JSON fuente cambió (mtime y, si difiere, hash).
+    """
+    ruta_fuente = Path(ruta_fuente)
+    mtime = os.stat(ruta_fuente).st_mtime_ns
+    en_memoria = _cache.get(ruta_fuente)
+    if en_memoria is not None and en_memoria['mtime_fuente'] == mtime:
+        return en_memoria
+
+    nomenclator = None
+    if Path(ruta_artefacto).exists():
+        try:
+            with open(ruta_artefacto, 'rb') as f:
+                nomenclator = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError):
+            nomenclator = None
+        if nomenclator is not None and not _artefacto_vigente(nomenclator, ruta_fuente):
+            nomenclator = None
+
+    if nomenclator is None:
+        nomenclator = construir_artefacto(ruta_fuente, ruta_artefacto)
+
+    nomenclator['mtime_fuente'] = mtime
+    _cache[ruta_fuente] = nomenclator
+    return nomenclator
+
+
+# =====================================================================
+# BÚSQUEDAS
+# =====================================================================
+def buscar_exacto(nomenclator, texto_norm):
+    """
+    Primer barrio (en el orden del diccionario) contenido en el texto.
+    Equivale a recorrer la lista con `barrio in texto_norm`, en una pasada.
+    """
+    automata = nomenclator['automata']
+    transiciones, falla, mejor = automata['transiciones'], automata['falla'], automata['mejor']
+    estado = 0
+    encontrado = -1
+    for caracter in texto_norm:
+        while estado and caracter not in transiciones[estado]:
+            estado = falla[estado]
+        estado = transiciones[estado].get(caracter, 0)
+        candidato = mejor[estado]
+        if candidato != -1 and (encontrado == -1 or candidato < encontrado):
+            encontrado = candidato
+    return nomenclator['nombres'][encontrado] if encontrado != -1 else None
+
+
+def buscar_aproximado(nomenclator, palabra, cutoff):
+    """
+    Igual que get_close_matches(palabra, nombres, n=1, cutoff), pero solo
+    compara contra nombres cuya longitud permite alcanzar el umbral:
+    ratio ≤ 2·min(la, lb) / (la + lb).
+    """
+    indice = nomenclator['indice_difuso']
+    la = len(palabra)
+    minimo = int(la * cutoff / (2 - cutoff)) - 1
+    maximo = int(la * (2 - cutoff) / cutoff) + 1
+    inicio = bisect.bisect_left(indice['longitudes'], minimo)
+    fin = bisect.bisect_right(indice['longitudes'], maximo)
+    matches = get_close_matches(palabra, indice['nombres'][inicio:fin], n=1, cutoff=cutoff)
+    return matches[0] if matches else None
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser de nomenclatura urbana de Bogotá para Direccion_Actividad
+Reconoce vía principal (Calle/Cl/Cll, Carrera/Cra/Kr, Diagonal, Transversal,
+Avenida...), número con letra/BIS, vía generadora (# / No / con) y placa,
+más los cuadrantes SUR/ESTE en cualquier posición.
+Produce una clave canónica compacta para deduplicar y cachear:
+"Cra 10 # 20-30 sur", "KR 10 NO 20 30 SUR" y "carrera 10 #20-30 Sur"
+→ "KR 10 # 20-30 SUR"
+"""
+
+import re
+import unicodedata
+
+import pandas as pd
+
+# =====================================================================
+# VOCABULARIO DE NOMENCLATURA
+# =====================================================================
+TIPOS_VIA = {
+    'calle': 'CL', 'cl': 'CL', 'cll': 'CL', 'clle': 'CL', 'call': 'CL',
+    'carrera': 'KR', 'carera': 'KR', 'carrea': 'KR', 'cra': 'KR', 'cr': 'KR',
+    'crr': 'KR', 'kr': 'KR', 'kra': 'KR', 'cara': 'KR', 'k': 'KR',
+    'diagonal': 'DG', 'dg': 'DG', 'diag': 'DG',
+    'transversal': 'TV', 'tv': 'TV', 'tr': 'TV', 'trans': 'TV', 'transv': 'TV',
+    'avenida': 'AV', 'av': 'AV', 'avda': 'AV',
+    'ac': 'AC', 'ak': 'AK',
+}
+
+# "Avenida Calle" / "Avenida Carrera" se tratan como una sola vía
+AVENIDAS_COMPUESTAS = {'CL': 'AC', 'KR': 'AK'}
+
+CUADRANTES = {'sur': 'SUR', 'este': 'ESTE', 'oriente': 'ESTE'}
+
+MARCAS_NUMERO = {'#', 'no', 'n', 'nro', 'numero', 'num'}
+CONECTORES = {'con', 'y', 'entre'}
+
+# Palabras que no distinguen un lugar de otro dentro de la localidad
+PALABRAS_IGNORADAS = {'bogota', 'colombia', 'dc'}
+
+COLUMNAS_CANONICAS = [
+    'Direccion_Canonica', 'Via_Tipo', 'Via_Numero', 'Via_Sufijo',
+    'Cruce_Numero', 'Cruce_Sufijo', 'Placa', 'Cuadrante',
+]
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sin tildes y sin espacios duros"""
+    texto = str(texto).replace('\xa0', ' ').replace('–', '-').replace('—', '-')
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto)
+                    if unicodedata.category(c) != 'Mn')
+    return texto.lower().strip()
+
+
+def tokenizar(texto):
+    """Separa números, palabras, '#' y '-' ('72a' → '72', 'a')"""
+    return re.findall(r'\d+|[a-z]+|#|-', normalizar_texto(texto))
+
+
+def _es_letra(token):
+    return len(token) == 1 and token.isalpha()
+
+
+def _leer_numero(tokens, i, cuadrantes):
+    """
+    Lee '<número> [letra] [BIS [letra]]' desde la posición i.
+    Los cuadrantes encontrados se acumulan en `cuadrantes`.
+    Retorna (numero, sufijo, i) o (None, '', i) si no hay número.
+    """
+    if i >= len(tokens) or not tokens[i].isdigit():
+        return None, '', i
+
+    numero = str(int(tokens[i]))
+    letra, bis, letra_bis = '', False, ''
+    i += 1
+    while i < len(tokens):
+        token = tokens[i]
+        if token == 'bis' and not bis:
+            bis = True
+        elif _es_letra(token) and token not in MARCAS_NUMERO and token not in CONECTORES:
+            if bis and not letra_bis:
+                letra_bis = token.upper()
+            elif not bis and not letra:
+                letra = token.upper()
+            else:
+                break
+        elif token in CUADRANTES:
+            cuadrantes.add(CUADRANTES[token])
+        else:
+            break
+        i += 1
+
+    sufijo = letra + (' BIS' if bis else '') + (f' {letra_bis}' if letra_bis else '')
+    return numero, sufijo, i
+
+
+def parsear_direccion(texto):
+    """
+    Descompone una dirección en sus componentes de nomenclatura.
+
+    'Calle 72a bis sur #13-21' →
+        {'via': 'CL', 'numero': '72', 'sufijo': 'A BIS', 'cruce': '13',
+         'cruce_sufijo': '', 'placa': '21', 'cuadrantes': 'SUR', 'resto': ''}
+
+    Retorna None si no encuentra una vía con número.
+    """
+    if texto is None or texto != texto:
+        return None
+
+    tokens = tokenizar(texto)
+    cuadrantes = set()
+    resto = []
+
+    # Vía principal: primer tipo de vía seguido (eventualmente) de número
+    i = 0
+    via = None
+    while i < len(tokens):
+        token = tokens[i]
+        if token in TIPOS_VIA:
+            via = TIPOS_VIA[token]
+            i += 1
+            if via == 'AV' and i < len(tokens) and TIPOS_VIA.get(tokens[i]) in AVENIDAS_COMPUESTAS:
+                via = AVENIDAS_COMPUESTAS[TIPOS_VIA[tokens[i]]]
+                i += 1
+            if i < len(tokens) and tokens[i].isdigit():
+                break
+            via = None
+            continue
+        if token in CUADRANTES:
+            cuadrantes.add(CUADRANTES[token])
+        elif token.isalpha():
+            resto.append(token)
+        i += 1
+
+    if via is None:
+        return None
+
+    numero, sufijo, i = _leer_numero(tokens, i, cuadrantes)
+
+    # Vía generadora: '# 13', 'No 13', 'con carrera 13' o directamente '13'.
+    # Las avenidas con nombre ('Avenida 1 de Mayo # 1-40') saltan el nombre.
+    while i < len(tokens):
+        token = tokens[i]
+        if token in MARCAS_NUMERO or token in CONECTORES or token in TIPOS_VIA or token == '-':
+            i += 1
+        elif via == 'AV' and token.isalpha() and token not in CUADRANTES:
+            resto.append(token)
+            i += 1
+        else:
+            break
+    cruce, cruce_sufijo, i = _leer_numero(tokens, i, cuadrantes)
+
+    # Placa: '-21', ' 21' o 'sur42'
+    placa = None
+    if cruce is not None:
+        if i < len(tokens) and tokens[i] == '-':
+            i += 1
+        if i < len(tokens) and tokens[i].isdigit():
+            placa = str(int(tokens[i]))
+            i += 1
+
+    for token in tokens[i:]:
+        if token in CUADRANTES:
+            cuadrantes.add(CUADRANTES[token])
+        elif token.isalpha() and not _es_letra(token) and token not in MARCAS_NUMERO:
+            resto.append(token)
+
+    resto = [p for p in resto if p not in PALABRAS_IGNORADAS]
+
+    return {
+        'via': via,
+        'numero': numero,
+        'sufijo': sufijo,
+        'cruce': cruce,
+        'cruce_sufijo': cruce_sufijo,
+        'placa': placa,
+        'cuadrantes': ' '.join(c for c in ('SUR', 'ESTE') if c in cuadrantes),
+        'resto': ' '.join(resto),
+    }
+
+
+def clave_segmento(texto):
+    """
+    Clave de tramo de vía: tipo + número + sufijo + rango de vía generadora.
+
+    El rango se toma con el número entero del cruce (13, 13A y 13B caen en
+    la cuadra entre la 13 y la 14), por eso no incluye letra ni placa:
+    'Calle 72a bis sur #13-21' → 'CL 72A BIS # 13 SUR'
+    """
+    partes = parsear_direccion(texto)
+    if not partes or partes['cruce'] is None:
+        return None
+
+    clave = f"{partes['via']} {partes['numero']}{partes['sufijo']} # {partes['cruce']}"
+    if partes['cuadrantes']:
+        clave += f" {partes['cuadrantes']}"
+    return clave
+
+
+def clave_direccion(texto):
+    """
+    Clave canónica de la dirección completa.
+
+    Direcciones con nomenclatura: 'KR 4 # 41A-42 SUR ESTE', seguida de
+    ' | <resto>' si hay texto adicional (nombre de sitio, barrio...).
+    Sin nomenclatura: texto normalizado en mayúsculas ('SALON COMUNAL MONTEBELLO').
+    Los enlaces (maps.app.goo.gl) se conservan tal cual porque distinguen
+    mayúsculas.
+    """
+    if texto is None or texto != texto or not str(texto).strip():
+        return None
+
+    texto = str(texto).strip()
+    if 'http' in texto.lower():
+        return texto
+
+    partes = parsear_direccion(texto)
+    if partes is None:
+        palabras = [t for t in tokenizar(texto) if t not in ('#', '-') and t not in PALABRAS_IGNORADAS]
+        return ' '.join(palabras).upper() or None
+
+    return _clave_componentes(partes)
+
+
+def _clave_componentes(partes):
+    clave = f"{partes['via']} {partes['numero']}{partes['sufijo']}"
+    if partes['cruce'] is not None:
+        clave += f" # {partes['cruce']}{partes['cruce_sufijo']}"
+        if partes['placa'] is not None:
+            clave += f"-{partes['placa']}"
+    if partes['cuadrantes']:
+        clave += f" {partes['cuadrantes']}"
+    if partes['resto']:
+        clave += f" | {partes['resto'].upper()}"
+    return clave
+
+
+def _fila_canonica(texto):
+    clave = clave_direccion(texto)
+    partes = parsear_direccion(texto) if clave and not clave.startswith('http') else None
+    if partes is None:
+        return (clave, None, None, None, None, None, None, None)
+    return (
+        clave, partes['via'], partes['numero'], partes['sufijo'] or None,
+        partes['cruce'], partes['cruce_sufijo'] or None, partes['placa'],
+        partes['cuadrantes'] or None,
+    )
+
+
+def canonizar_direcciones(direcciones):
+    """
+    Canoniza una Serie de direcciones parseando cada valor distinto una sola vez.
+    Retorna un DataFrame alineado con el índice de entrada y COLUMNAS_CANONICAS.
+    """
+    codigos, unicos = pd.factorize(direcciones)
+    tabla = pd.DataFrame([_fila_canonica(v) for v in unicos], columns=COLUMNAS_CANONICAS)
+    # -1 (valores nulos) no existe en la tabla → fila vacía
+    resultado = tabla.reindex(codigos)
+    resultado.index = direcciones.index
+    return resultado
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfilado opcional por etapa (--profile)
+Cada etapa se ejecuta bajo cProfile y deja en perfiles/<fecha>/:
+  NN_<etapa>.pstats      volcado para snakeviz / pstats
+  NN_<etapa>.txt         top-N funciones por tiempo acumulado
+  NN_<etapa>.lineas.txt  (con --profile-lineas) muestreo por línea
+El muestreo por línea es un hilo que cada PERFIL_INTERVALO_MS mira el frame
+del hilo de la etapa y cuenta la línea de código propio (no pandas) más
+interna: ahí aparecen los bucles iterrows. Solo se perfila el hilo que
+ejecuta la etapa: para ver las tablas que se construyen en paralelo
+(tareas_paralelas.py) use WORKERS_DIMENSIONES=1.
+
+Desactivado (sesion None) no se envuelve nada: costo cero.
+"""
+
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+PERFILES_DIR = BASE_DIR / 'perfiles'
+
+TOP = int(os.getenv('PERFIL_TOP', '30'))
+INTERVALO_MS = float(os.getenv('PERFIL_INTERVALO_MS', '2'))
+
+
+def agregar_argumentos(parser):
+    """Opciones --profile, --profile-top y --profile-lineas"""
+    parser.add_argument('--profile', nargs='?', const=PERFILES_DIR, default=None, type=Path, metavar='DIR',
+                        help=f'Perfila cada etapa con cProfile (por defecto en {PERFILES_DIR.name}/)')
+    parser.add_argument('--profile-top', type=int, default=TOP, metavar='N',
+                        help='Funciones en el resumen de cada etapa')
+    parser.add_argument('--profile-lineas', action='store_true',
+                        help='Agrega muestreo por línea del código propio')
+    return parser
+
+
+def nueva_sesion(directorio=None, top=TOP, lineas=False):
+    """Sesión de perfilado en directorio/<fecha>; None si directorio es None"""
+    if directorio is None:
+        return None
+    carpeta = Path(directorio) / datetime.now().strftime('%Y%m%d_%H%M%S')
+    carpeta.mkdir(parents=True, exist_ok=True)
+    return {'carpeta': carpeta, 'top': top, 'lineas': lineas, 'etapas': []}
+
+
+def sesion_desde_args(args):
+    return nueva_sesion(args.profile, args.profile_top, args.profile_lineas)
+
+
+# =====================================================================
+# MUESTREO POR LÍNEA
+# =====================================================================
+def _es_propio(archivo):
+    return (archivo.startswith(str(BASE_DIR)) and 'site-packages' not in archivo
+            and archivo != __file__)
+
+
+def _muestrear(hilo, intervalo, conteos, detener):
+    while not detener.wait(intervalo):
+        frame = sys._current_frames().get(hilo)
+        while frame is not None and not _es_propio(frame.f_code.co_filename):
+            frame = frame.f_back
+        if frame is not None:
+            conteos[(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)] += 1
+
+
+def _escribir_lineas(ruta, nombre, conteos, top):
+    total = sum(conteos.values())
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(f"Etapa {nombre}: {total} muestras cada {INTERVALO_MS:g} ms\n\n")
+        f.write(f"{'Muestras':>9} {'%':>6}  Ubicación\n")
+        for (archivo, linea, funcion), n in conteos.most_common(top):
+            relativo = os.path.relpath(archivo, BASE_DIR)
+            f.write(f"{n:>9} {n / total * 100:>5.1f}%  {relativo}:{linea} ({funcion})\n")
+            f.write(f"{'':>18}{linecache.getline(archivo, linea).strip()}\n")
+
+
+# =====================================================================
+# PERFIL DE UNA ETAPA
+# =====================================================================
+@contextmanager
+def perfil(sesion, nombre):
+    """Perfila el bloque como la etapa `nombre` (no hace nada sin sesión)"""
+    if sesion is None:
+        yield
+        return
+
+    prefijo = sesion['carpeta'] / f"{len(sesion['etapas']) + 1:02d}_{nombre}"
+    muestreo = None
+    if sesion['lineas']:
+        conteos, detener = Counter(), threading.Event()
+        muestreo = threading.Thread(
+            target=_muestrear, args=(threading.get_ident(), INTERVALO_MS / 1000, conteos, detener), daemon=True
+        )
+        muestreo.start()
+
+    perfilador = cProfile.Profile()
+    inicio = time.perf_counter()
+    perfilador.enable()
+    try:
+        yield
+    finally:
+        perfilador.disable()
+        segundos = time.perf_counter() - inicio
+        if muestreo is not None:
+            detener.set()
+            muestreo.join()
+            _escribir_lineas(prefijo.with_suffix('.lineas.txt'), nombre, conteos, sesion['top'])
+
+        perfilador.dump_stats(prefijo.with_suffix('.pstats'))
+        texto = io.StringIO()
+        pstats.Stats(perfilador, stream=texto).strip_dirs().sort_stats('cumulative').print_stats(sesion['top'])
+        with open(prefijo.with_suffix('.txt'), 'w', encoding='utf-8') as f:
+            f.write(f"Etapa {nombre}: {segundos:.3f} s\n")
+            f.write(texto.getvalue())
+        sesion['etapas'].append((nombre, segundos, prefijo))
+
+
+def _llamar(nombre, funcion, argumentos):
+    return funcion(*argumentos)
+
+
+def ejecutor(sesion, ejecutar=_llamar):
+    """Para ejecutar_grafo(ejecutar=...): perfila cada etapa ejecutada"""
+    if sesion is None:
+        return ejecutar
+
+    def perfilar(nombre, funcion, argumentos):
+        with perfil(sesion, nombre):
+            return ejecutar(nombre, funcion, argumentos)
+    return perfilar
+
+
+def imprimir_sesion(sesion, salida=print):
+    """Archivos generados por etapa"""
+    if sesion is None:
+        return
+    salida(f"🔬 Perfiles en {sesion['carpeta']}")
+    for nombre, segundos, prefijo in sesion['etapas']:
+        salida(f"   {nombre:<30} {segundos:8.3f} s  {prefijo.name}.txt")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cadena de scripts de actividades ejecutada en memoria
+mapear_columnas → limpiar_agendamiento_con_diccionario → limpiar_csv_completo
+→ enriquecer_con_barrios → mejorar_extraccion_barrios → generar_modelo_completo
+Cada etapa recibe y retorna DataFrames y declara sus entradas en un grafo
+(grafo_etapas.py); su resultado queda en caché bajo la huella de entradas y
+código, y solo se re-ejecutan las etapas cuyas entradas cambiaron. Editar
+diccionario_upz_zonas.json recalcula la validación de zonas y lo que sigue,
+pero no la deduplicación ni la extracción de barrios.
+
+Los intermedios (limpio, _fixed, enriquecido sin ID_Barrio) solo se escriben
+con --guardar-intermedios o GUARDAR_INTERMEDIOS=1.
+
+Uso: python scripts/pipeline_actividades.py [--entrada fact_actividades.csv] [--guardar-intermedios] [--sin-cache]
+     [--profile [DIR]] [--profile-lineas]
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from mapear_columnas import estandarizar_columnas
+from limpiar_agendamiento_con_diccionario import leer_actividades, depurar_actividades, validar_zonas
+from limpiar_csv_completo import validar_estructura
+from enriquecer_con_barrios import extraer_barrios, completar_actividades, reportar_calidad
+from mejorar_extraccion_barrios import mejorar_extraccion
+from generar_modelo_completo import generar_modelo, guardar_modelo, imprimir_resumen
+from grafo_etapas import etapa, fuente_archivo, fuente_valor, ejecutar_grafo, imprimir_registro
+from perfilado import agregar_argumentos, sesion_desde_args, ejecutor, imprimir_sesion
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DIMENSIONES_DIR = BASE_DIR / "dimensiones"
+ENTRADA = BASE_DIR / "fact_actividades.csv"
+DICT_UPZ_ZONAS = BASE_DIR / "scripts" / "diccionario_upz_zonas.json"
+DICT_BARRIOS = BASE_DIR / "scripts" / "diccionario_barrios_completo.json"
+
+GUARDAR_INTERMEDIOS = os.getenv('GUARDAR_INTERMEDIOS', '0') == '1'
+
+# Archivos que escribía cada script, por artefacto del grafo (mismo formato que en disco)
+INTERMEDIOS = {
+    'columnas': [(BASE_DIR / "fact_actividades.csv", {'encoding': 'utf-8-sig'})],
+    'zonas': [
+        (BASE_DIR / "fact_actividades_limpio.csv", {'encoding': 'utf-8-sig'}),
+        (BASE_DIR / "fact_actividades_limpio_fixed.csv", {'encoding': 'utf-8', 'sep': ';'}),
+    ],
+    'enriquecido': [(DIMENSIONES_DIR / "fact_actividades_enriquecido.csv", {'encoding': 'utf-8', 'sep': ';'})],
+    'mejorado': [(BASE_DIR / "fact_actividades_enriquecido.csv", {'encoding': 'utf-8'})],
+}
+
+
+def _leer_json(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# =====================================================================
+# ETAPAS (las dependencias que la función lee por su cuenta, como el
+# nomenclátor, se declaran igual para la huella)
+# =====================================================================
+# Columnas que la cadena vuelve a calcular; llegan ya calculadas en el
+# fact_actividades.csv que escribe run_pipeline.py
+DERIVADAS = ['ID_Actividad', 'UPZ_Enriquecida', 'Zona_Enriquecida', 'Barrio_Extraido']
+
+
+def _columnas(df):
+    return estandarizar_columnas(df).drop(columns=DERIVADAS, errors='ignore')
+
+
+def _zonas(depurado, dicc_upz_zonas, _dicc_barrios):
+    return validar_estructura(validar_zonas(depurado, dicc_upz_zonas))
+
+
+def _extraccion(depurado, _dicc_barrios):
+    return extraer_barrios(depurado)
+
+
+def _enriquecido(zonas, extraccion, dicc_upz_zonas, _dicc_barrios):
+    return completar_actividades(zonas, extraccion, dicc_upz_zonas)
+
+
+def _mejorado(enriquecido, _dicc_barrios):
+    return mejorar_extraccion(enriquecido)
+
+
+def construir_grafo(df=None, entrada=ENTRADA):
+    """Nodos de la cadena; df en memoria reemplaza al CSV de entrada"""
+    if df is None:
+        fuente = fuente_archivo('fact_actividades', entrada, leer_actividades)
+    else:
+        fuente = fuente_valor('fact_actividades', df)
+
+    territoriales = ['codigos_territoriales', 'nomenclator', 'validacion_zona_upz', 'memoizacion']
+    return [
+        fuente,
+        fuente_archivo('diccionario_upz_zonas', DICT_UPZ_ZONAS, _leer_json),
+        fuente_archivo('diccionario_barrios', DICT_BARRIOS, _leer_json),
+
+        etapa('columnas', _columnas, ['fact_actividades'], modulos=['mapear_columnas']),
+        etapa('depurado', depurar_actividades, ['columnas'],
+              modulos=['casi_duplicados', 'normalizar_direcciones', 'memoizacion']),
+        etapa('zonas', _zonas, ['depurado', 'diccionario_upz_zonas', 'diccionario_barrios'],
+              modulos=['limpiar_agendamiento_con_diccionario', 'limpiar_csv_completo'] + territoriales),
+        etapa('extraccion', _extraccion, ['depurado', 'diccionario_barrios'],
+              modulos=['enriquecer_con_barrios', 'indice_segmentos', 'normalizar_direcciones',
+                       'instrumentacion'] + territoriales),
+        etapa('enriquecido', _enriquecido, ['zonas', 'extraccion', 'diccionario_upz_zonas', 'diccionario_barrios'],
+              modulos=['enriquecer_con_barrios'] + territoriales),
+        etapa('mejorado', _mejorado, ['enriquecido', 'diccionario_barrios'],
+              modulos=['mejorar_extraccion_barrios'] + territoriales),
+        etapa('modelo', generar_modelo, ['mejorado', 'diccionario_upz_zonas', 'diccionario_barrios']),
+    ]
+
+
+def ejecutar_cadena(df=None, entrada=ENTRADA, guardar_intermedios=GUARDAR_INTERMEDIOS, usar_cache=True,
+                    sesion_perfil=None):
+    """
+    Ejecuta la cadena sobre df (o sobre el CSV de entrada).
+    Retorna (df_actividades final, {archivo: tabla} del modelo, registro del grafo).
+    """
+    objetivos = ['modelo'] + (list(INTERMEDIOS) if guardar_intermedios else [])
+    valores, registro = ejecutar_grafo(
+        construir_grafo(df, entrada), objetivos, usar_cache=usar_cache, ejecutar=ejecutor(sesion_perfil)
+    )
+
+    if guardar_intermedios:
+        for artefacto, archivos in INTERMEDIOS.items():
+            for ruta, formato in archivos:
+                valores[artefacto].to_csv(ruta, index=False, **formato)
+                print(f"💾 Intermedio: {ruta}")
+
+    df, tablas = valores['modelo']
+    return df, tablas, registro
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entrada', type=Path, default=ENTRADA)
+    parser.add_argument('--guardar-intermedios', action='store_true', default=GUARDAR_INTERMEDIOS)
+    parser.add_argument('--sin-cache', action='store_true', help='Ejecuta todas las etapas sin leer ni escribir caché')
+    agregar_argumentos(parser)
+    args = parser.parse_args(argv)
+    sesion_perfil = sesion_desde_args(args)
+
+    DIMENSIONES_DIR.mkdir(exist_ok=True)
+    df, tablas, registro = ejecutar_cadena(
+        entrada=args.entrada, guardar_intermedios=args.guardar_intermedios, usar_cache=not args.sin_cache,
+        sesion_perfil=sesion_perfil,
+    )
+
+    # Salidas finales: modelo dimensional y fact con ID_Barrio
+    guardar_modelo(df, tablas)
+    reportar_calidad(df)
+    imprimir_resumen(tablas)
+
+    print("\n⏱️  Etapas:")
+    imprimir_registro(registro)
+    imprimir_sesion(sesion_perfil)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Puntos de control para reanudar una ejecución fallida (--resume)
+Cada ejecución por lotes deja en PUNTOS_CONTROL_DIR:
+  manifiesto.json   estado de la ejecución y etapas completadas
+  extraccion.pkl    respuestas de las hojas (autenticar y leer es lo más caro)
+  etapas/           caché del grafo de esta ejecución, solo si la caché de
+                    etapas entre ejecuciones está desactivada
+Las etapas del grafo no se copian: su punto de control es el archivo de
+caché de grafo_etapas.py. Al reanudar se cargan las respuestas guardadas en
+lugar de volver a extraer, las etapas completadas se leen de caché y solo
+corren las que faltan. Si entre medio se corrigió el código de una etapa,
+su huella cambia y esa etapa (y las que dependen de ella) se recalcula.
+
+Una ejecución nueva borra los puntos de control de la anterior. El modo
+vigilancia no los usa: cada ciclo vuelve a leer las hojas y sus etapas ya
+quedan en memoria.
+"""
+
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+PUNTOS_DIR = Path(os.getenv('PUNTOS_CONTROL_DIR', BASE_DIR / '.puntos_control'))
+MANIFIESTO = 'manifiesto.json'
+
+
+def _ahora():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _escribir(ruta, escribir, modo='w'):
+    """Escritura atómica: un corte a mitad no deja archivos a medias"""
+    tmp = ruta.with_name(ruta.name + '.tmp')
+    with open(tmp, modo, **({} if 'b' in modo else {'encoding': 'utf-8'})) as f:
+        escribir(f)
+    os.replace(tmp, ruta)
+
+
+def _guardar_manifiesto(ejecucion):
+    _escribir(Path(ejecucion['directorio']) / MANIFIESTO,
+              lambda f: json.dump(ejecucion, f, ensure_ascii=False, indent=2))
+
+
+# =====================================================================
+# EJECUCIÓN
+# =====================================================================
+def nueva_ejecucion(fuente, directorio=PUNTOS_DIR):
+    """Borra los puntos de control anteriores e inicia el manifiesto"""
+    directorio = Path(directorio)
+    shutil.rmtree(directorio, ignore_errors=True)
+    directorio.mkdir(parents=True)
+    ejecucion = {
+        'directorio': str(directorio), 'inicio': _ahora(), 'fuente': fuente,
+        'estado': 'en_curso', 'etapas': {},
+    }
+    _guardar_manifiesto(ejecucion)
+    return ejecucion
+
+
+def pendiente(fuente, directorio=PUNTOS_DIR):
+    """
+    Manifiesto de la última ejecución si quedó incompleta (error o proceso
+    interrumpido) y leía la misma `fuente`; None si no hay nada que reanudar.
+    """
+    ruta = Path(directorio) / MANIFIESTO
+    if not ruta.exists():
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        ejecucion = json.load(f)
+    if ejecucion['estado'] == 'completada' or ejecucion['fuente'] != fuente:
+        return None
+    ejecucion['directorio'] = str(directorio)
+    return ejecucion
+
+
+def cerrar(ejecucion, estado, error=None):
+    """estado: 'completada' o 'error'"""
+    ejecucion['estado'] = estado
+    ejecucion['fin'] = _ahora()
+    if error is not None:
+        ejecucion['error'] = error
+    _guardar_manifiesto(ejecucion)
+
+
+def directorio_etapas(ejecucion):
+    """Caché del grafo propia de la ejecución (cuando no se usa la compartida)"""
+    return Path(ejecucion['directorio']) / 'etapas'
+
+
+# =====================================================================
+# ETAPAS
+# =====================================================================
+def completada(ejecucion, etapa):
+    return etapa in ejecucion['etapas']
+
+
+def marcar(ejecucion, etapa, **detalle):
+    """Registra la etapa como completada en el manifiesto"""
+    ejecucion['etapas'][etapa] = {'fecha': _ahora(), **detalle}
+    _guardar_manifiesto(ejecucion)
+
+
+def guardar(ejecucion, etapa, valor):
+    """Resultado de una etapa fuera del grafo → <etapa>.pkl"""
+    ruta = Path(ejecucion['directorio']) / f"{etapa}.pkl"
+    _escribir(ruta, lambda f: pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL), 'wb')
+    marcar(ejecucion, etapa, archivo=ruta.name, bytes=ruta.stat().st_size)
+
+
+def cargar(ejecucion, etapa):
+    with open(Path(ejecucion['directorio']) / ejecucion['etapas'][etapa]['archivo'], 'rb') as f:
+        return pickle.load(f)
+
+
+def marcador(ejecucion, ejecutar):
+    """Para ejecutar_grafo(ejecutar=...): marca cada etapa apenas termina"""
+    def marcar_etapa(nombre, funcion, argumentos):
+        valor = ejecutar(nombre, funcion, argumentos)
+        marcar(ejecucion, nombre, estado='ejecutada')
+        return valor
+    return marcar_etapa
+
+
+def marcar_registro(ejecucion, registro_grafo):
+    """Etapas del grafo servidas desde caché o memoria"""
+    for nombre, (estado, _) in registro_grafo.items():
+        if estado in ('caché', 'memoria'):
+            ejecucion['etapas'][nombre] = {'fecha': _ahora(), 'estado': estado}
+    _guardar_manifiesto(ejecucion)
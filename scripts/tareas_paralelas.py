@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ejecución concurrente de tareas independientes (constructores de dimensiones)
+Cada tarea es (nombre, función, argumentos). Se reparten en un pool de hilos
+(por defecto) o de procesos; los resultados se recogen en el orden en que se
+declararon las tareas, no en el que terminan, así que la salida es la misma
+con cualquier número de workers. Cada tarea se cronometra dentro del worker.
+
+Configuración: WORKERS_DIMENSIONES (1 = secuencial) y POOL_DIMENSIONES
+('hilos' o 'procesos'; con procesos las funciones y argumentos deben poder
+serializarse con pickle).
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+WORKERS = int(os.getenv('WORKERS_DIMENSIONES', '0')) or min(8, os.cpu_count() or 1)
+MODO = os.getenv('POOL_DIMENSIONES', 'hilos')
+
+POOLS = {'hilos': ThreadPoolExecutor, 'procesos': ProcessPoolExecutor}
+
+
+def tarea(nombre, funcion, *args):
+    return nombre, funcion, args
+
+
+def _cronometrar(funcion, args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def ejecutar_tareas(tareas, workers=WORKERS, modo=MODO, inicializar=None):
+    """
+    Ejecuta las tareas y retorna ({nombre: resultado}, {nombre: segundos}),
+    ambos en el orden de declaración. `inicializar()` corre una vez por
+    worker antes de sus tareas (p. ej. cargar datos de solo lectura).
+    """
+    if modo not in POOLS:
+        raise ValueError(f"Modo de pool desconocido: {modo} (use {', '.join(POOLS)})")
+
+    if workers <= 1 or len(tareas) <= 1:
+        if inicializar is not None:
+            inicializar()
+        salidas = [_cronometrar(funcion, args) for _, funcion, args in tareas]
+    else:
+        with POOLS[modo](max_workers=min(workers, len(tareas)), initializer=inicializar) as pool:
+            futuros = [pool.submit(_cronometrar, funcion, args) for _, funcion, args in tareas]
+            salidas = [futuro.result() for futuro in futuros]
+
+    resultados = {nombre: resultado for (nombre, _, _), (resultado, _) in zip(tareas, salidas)}
+    tiempos = {nombre: segundos for (nombre, _, _), (_, segundos) in zip(tareas, salidas)}
+    return resultados, tiempos
+
+
+def imprimir_tiempos(tiempos, salida=print):
+    """Tiempo de cada tarea y total acumulado"""
+    for nombre, segundos in tiempos.items():
+        salida(f"   ⏱️  {nombre:<30} {segundos:8.3f} s")
+    salida(f"   ⏱️  {'total (suma de tareas)':<30} {sum(tiempos.values()):8.3f} s")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor vectorizado de validación Zona ↔ UPZ
+Codifica UPZ y zona con los códigos canónicos de codigos_territoriales y
+consulta una matriz booleana de compatibilidad construida desde
+diccionario_upz_zonas.json, en lugar de validar fila por fila.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from codigos_territoriales import (
+    VACIO, DESCONOCIDO, codigo_upz, codigo_zona, codificar_upz, codificar_zona, cargar_tablas
+)
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DICT_UPZ_ZONAS = BASE_DIR / "scripts" / "diccionario_upz_zonas.json"
+
+# Estados posibles de cada fila
+VALIDO = 'Válido'
+CONFLICTO = 'Conflicto'
+SIN_ZONA = 'Sin zona'
+UPZ_DESCONOCIDA = 'UPZ desconocida'
+UPZ_VACIA = 'UPZ vacía'
+UPZ_ZONA_VACIAS = 'UPZ y Zona vacías'
+
+
+def construir_motor(diccionario=None):
+    """
+    Construye el motor de validación desde {upz: [zonas]}.
+
+    Retorna un dict con:
+      - matriz:       np.ndarray bool [código UPZ, código zona]
+      - conocida:     np.ndarray bool por código UPZ (está en el diccionario)
+      - zonas_texto:  por código de UPZ, sus zonas válidas como texto ("Zona 1, Zona 2")
+    """
+    if diccionario is None:
+        with open(DICT_UPZ_ZONAS, 'r', encoding='utf-8') as f:
+            diccionario = json.load(f)
+
+    tablas = cargar_tablas()
+    n_upz = max(tablas['etiqueta_upz']) + 1
+    n_zona = max(tablas['etiqueta_zona']) + 1
+
+    matriz = np.zeros((n_upz, n_zona), dtype=bool)
+    conocida = np.zeros(n_upz, dtype=bool)
+    zonas_texto = np.full(n_upz, None, dtype=object)
+    for upz, zonas in diccionario.items():
+        fila = codigo_upz(upz)
+        if fila < 0:
+            continue
+        if not conocida[fila]:
+            conocida[fila] = True
+            zonas_texto[fila] = ", ".join(zonas)
+        for zona in zonas:
+            columna = codigo_zona(zona)
+            if columna >= 0:
+                matriz[fila, columna] = True
+
+    return {'matriz': matriz, 'conocida': conocida, 'zonas_texto': zonas_texto}
+
+
+def validar(upz, zona, motor):
+    """
+    Valida cada par (UPZ, Zona). Una zona compuesta ("Zona 1, Zona 2") no es
+    una zona individual y se reporta como conflicto.
+
+    Retorna un DataFrame alineado con la entrada:
+      - Estado:        VALIDO, CONFLICTO, SIN_ZONA, UPZ_DESCONOCIDA, UPZ_VACIA, UPZ_ZONA_VACIAS
+      - Zona_Correcta: zonas válidas de la UPZ (solo si la UPZ es conocida)
+    """
+    cod_upz = codificar_upz(upz).astype(np.int64)
+    cod_zona = codificar_zona(zona).astype(np.int64)
+
+    # UPZ con código oficial pero ausente del diccionario de zonas → desconocida
+    con_codigo = cod_upz >= 0
+    cod_upz[con_codigo] = np.where(motor['conocida'][cod_upz[con_codigo]], cod_upz[con_codigo], DESCONOCIDO)
+
+    upz_conocida = cod_upz >= 0
+    zona_conocida = cod_zona >= 0
+    compatible = np.zeros(len(cod_upz), dtype=bool)
+    ambos = upz_conocida & zona_conocida
+    compatible[ambos] = motor['matriz'][cod_upz[ambos], cod_zona[ambos]]
+
+    estado = np.select(
+        [
+            (cod_upz == VACIO) & (cod_zona == VACIO),
+            cod_upz == VACIO,
+            cod_upz == DESCONOCIDO,
+            cod_zona == VACIO,
+            compatible,
+        ],
+        [UPZ_ZONA_VACIAS, UPZ_VACIA, UPZ_DESCONOCIDA, SIN_ZONA, VALIDO],
+        default=CONFLICTO,
+    )
+
+    zona_correcta = np.full(len(cod_upz), None, dtype=object)
+    zona_correcta[upz_conocida] = motor['zonas_texto'][cod_upz[upz_conocida]]
+
+    return pd.DataFrame({'Estado': estado, 'Zona_Correcta': zona_correcta}, index=upz.index)
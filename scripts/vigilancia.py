@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo vigilancia: el pipeline como proceso de larga vida
+La ejecución por hora paga siempre un arranque en frío (instalar, importar
+pandas y googleapiclient, autenticar, cargar diccionarios, reconstruir todo).
+En modo vigilancia el proceso queda vivo con el cliente autorizado, el
+nomenclátor compilado, el índice de claves y las etapas de la última corrida
+en memoria. Cada INTERVALO segundos consulta una huella barata de la fuente
+y solo si cambió corre el pipeline, que recalcula únicamente las etapas
+cuyas entradas cambiaron.
+
+Huellas disponibles:
+  - huella_drive: modifiedTime del spreadsheet (una llamada a Drive v3)
+  - huella_hojas: columna A de cada hoja (cualquier cliente tipo Sheets)
+  - huella_archivos: fecha y tamaño de archivos locales (p. ej. los payloads
+    de datos_sinteticos.py como sustituto local de la API)
+"""
+
+import hashlib
+import json
+import os
+import signal
+import time
+from pathlib import Path
+
+INTERVALO = float(os.getenv('VIGILAR_INTERVALO', '60'))
+
+
+# =====================================================================
+# HUELLAS DE LA FUENTE
+# =====================================================================
+def huella_drive(drive, file_id):
+    """Última modificación del archivo según Drive"""
+    return drive.files().get(fileId=file_id, fields='modifiedTime', supportsAllDrives=True).execute()['modifiedTime']
+
+
+def huella_hojas(service, spreadsheet_id, hojas):
+    """sha256 de la columna A (marca temporal) de cada hoja"""
+    h = hashlib.sha256()
+    for hoja in hojas:
+        result = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=f"{hoja}!A:A").execute()
+        h.update(json.dumps(result.get('values', []), ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+
+def huella_archivos(rutas):
+    """(ruta, mtime, tamaño) de cada archivo existente"""
+    return tuple(
+        (str(r), r.stat().st_mtime_ns, r.stat().st_size)
+        for r in sorted(map(Path, rutas)) if r.exists()
+    )
+
+
+# =====================================================================
+# BUCLE
+# =====================================================================
+def _terminar(signum, frame):
+    raise KeyboardInterrupt
+
+
+def vigilar(huella, ciclo, intervalo=INTERVALO, consultas=None, dormir=time.sleep, salida=print):
+    """
+    Ejecuta ciclo() al iniciar y cada vez que huella() cambia. Si ciclo()
+    falla (lanza o retorna distinto de 0) la huella no se marca como
+    procesada y se reintenta en la siguiente consulta. `consultas` limita
+    el número de consultas (None = hasta Ctrl+C o SIGTERM). Retorna el
+    código del último ciclo.
+    """
+    try:
+        signal.signal(signal.SIGTERM, _terminar)
+    except ValueError:  # fuera del hilo principal
+        pass
+
+    procesada = None
+    codigo = 0
+    n = 0
+    salida(f"👀 Vigilando cambios cada {intervalo:g} s (Ctrl+C para terminar)")
+    try:
+        while consultas is None or n < consultas:
+            n += 1
+            try:
+                actual = huella()
+            except Exception as e:
+                salida(f"⚠️ No se pudo consultar la fuente: {e}")
+                dormir(intervalo)
+                continue
+
+            if actual != procesada:
+                inicio = time.perf_counter()
+                try:
+                    codigo = ciclo()
+                except Exception as e:
+                    salida(f"💥 Ciclo fallido: {e}")
+                    codigo = 1
+                if codigo == 0:
+                    procesada = actual
+                salida(f"🔁 Ciclo {'completado' if codigo == 0 else 'fallido'} en "
+                       f"{time.perf_counter() - inicio:.2f} s")
+            dormir(intervalo)
+    except KeyboardInterrupt:
+        salida("🛑 Vigilancia detenida")
+    return codigo
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from conflictos_agenda import TIPO_RESPONSABLE, detectar_conflictos
+
+
+def _agenda(responsables, areas):
+    return pd.DataFrame({
+        'ID_Actividad': range(1, len(responsables) + 1),
+        'Fecha_Actividad': '05/06/2025',
+        'Hora_Inicio': '10:00:00',
+        'Direccion_Actividad': [f'Calle {10 + i} # 20-30' for i in range(len(responsables))],
+        'Responsable_Actividad': responsables,
+        'Responsable_Principal': areas,
+    })
+
+
+def test_misma_area_distinta_persona_no_cruza():
+    agenda = _agenda(['Ana Garcia', 'Danilo Lopez'], ['Territorio Confiable'] * 2)
+    assert detectar_conflictos(agenda).empty
+
+
+def test_misma_persona_cruza():
+    agenda = _agenda(['Ana Garcia', 'ANA GARCIA / Danilo Lopez'], ['Seguridad', 'Justicia Social'])
+    conflictos = detectar_conflictos(agenda)
+    assert conflictos['Tipo_Conflicto'].tolist() == [TIPO_RESPONSABLE]
+    assert conflictos['Clave'].tolist() == ['ANA GARCIA']
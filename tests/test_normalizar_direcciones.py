@@ -0,0 +1,16 @@
+import pytest
+
+from normalizar_direcciones import clave_direccion
+
+
+@pytest.mark.parametrize('texto, clave', [
+    ('Cra 10 # 20-30 sur', 'KR 10 # 20-30 SUR'),
+    ('carrera 10 #20-30 Sur', 'KR 10 # 20-30 SUR'),
+    ('Calle 72a bis sur #13-21', 'CL 72A BIS # 13-21 SUR'),
+    # 'y' es un conector, no la letra del número
+    ('Cl 10 y 20', 'CL 10 # 20'),
+    ('Calle 10 A y 20', 'CL 10A # 20'),
+    ('calle 32 sur entre carrera 6 y 9', 'CL 32 # 6 SUR'),
+])
+def test_clave_direccion(texto, clave):
+    assert clave_direccion(texto) == clave